@@ -1,31 +1,75 @@
 from flask import Flask, render_template, jsonify, request 
-from flask import redirect
+from flask import redirect, Response, stream_with_context
 from flask_cors import CORS
 import pandas as pd
 import numpy as np
 import requests
 from datetime import datetime
 import json
+import math
 import os
 from io import StringIO
 from services.data_processor import DataProcessor
 from services.nasa_api import NASAExoplanetAPI
+from services.catalog import ExoplanetCatalog
+from services.koi_catalog import KOICatalog
+from services.koi_scoring import KOIScorer
+from services.koi_crossmatch import KOICrossMatch, DEFAULT_RADIUS_ARCSEC
+from services.aggregates import MaterializedAggregates, DEFAULT_SIZE_RESOLUTION
+from services.sky_tiles import SkyTiles
+from services.orbits import MAX_ORBIT_POINTS
+from services.tap_sync import TAPSync
+from services.catalog_refresher import CatalogRefresher
+from services.query_engine import TableQuery, QueryError
+from services.export import iter_ndjson, iter_csv
 from services.prediction_service import ExoplanetPredictor
 from services.radial_velocity import RadialVelocityAnalyzer
 
 app = Flask(__name__)
-CORS(app)  # Enable CORS for all routes
+# Enable CORS for all routes and let browsers read the paging/version headers
+CORS(app, expose_headers=['X-Total-Count', 'X-Next-Cursor', 'X-Catalog-Version', 'X-Catalog-Fingerprint'])
 
 # Initialize services
-data_processor = DataProcessor()
 nasa_api = NASAExoplanetAPI()
+catalog = ExoplanetCatalog(nasa_api)
+data_processor = DataProcessor(catalog)
+aggregates = MaterializedAggregates(catalog, data_processor)
+sky_tiles = SkyTiles(catalog)
+tap_sync = TAPSync(nasa_api)
+koi_catalog = KOICatalog()
+koi_crossmatch = KOICrossMatch(koi_catalog, catalog)
+refresher = CatalogRefresher(
+    catalog,
+    tap_sync,
+    sync_interval=int(os.environ.get('EXORA_SYNC_INTERVAL', 3600)),
+    poll_interval=int(os.environ.get('EXORA_POLL_INTERVAL', 60)),
+    shared=os.environ.get('EXORA_SHARED_CATALOG') == '1'
+)
+
+if refresher.generation is not None:
+    # Preloaded by the gunicorn master (gunicorn.conf.py): build the catalog
+    # once so that forked workers share it; the config starts the refreshers
+    catalog.load()
+
+def start_background_refresh(sync=True):
+    """Start the catalog refresher unless EXORA_BACKGROUND_REFRESH=0
+
+    Only server entry points call this (`python app.py` and
+    gunicorn.conf.py), so importing the app in tests or tools never starts
+    a thread that takes the sync lock or calls NASA.
+    """
+    if os.environ.get('EXORA_BACKGROUND_REFRESH', '1') == '1':
+        refresher.start(sync=sync)
+
 rv_analyzer = RadialVelocityAnalyzer()
 
 try:
     predictor = ExoplanetPredictor()
+    koi_scorer = KOIScorer(koi_catalog, predictor)
     print("Exoplanet predictor loaded successfully!")
 except Exception as e:
     predictor = None
+    koi_scorer = None
     print(f"Warning: Could not load predictor - {e}")
 
 def convert_for_json(obj):
@@ -55,6 +99,24 @@ def convert_for_json(obj):
             return None
 
 
+@app.before_request
+def pin_catalog_snapshot():
+    """Answer each request from the one catalog snapshot it reads first"""
+    catalog.begin_request()
+
+@app.after_request
+def add_catalog_version(response):
+    """Expose the snapshot that served the request so caches can key on it
+
+    X-Catalog-Fingerprint identifies the data and is the same in every
+    worker; X-Catalog-Version is this process's reload counter.
+    """
+    snapshot = catalog.end_request()
+    if snapshot is not None and request.path.startswith('/api/'):
+        response.headers['X-Catalog-Fingerprint'] = snapshot.fingerprint
+        response.headers['X-Catalog-Version'] = str(snapshot.version)
+    return response
+
 @app.route('/')
 def index():
     """Main dashboard with overview"""
@@ -80,32 +142,222 @@ def planet_explorer():
     """Individual planet exploration page"""
     return render_template('planet_explorer.html')
 
+def paged_response(query, result=None):
+    """Run a TableQuery; the body is the list of rows and paging goes in headers"""
+    if result is None:
+        result = query.execute()
+    response = jsonify(result['results'])
+    response.headers['X-Total-Count'] = str(result['total'])
+    if result['next_cursor']:
+        response.headers['X-Next-Cursor'] = result['next_cursor']
+    return response
+
 @app.route('/api/exoplanets')
 def get_exoplanets():
-    """Get exoplanet data from NASA API"""
+    """Get exoplanets, optionally filtered, sorted, paginated and projected
+
+    Range filters: <field>_min / <field>_max; equality: <field>=v1,v2;
+    sort=-discovery_year,name; limit/offset or cursor; fields=name,radius.
+    The body stays a plain list; X-Total-Count and X-Next-Cursor carry paging.
+    """
+    try:
+        snapshot = catalog.snapshot
+        query = TableQuery.from_args(snapshot.planets, request.args)
+        return paged_response(query, catalog.query_planets(query, snapshot))
+    except QueryError as e:
+        return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+
+@app.route('/api/exoplanets/export')
+def export_exoplanets():
+    """Stream the catalog (or a filtered part of it) as NDJSON or CSV
+
+    Accepts the same filter, sort and fields parameters as /api/exoplanets,
+    with no limit by default. Rows are serialized in batches as the response
+    is sent, so memory stays flat however large the catalog grows.
+    """
+    try:
+        export_format = request.args.get('format', 'ndjson')
+        if export_format not in ('ndjson', 'csv'):
+            return jsonify({'error': "format must be 'ndjson' or 'csv'"}), 400
+
+        # Hold on to one snapshot for the whole stream
+        snapshot = catalog.snapshot
+        query = TableQuery.from_args(snapshot.planets, request.args, default_limit=None)
+        rows, _ = catalog.select_planets(query, snapshot)
+
+        if export_format == 'csv':
+            body = iter_csv(snapshot.planets, rows, query.fields)
+            mimetype = 'text/csv'
+        else:
+            body = iter_ndjson(snapshot.planets, rows, query.fields)
+            mimetype = 'application/x-ndjson'
+
+        response = Response(stream_with_context(body), mimetype=mimetype)
+        response.headers['Content-Disposition'] = f'attachment; filename=exoplanets.{export_format}'
+        response.headers['X-Total-Count'] = str(len(rows))
+        return response
+    except QueryError as e:
+        return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/api/search')
+def search_names():
+    """Autocomplete planet and host star names, tolerating typos"""
     try:
-        limit = request.args.get('limit', 100)
-        exoplanets = nasa_api.get_exoplanets(limit=int(limit))
-        return jsonify(exoplanets)
+        query = request.args.get('q', '')
+        limit = min(max(request.args.get('limit', 10, type=int), 1), 50)
+        kinds = [k for k in request.args.get('type', '').split(',') if k]
+        unknown = [k for k in kinds if k not in ('planet', 'host')]
+        if unknown:
+            return jsonify({'error': f"Unknown types {unknown}; use planet or host"}), 400
+        results = catalog.snapshot.search_names(query, limit, kinds)
+        return jsonify({'query': query, 'results': results})
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+@app.route('/api/koi')
+def get_kois():
+    """Get Kepler Objects of Interest, filtered, sorted, paginated and projected like /api/exoplanets"""
+    try:
+        return paged_response(TableQuery.from_args(koi_catalog.load(), request.args, max_limit=1000))
+    except QueryError as e:
+        return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/api/koi/<identifier>')
+def get_koi(identifier):
+    """Get the KOIs of a Kepler ID, or one KOI by KOI name or Kepler name"""
+    try:
+        kois = koi_catalog.lookup(identifier)
+        if not kois:
+            return jsonify({'error': 'KOI not found'}), 404
+        return jsonify(kois)
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/api/koi/<identifier>/score')
+def get_koi_score(identifier):
+    """Get the model's cached classification of one KOI"""
+    if not koi_scorer:
+        return jsonify({'error': 'Prediction model not available'}), 500
+
+    try:
+        score = koi_scorer.get_score(identifier)
+        if score is None:
+            return jsonify({'error': 'KOI not found'}), 404
+        return jsonify(score)
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/api/koi/scores')
+def get_koi_scores_info():
+    """Get a summary of the cached KOI classifications"""
+    if not koi_scorer:
+        return jsonify({'error': 'Prediction model not available'}), 500
+
+    try:
+        return jsonify(koi_scorer.get_info())
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/api/koi/scores/refresh', methods=['POST'])
+def refresh_koi_scores():
+    """Re-score the KOI table if the model or the KOI data changed"""
+    if not koi_scorer:
+        return jsonify({'error': 'Prediction model not available'}), 500
+
+    try:
+        koi_scorer.ensure_scored(recheck=True)
+        return jsonify(koi_scorer.get_info())
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/api/crossmatch/koi')
+def get_koi_crossmatch():
+    """Get KOI to NASA host star sky matches within `radius` arcseconds, queryable like /api/exoplanets"""
+    try:
+        radius = float(request.args.get('radius', DEFAULT_RADIUS_ARCSEC))
+        matches = koi_crossmatch.matches(radius)
+        args = {k: v for k, v in request.args.items() if k != 'radius'}
+        return paged_response(TableQuery.from_args(matches, args, max_limit=1000))
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/api/crossmatch/koi/summary')
+def get_koi_crossmatch_summary():
+    """Get counts of KOIs matched to NASA planets by match type"""
+    try:
+        radius = float(request.args.get('radius', DEFAULT_RADIUS_ARCSEC))
+        return jsonify(koi_crossmatch.summary(radius))
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
 
 @app.route('/api/star/<star_name>')
 def get_star_info(star_name):
     """Get information about a specific star and its planets"""
     try:
-        star_data = nasa_api.get_star_info(star_name)
+        star_data = catalog.snapshot.get_star_info(star_name)
         return jsonify(star_data)
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+@app.route('/api/catalog')
+def get_catalog_info():
+    """Get the loaded catalog version and sizes"""
+    try:
+        info = catalog.get_info()
+        info['refresher'] = refresher.status()
+        return jsonify(info)
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/api/catalog/reload', methods=['POST'])
+def reload_catalog():
+    """Reload the catalog from the data source and bump its version"""
+    try:
+        catalog.reload()
+        return jsonify(catalog.get_info())
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/api/catalog/sync', methods=['POST'])
+def sync_catalog():
+    """Pull rows changed since the last sync from NASA TAP and publish a new version"""
+    try:
+        full = request.args.get('full', 'false').lower() == 'true'
+        result = refresher.refresh(full=full)
+        if result is None:
+            return jsonify({'error': 'A sync is already running'}), 409
+        result['catalog'] = catalog.get_info()
+        return jsonify(result)
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+def aggregate_response(name):
+    """Serve a pre-serialized aggregate, answering 304 when the client's copy is current"""
+    return serialized_response(*aggregates.get(name))
+
+def serialized_response(body, etag):
+    """JSON response from pre-serialized bytes with a strong ETag"""
+    response = Response(body, mimetype='application/json')
+    response.set_etag(etag)
+    response.headers['Cache-Control'] = 'no-cache'
+    return response.make_conditional(request)
+
 @app.route('/api/discovery-stats')
 def get_discovery_stats():
     """Get discovery statistics for charts"""
     try:
-        stats = data_processor.get_discovery_statistics()
-        return jsonify(stats)
+        return aggregate_response('discovery-stats')
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
@@ -113,26 +365,109 @@ def get_discovery_stats():
 def get_discovery_methods():
     """Get discovery methods distribution"""
     try:
-        methods = data_processor.get_discovery_methods()
-        return jsonify(methods)
+        return aggregate_response('discovery-methods')
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
 @app.route('/api/planet-sizes')
 def get_planet_sizes():
-    """Get planet size comparisons"""
+    """Get planet size comparisons, with radii binned per decade (`mode=raw` adds every radius)"""
+    try:
+        mode = request.args.get('mode', 'histogram')
+        if mode not in ('histogram', 'raw'):
+            return jsonify({'error': "'mode' must be 'histogram' or 'raw'"}), 400
+        try:
+            resolution = int(request.args.get('resolution', DEFAULT_SIZE_RESOLUTION))
+        except ValueError:
+            raise QueryError("'resolution' must be an integer")
+        return serialized_response(*aggregates.planet_sizes(resolution, include_raw=mode == 'raw'))
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/api/discovery-cube')
+def get_discovery_cube():
+    """Discovery counts sliced by year, method and size category"""
     try:
-        sizes = data_processor.get_planet_size_distribution()
-        return jsonify(sizes)
+        methods = [m for m in request.args.get('method', '').split(',') if m]
+        sizes = [s for s in request.args.get('size', '').split(',') if s]
+        by = tuple(d for d in request.args.get('by', 'year,method').split(',') if d)
+        try:
+            year_min, year_max = (
+                int(request.args[name]) if request.args.get(name) else None
+                for name in ('year_min', 'year_max')
+            )
+        except ValueError:
+            raise QueryError("'year_min' and 'year_max' must be integers")
+        return serialized_response(*aggregates.cube_slice(methods, sizes, year_min, year_max, by))
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/api/aggregate')
+def get_aggregate():
+    """Histogram and/or group-by counts over any numeric planet column"""
+    try:
+        return serialized_response(*aggregates.query(request.args))
+    except QueryError as e:
+        return jsonify({'error': str(e)}), 400
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+def finite_arg(name, required=False):
+    """Query parameter as a finite float, or None when it is absent"""
+    value = request.args.get(name)
+    if value is None:
+        if required:
+            raise ValueError(f"'{name}' is required")
+        return None
+    try:
+        number = float(value)
+    except ValueError:
+        raise ValueError(f"'{name}' must be a number")
+    if not math.isfinite(number):
+        raise ValueError(f"'{name}' must be a finite number")
+    return number
+
+def positive_arg(name, default=None):
+    """Query parameter as a finite float above zero, or `default` when it is absent"""
+    number = finite_arg(name)
+    if number is None:
+        return default
+    if not number > 0:
+        raise ValueError(f"'{name}' must be a positive number")
+    return number
+
 @app.route('/api/orbital-data/<planet_name>')
 def get_orbital_data(planet_name):
     """Get orbital data for 3D visualization"""
     try:
-        orbital_data = data_processor.get_orbital_parameters(planet_name)
+        points = int(request.args.get('points', 100))
+        if not 2 <= points <= MAX_ORBIT_POINTS:
+            raise ValueError(f"'points' must be between 2 and {MAX_ORBIT_POINTS}")
+        orbital_data = data_processor.get_orbital_parameters(planet_name, points, finite_arg('epoch'))
         return jsonify(orbital_data)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/api/system/<host_star>/orbits')
+def get_system_orbits(host_star):
+    """Get orbit positions of every planet of a host star at shared time steps"""
+    try:
+        points = int(request.args.get('points', 200))
+        if not 2 <= points <= MAX_ORBIT_POINTS:
+            raise ValueError(f"'points' must be between 2 and {MAX_ORBIT_POINTS}")
+        span = positive_arg('span')
+        system = data_processor.get_system_orbits(host_star, points, finite_arg('start'), span)
+        if system is None:
+            return jsonify({'error': 'Host star not found'}), 404
+        return jsonify(system)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
@@ -140,9 +475,32 @@ def get_orbital_data(planet_name):
 def get_nearby_stars():
     """Get nearby stars for star map"""
     try:
-        distance_limit = request.args.get('distance', 50)  # parsecs
-        stars = nasa_api.get_nearby_stars(float(distance_limit))
+        distance_limit = positive_arg('distance', 50)  # parsecs
+        stars = catalog.snapshot.get_nearby_stars(distance_limit)
         return jsonify(stars)
+    except ValueError as e:
+        return jsonify({'error': f'Invalid query: {e}'}), 400
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/api/sky/tiles')
+def get_sky_tiles_info():
+    """Get the sky tiling scheme used by /api/sky/tiles/<level>/<x>/<y>"""
+    try:
+        return jsonify(sky_tiles.get_info())
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/api/sky/tiles/<int:level>/<int:x>/<int:y>')
+def get_sky_tile(level, x, y):
+    """Get one equal-area sky tile: sub-tile counts when coarse, brightest stars when fine
+
+    Tiles are cached per catalog version; send If-None-Match to get a 304.
+    """
+    try:
+        return serialized_response(*sky_tiles.get(level, x, y))
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
@@ -228,6 +586,50 @@ def download_sample_data():
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+@app.route('/api/stars/within')
+def get_stars_within():
+    """Get stars within a radius (parsecs) of a point given as ra/dec/distance"""
+    try:
+        ra = finite_arg('ra', required=True)
+        dec = finite_arg('dec', required=True)
+        distance = finite_arg('distance', required=True)
+        if distance < 0:
+            raise ValueError("'distance' must not be negative")
+        radius = positive_arg('radius', 10)
+        return jsonify(catalog.snapshot.get_stars_within(ra, dec, distance, radius))
+    except ValueError as e:
+        return jsonify({'error': f'Invalid query: {e}'}), 400
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/api/nearest-hosts/<star_name>')
+def get_nearest_hosts(star_name):
+    """Get the k planet host stars nearest to a star"""
+    try:
+        k = int(request.args.get('k', 10))
+        result = catalog.snapshot.get_nearest_hosts(star_name, k)
+        if 'error' in result:
+            return jsonify(result), 404
+        return jsonify(result)
+    except ValueError as e:
+        return jsonify({'error': f'Invalid query: {e}'}), 400
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/api/cone-search')
+def cone_search():
+    """Get stars or planet hosts within an angular radius (degrees) of ra/dec"""
+    try:
+        ra = finite_arg('ra', required=True)
+        dec = finite_arg('dec', required=True)
+        radius = positive_arg('radius', 5)
+        target = request.args.get('target', 'stars')
+        return jsonify(catalog.snapshot.cone_search(ra, dec, radius, target))
+    except ValueError as e:
+        return jsonify({'error': f'Invalid query: {e}'}), 400
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
 # Radial Velocity API Endpoints
 @app.route('/api/rv/generate-dataset')
 def generate_rv_dataset():
@@ -340,9 +742,14 @@ if __name__ == '__main__':
     # Initialize data on startup
     print("Initializing exoplanet data...")
     try:
-        nasa_api.initialize_data()
+        catalog.load()
         print("Data initialization complete!")
     except Exception as e:
         print(f"Warning: Could not initialize all data - {e}")
     
+    # Refresh in the werkzeug reloader child that serves requests, not in
+    # the watcher process that restarts it
+    if os.environ.get('WERKZEUG_RUN_MAIN') == 'true':
+        start_background_refresh()
+    
     app.run(debug=True, host='0.0.0.0', port=5000)
\ No newline at end of file
@@ -0,0 +1,116 @@
+import sys
+import time
+from collections import Counter
+from types import SimpleNamespace
+
+import numpy as np
+
+from services.columnar import ColumnarTable, FLOAT, INT, STR, CATEGORY
+from services.data_processor import DataProcessor
+from services.nasa_api import PLANET_SCHEMA
+
+METHODS = [
+    'Transit', 'Radial Velocity', 'Microlensing', 'Imaging', 'Transit Timing Variations',
+    'Eclipse Timing Variations', 'Orbital Brightness Modulation', 'Pulsar Timing',
+    'Astrometry', 'Pulsation Timing Variations', 'Disk Kinematics'
+]
+
+def make_synthetic_table(size, seed=42):
+    """Random planet table shaped like the NASA catalog"""
+    rng = np.random.default_rng(seed)
+    radius = rng.lognormal(1.0, 0.9, size)
+    radius[rng.random(size) < 0.25] = np.nan
+    year_present = rng.random(size) > 0.02
+
+    generated = {
+        'name': np.array([f"SYN-{i} b" for i in range(size)]),
+        'host_star': np.array([f"SYN-{i // 3}" for i in range(size)]),
+        'orbital_period': rng.lognormal(3.0, 1.5, size),
+        'radius': radius,
+        'mass': rng.lognormal(2.0, 1.5, size),
+        'equilibrium_temp': rng.uniform(100, 2500, size),
+        'discovery_year': np.where(year_present, rng.integers(1989, 2026, size), 0).astype(np.int32),
+        'discovery_method': rng.integers(0, len(METHODS), size).astype(np.int16),
+        'ra': rng.uniform(0, 360, size),
+        'dec': rng.uniform(-90, 90, size),
+        'distance': rng.uniform(1, 5000, size)
+    }
+
+    # Every other catalog field is left missing, so the table follows PLANET_SCHEMA
+    missing = {
+        FLOAT: lambda: np.full(size, np.nan),
+        INT: lambda: np.zeros(size, dtype=np.int32),
+        STR: lambda: np.full(size, '', dtype='<U1'),
+        CATEGORY: lambda: np.full(size, -1, dtype=np.int16)
+    }
+    columns = {}
+    masks = {}
+    categories = {}
+    for name, kind in PLANET_SCHEMA:
+        columns[name] = generated[name] if name in generated else missing[kind]()
+        if kind == INT:
+            masks[name] = year_present if name == 'discovery_year' else np.zeros(size, dtype=bool)
+        if kind == CATEGORY:
+            categories[name] = sorted(METHODS) if name == 'discovery_method' else []
+    return ColumnarTable(PLANET_SCHEMA, columns, masks, categories)
+
+def legacy_aggregates(planets):
+    """The original per-record Counter/loop implementation, for comparison"""
+    years = [int(p['discovery_year']) for p in planets if p.get('discovery_year')]
+    year_counts = Counter(years)
+
+    method_counts = Counter(p.get('discovery_method') or 'Unknown' for p in planets)
+    percentages = [c / sum(method_counts.values()) * 100 for c in method_counts.values()]
+
+    sizes = [0, 0, 0, 0]
+    for planet in planets:
+        radius = planet.get('radius')
+        if not radius or radius <= 0:
+            continue
+        if 1 <= radius < 1.75:
+            sizes[0] += 1
+        elif 1.75 <= radius < 3.5:
+            sizes[1] += 1
+        elif 3.5 <= radius < 8:
+            sizes[2] += 1
+        elif radius >= 8:
+            sizes[3] += 1
+
+    return sorted(year_counts.items()), list(method_counts.items()), percentages, sizes
+
+def vectorized_aggregates(processor, snapshot):
+    stats = processor.get_discovery_statistics(snapshot)
+    methods = processor.get_discovery_methods(snapshot)
+    sizes = processor.get_planet_size_distribution(snapshot)
+    return stats, methods, sizes
+
+def best_of(runs, func, *args):
+    timings = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        result = func(*args)
+        timings.append(time.perf_counter() - start)
+    return min(timings), result
+
+if __name__ == "__main__":
+    size = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+    print(f"📊 Benchmarking dashboard aggregations on {size:,} synthetic planets")
+    print("=" * 50)
+
+    table = make_synthetic_table(size)
+    snapshot = SimpleNamespace(planets=table)
+    processor = DataProcessor(catalog=SimpleNamespace(snapshot=snapshot))
+
+    # The legacy code worked on row dicts, so converting them is not timed
+    records = table.rows()
+    legacy_time, legacy = best_of(3, legacy_aggregates, records)
+    vector_time, (stats, methods, sizes) = best_of(5, vectorized_aggregates, processor, snapshot)
+
+    assert legacy[0] == list(zip(stats['years'], stats['counts']))
+    assert dict(legacy[1]) == dict(zip(methods['methods'], methods['counts']))
+    assert legacy[3] == sizes['counts']
+    print("✓ Vectorized results match the legacy implementation")
+
+    print(f"Legacy loops:   {legacy_time * 1000:9.2f} ms")
+    print(f"NumPy bincount: {vector_time * 1000:9.2f} ms")
+    print(f"Speedup:        {legacy_time / vector_time:9.1f}x")
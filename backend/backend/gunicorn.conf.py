@@ -0,0 +1,52 @@
+"""Gunicorn settings that preload one catalog for all workers
+
+    gunicorn app:app
+
+The master imports the app once (preload_app), which builds the catalog
+snapshot and its indexes before any worker is forked, so every worker
+starts from the same copy-on-write pages and the memory-mapped columns.
+The master then forks a single process that runs the NASA TAP sync;
+workers never sync, they only reload what it publishes, prompted by a
+version counter in shared memory (see CatalogRefresher). Snapshots built
+by those reloads belong to each worker; only the mapped column files
+stay shared.
+"""
+import gc
+import multiprocessing
+import os
+import signal
+
+# Must be set before the app is imported; EXORA_SHARED_CATALOG=0 falls back
+# to independent workers that each load and sync the catalog themselves
+os.environ.setdefault('EXORA_SHARED_CATALOG', '1')
+shared_catalog = os.environ['EXORA_SHARED_CATALOG'] == '1'
+background_refresh = os.environ.get('EXORA_BACKGROUND_REFRESH', '1') == '1'
+
+bind = os.environ.get('EXORA_BIND', '0.0.0.0:5000')
+workers = int(os.environ.get('WEB_CONCURRENCY', min(multiprocessing.cpu_count(), 4)))
+preload_app = shared_catalog
+
+def when_ready(server):
+    if not shared_catalog:
+        return
+    import app
+    # Keep the garbage collector from touching (and so copying) the
+    # preloaded objects in every worker
+    gc.freeze()
+    if background_refresh:
+        server.catalog_sync_pid = app.refresher.start_sync_process()
+        server.log.info("Catalog sync process started (pid %s)", server.catalog_sync_pid)
+
+def post_fork(server, worker):
+    import app
+    # Shared workers leave syncing to the sync process; independent workers
+    # each run one, serialized by the refresher's lock file
+    app.start_background_refresh(sync=not shared_catalog)
+
+def on_exit(server):
+    pid = getattr(server, 'catalog_sync_pid', None)
+    if pid:
+        try:
+            os.kill(pid, signal.SIGTERM)
+        except OSError:
+            pass
@@ -0,0 +1,178 @@
+import numpy as np
+import json
+from services.columnar import FLOAT, INT, BOOL, STR, CATEGORY
+from services.query_engine import TableQuery, QueryError
+
+# Query-string parameters that describe the aggregation rather than filters
+AGGREGATE_PARAMS = {'column', 'bins', 'scale', 'start', 'stop', 'group_by'}
+
+MAX_BINS = 1000
+
+class AggregateQuery:
+    """Vectorized histogram and group-by counts over a ColumnarTable
+
+    `column` is binned either by explicit comma-separated `bins` edges or by
+    a bin count spread linearly or logarithmically (`scale`) between `start`
+    and `stop`, which default to the range of the matching values. Bins are
+    half-open except the last, which includes `stop`, as in np.histogram.
+    `group_by` splits the counts by a category, integer, string or boolean
+    field. Every other parameter is a TableQuery filter.
+    """
+
+    def __init__(self, filters, column=None, edges=None, bin_count=10, scale='linear',
+                 start=None, stop=None, group_by=None):
+        self.filters = filters
+        self.table = filters.table
+        self.column = column
+        self.edges = edges
+        self.bin_count = bin_count
+        self.scale = scale
+        self.start = start
+        self.stop = stop
+        self.group_by = group_by
+
+    @classmethod
+    def from_args(cls, table, args):
+        """Build an aggregation from request arguments"""
+        filter_args = {k: v for k, v in args.items() if k not in AGGREGATE_PARAMS}
+        filters = TableQuery.from_args(table, filter_args, default_limit=None)
+
+        column = args.get('column') or None
+        group_by = args.get('group_by') or None
+        if column is None and group_by is None:
+            raise QueryError("Provide 'column', 'group_by' or both")
+        if column is not None and table.kinds.get(column) not in (FLOAT, INT):
+            raise QueryError(f"Cannot bin non-numeric or unknown column '{column}'")
+        if group_by is not None and table.kinds.get(group_by) not in (INT, BOOL, STR, CATEGORY):
+            raise QueryError(f"Cannot group by '{group_by}'")
+
+        scale = args.get('scale', 'linear')
+        if scale not in ('linear', 'log'):
+            raise QueryError("'scale' must be 'linear' or 'log'")
+
+        edges = None
+        bin_count = 10
+        bins = args.get('bins', '')
+        try:
+            if ',' in bins:
+                edges = np.array([float(v) for v in bins.split(',') if v], dtype=np.float64)
+            elif bins:
+                bin_count = int(bins)
+            start = float(args['start']) if args.get('start') else None
+            stop = float(args['stop']) if args.get('stop') else None
+        except ValueError:
+            raise QueryError("'bins' must be a count or comma-separated edges; 'start'/'stop' numbers")
+        # NaN or infinite bounds would end up in the (then invalid) JSON edges
+        bounds = [v for v in (start, stop) if v is not None]
+        if edges is not None:
+            bounds.extend(edges.tolist())
+        if not np.all(np.isfinite(bounds)):
+            raise QueryError("Bin edges, 'start' and 'stop' must be finite numbers")
+
+        if edges is not None:
+            if len(edges) < 2 or np.any(np.diff(edges) <= 0):
+                raise QueryError("Bin edges must be at least two increasing numbers")
+            if len(edges) - 1 > MAX_BINS:
+                raise QueryError(f"At most {MAX_BINS} bins are allowed")
+        elif not 1 <= bin_count <= MAX_BINS:
+            raise QueryError(f"'bins' must be between 1 and {MAX_BINS}")
+        if scale == 'log' and any(v is not None and v <= 0 for v in (start, stop)):
+            raise QueryError("Log-scaled bins need positive 'start' and 'stop'")
+
+        return cls(filters, column, edges, bin_count, scale, start, stop, group_by)
+
+    def normalized_key(self):
+        """Stable description of the aggregation, used as its cache key"""
+        return json.dumps({
+            'filters': self.filters.normalized_key(),
+            'column': self.column,
+            'edges': self.edges.tolist() if self.edges is not None else None,
+            'bins': self.bin_count,
+            'scale': self.scale,
+            'start': self.start,
+            'stop': self.stop,
+            'group_by': self.group_by
+        }, sort_keys=True)
+
+    def bin_edges(self, values):
+        """Explicit edges, or `bin_count` edges spanning start..stop"""
+        if self.edges is not None:
+            return self.edges
+        if self.scale == 'log':
+            values = values[values > 0]
+        start = self.start if self.start is not None else (values.min() if len(values) else None)
+        stop = self.stop if self.stop is not None else (values.max() if len(values) else None)
+        if start is None or stop is None or stop < start:
+            return np.empty(0)
+        if stop == start:
+            stop = start + 1 if self.scale == 'linear' else start * 10
+        if self.scale == 'log':
+            edges = np.logspace(np.log10(start), np.log10(stop), self.bin_count + 1)
+            # 10 ** log10(x) can round past x; the outer edges must be exact
+            edges[0], edges[-1] = start, stop
+            return edges
+        return np.linspace(start, stop, self.bin_count + 1)
+
+    def _groups(self, rows):
+        """Group labels and the group number of each row"""
+        field = self.group_by
+        values = self.table.column(field)[rows]
+
+        if self.table.kinds[field] == CATEGORY:
+            # Shift codes by one so missing (-1) gets group 0
+            labels = [None] + list(self.table.categories[field])
+            return labels, values.astype(np.intp) + 1
+
+        present = self.table.present(field)[rows]
+        keys, inverse = np.unique(values[present], return_inverse=True)
+        labels = keys.tolist()
+        groups = np.full(len(rows), len(labels), dtype=np.intp)
+        groups[present] = inverse
+        return labels + [None], groups
+
+    def execute(self):
+        """Compute the aggregation for the rows matching the filters"""
+        rows = np.flatnonzero(self.filters.mask())
+        result = {'total': len(rows), 'group_by': self.group_by}
+
+        if self.group_by:
+            labels, groups = self._groups(rows)
+        else:
+            labels, groups = [None], np.zeros(len(rows), dtype=np.intp)
+
+        if self.column is None:
+            counts = np.bincount(groups, minlength=len(labels))
+            result['groups'] = [
+                {'key': label, 'count': int(count)}
+                for label, count in zip(labels, counts.tolist()) if count
+            ]
+            return result
+
+        values = self.table.column(self.column)[rows]
+        present = self.table.present(self.column)[rows]
+        edges = self.bin_edges(values[present])
+        bin_total = max(len(edges) - 1, 0)
+
+        # Bin numbers from searchsorted, with the last edge closing the last bin
+        binned = np.zeros(len(rows), dtype=bool)
+        if bin_total:
+            binned = present & (values >= edges[0]) & (values <= edges[-1])
+        bins = np.searchsorted(edges, values[binned], side='right') - 1
+        bins = np.minimum(bins, bin_total - 1)
+        cells = np.bincount(groups[binned] * bin_total + bins,
+                            minlength=len(labels) * bin_total).reshape(len(labels), bin_total)
+
+        result.update({
+            'column': self.column,
+            'scale': self.scale if self.edges is None else 'custom',
+            'edges': edges.tolist(),
+            'counts': cells.sum(axis=0).tolist(),
+            'missing': int(len(rows) - np.count_nonzero(present)),
+            'out_of_range': int(np.count_nonzero(present) - np.count_nonzero(binned))
+        })
+        if self.group_by:
+            result['groups'] = [
+                {'key': label, 'counts': counts, 'count': sum(counts)}
+                for label, counts in zip(labels, cells.tolist()) if any(counts)
+            ]
+        return result
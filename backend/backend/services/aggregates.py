@@ -0,0 +1,116 @@
+import hashlib
+import json
+import threading
+from collections import OrderedDict
+from services.aggregate_query import AggregateQuery
+from services.query_engine import QueryError
+from services.discovery_cube import DiscoveryCube
+
+# Log bins per decade in the materialized planet size histogram
+DEFAULT_SIZE_RESOLUTION = 10
+MAX_SIZE_RESOLUTION = 100
+
+class MaterializedAggregates:
+    """Dashboard aggregates computed once per catalog version and kept serialized
+
+    Each aggregate is stored as ready-to-send JSON bytes with a strong ETag
+    built from the snapshot fingerprint, so repeated requests for the same
+    catalog version cost a dictionary lookup. New snapshots are materialized
+    as soon as the catalog publishes them. Ad-hoc aggregations from `query`
+    are cached the same way, keyed by their normalized query, in a bounded
+    LRU that is dropped whenever the snapshot changes. A year × method ×
+    size DiscoveryCube is built alongside, so cross-filtered counts are
+    array slices rather than row scans.
+    """
+
+    def __init__(self, catalog, data_processor, max_queries=256):
+        self.catalog = catalog
+        self.data_processor = data_processor
+        self.builders = {
+            'discovery-stats': data_processor.get_discovery_statistics,
+            'discovery-methods': data_processor.get_discovery_methods,
+            'planet-sizes': lambda snapshot: data_processor.get_planet_size_distribution(
+                snapshot, DEFAULT_SIZE_RESOLUTION
+            )
+        }
+        self._materialized = None
+        self._lock = threading.Lock()
+        self.max_queries = max_queries
+        self._queries = (None, OrderedDict())
+        catalog.add_listener(self.materialize)
+
+    def materialize(self, snapshot):
+        """Compute and serialize every aggregate for a snapshot"""
+        entries = {}
+        for name, builder in self.builders.items():
+            body = json.dumps(builder(snapshot), sort_keys=True, separators=(',', ':'))
+            entries[name] = (body.encode('utf-8'), f"{snapshot.fingerprint}-{name}")
+        cube = DiscoveryCube.from_table(snapshot.planets)
+
+        with self._lock:
+            current = self._materialized
+            # Never replace a newer version with an older one
+            if current is None or current[0].version <= snapshot.version:
+                self._materialized = (snapshot, entries, cube)
+        return snapshot, entries, cube
+
+    def _current(self):
+        """Materialized (snapshot, entries, cube) for the current catalog version"""
+        snapshot = self.catalog.snapshot
+        materialized = self._materialized
+        if materialized is not None and materialized[0] is snapshot:
+            return materialized
+        return self.materialize(snapshot)
+
+    def get(self, name):
+        """(body, etag) of an aggregate for the current catalog version"""
+        return self._current()[1][name]
+
+    def cube_slice(self, methods=None, sizes=None, year_min=None, year_max=None, by=('year', 'method')):
+        """(body, etag) of a slice of the year × method × size discovery cube"""
+        snapshot, _, cube = self._current()
+        key = json.dumps({
+            'cube': [sorted(methods or []), sorted(sizes or []), year_min, year_max, list(by)]
+        })
+        return self._cached(snapshot, key, lambda: cube.slice(methods, sizes, year_min, year_max, by))
+
+    def query(self, args):
+        """(body, etag) of an ad-hoc AggregateQuery over the current planets"""
+        snapshot = self.catalog.snapshot
+        aggregate = AggregateQuery.from_args(snapshot.planets, args)
+        return self._cached(snapshot, aggregate.normalized_key(), aggregate.execute)
+
+    def planet_sizes(self, resolution=DEFAULT_SIZE_RESOLUTION, include_raw=False):
+        """(body, etag) of the planet size distribution at a given histogram resolution"""
+        if resolution == DEFAULT_SIZE_RESOLUTION and not include_raw:
+            return self.get('planet-sizes')
+        if not 1 <= resolution <= MAX_SIZE_RESOLUTION:
+            raise QueryError(f"'resolution' must be between 1 and {MAX_SIZE_RESOLUTION}")
+
+        snapshot = self.catalog.snapshot
+        key = json.dumps({'planet-sizes': resolution, 'raw': include_raw})
+        return self._cached(snapshot, key, lambda: self.data_processor.get_planet_size_distribution(
+            snapshot, resolution, include_raw
+        ))
+
+    def _cached(self, snapshot, key, compute):
+        """Serialized result of `compute` for a snapshot, from the LRU when possible"""
+        with self._lock:
+            owner, cache = self._queries
+            if owner is not snapshot:
+                cache = OrderedDict()
+                self._queries = (snapshot, cache)
+            if key in cache:
+                cache.move_to_end(key)
+                return cache[key]
+
+        body = json.dumps(compute(), sort_keys=True, separators=(',', ':'))
+        digest = hashlib.sha1(key.encode('utf-8')).hexdigest()[:12]
+        entry = (body.encode('utf-8'), f"{snapshot.fingerprint}-{digest}")
+
+        with self._lock:
+            if self._queries[0] is snapshot:
+                cache[key] = entry
+                while len(cache) > self.max_queries:
+                    cache.popitem(last=False)
+        return entry
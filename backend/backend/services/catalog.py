@@ -0,0 +1,325 @@
+import hashlib
+import threading
+import numpy as np
+from services.nasa_api import NASAExoplanetAPI
+from services.spatial import SpatialIndex, sky_to_cartesian
+from services.name_search import NameSearchIndex
+
+class CatalogSnapshot:
+    """Read-only view of the exoplanet and star tables at one catalog version"""
+
+    def __init__(self, version, planets, stars):
+        self.version = version
+        self.planets = planets
+        self.stars = stars
+        self.source = (planets.source_id, stars.source_id)
+        self.fingerprint = self._fingerprint()
+        self._build_name_indexes()
+        self._build_spatial_indexes()
+        self._build_search_index()
+
+    def _fingerprint(self):
+        """Identity of the underlying data, identical in every process that loaded it"""
+        if None in self.source:
+            return f"local-{id(self):x}-{self.version}"
+        return hashlib.sha1('|'.join(self.source).encode('utf-8')).hexdigest()[:16]
+
+    def _build_name_indexes(self):
+        """Case-folded name -> row indexes for planets, stars and host stars"""
+        self.planet_index = {}
+        for row, name in enumerate(self.planets.column('name').tolist()):
+            self.planet_index.setdefault(name.casefold(), row)
+
+        self.star_index = {}
+        for row, name in enumerate(self.stars.column('name').tolist()):
+            self.star_index.setdefault(name.casefold(), row)
+
+        hosts = {}
+        for row, host in enumerate(self.planets.column('host_star').tolist()):
+            hosts.setdefault(host.casefold(), []).append(row)
+        self.host_index = {host: np.array(rows, dtype=np.intp) for host, rows in hosts.items()}
+
+        # One entry per host star, in order of first appearance
+        self.host_slot = {host: slot for slot, host in enumerate(hosts)}
+        self.host_rows = np.array([rows[0] for rows in hosts.values()], dtype=np.intp)
+        self.host_planet_counts = np.array([len(rows) for rows in hosts.values()], dtype=np.int32)
+
+    def _build_spatial_indexes(self):
+        """KD-trees over star positions and over host star positions"""
+        self.star_space = SpatialIndex(
+            self.stars.column('ra'), self.stars.column('dec'), self.stars.column('distance')
+        )
+        self.host_space = SpatialIndex(
+            self.planets.column('ra')[self.host_rows],
+            self.planets.column('dec')[self.host_rows],
+            self.planets.column('distance')[self.host_rows]
+        )
+
+    def _build_search_index(self):
+        """Autocomplete index over planet names followed by host star names"""
+        planet_names = self.planets.column('name').tolist()
+        host_names = self.planets.column('host_star')[self.host_rows].tolist()
+        self.name_search = NameSearchIndex(
+            planet_names + host_names,
+            ['planet'] * len(planet_names) + ['host'] * len(host_names)
+        )
+
+    def search_names(self, query, limit=10, kinds=None):
+        """Top planet and host star names matching a (possibly misspelled) query"""
+        planet_count = len(self.planets)
+        results = []
+        for entry, match, score in self.name_search.search(query, limit, kinds):
+            if entry < planet_count:
+                result = {
+                    'name': self.name_search.names[entry],
+                    'type': 'planet',
+                    'host_star': self.planets.values('host_star', [entry])[0]
+                }
+            else:
+                slot = entry - planet_count
+                result = {
+                    'name': self.name_search.names[entry],
+                    'type': 'host',
+                    'planet_count': int(self.host_planet_counts[slot])
+                }
+            result.update({'match': match, 'score': score})
+            results.append(result)
+        return results
+
+    def get_exoplanets(self, limit=100):
+        """Get exoplanet data with optional limit"""
+        return self.planets.rows(np.arange(len(self.planets))[:limit])
+
+    def find_planet(self, planet_name):
+        """Row index of a planet by case-insensitive name, or None"""
+        return self.planet_index.get(planet_name.casefold())
+
+    def find_star(self, star_name):
+        """Row index of a star by case-insensitive name, or None"""
+        return self.star_index.get(star_name.casefold())
+
+    def planets_of_host(self, host_name):
+        """Row indexes of the planets orbiting a host star"""
+        return self.host_index.get(host_name.casefold(), np.empty(0, dtype=np.intp))
+
+    def get_star_info(self, star_name):
+        """Get information about a specific star"""
+        star = self.find_star(star_name)
+
+        if star is None:
+            return {'error': 'Star not found'}
+
+        return {
+            'star': self.stars.row(star),
+            'planets': self.planets.rows(self.planets_of_host(star_name))
+        }
+
+    def get_nearby_stars(self, distance_limit):
+        """Get stars within a certain distance"""
+        distance = self.stars.column('distance')
+
+        # The tree narrows the candidates; the stored distances decide the cut and order
+        candidates, _ = self.star_space.within_radius((0.0, 0.0, 0.0), distance_limit * (1 + 1e-9))
+        candidates = np.sort(candidates)
+        nearby = candidates[distance[candidates] <= distance_limit]
+        nearby = nearby[np.argsort(distance[nearby], kind='stable')]
+        return self.stars.rows(nearby)
+
+    def _with_separation(self, records, separations, key):
+        for record, separation in zip(records, separations.tolist()):
+            record[key] = separation
+        return records
+
+    def _host_records(self, slots):
+        """Summary records for host stars given their slots in the host index"""
+        rows = self.host_rows[slots]
+        records = self.planets.rows(rows, fields=['host_star', 'ra', 'dec', 'distance'])
+        for record, count in zip(records, self.host_planet_counts[slots].tolist()):
+            record['name'] = record.pop('host_star')
+            record['planet_count'] = count
+        return records
+
+    def get_stars_within(self, ra, dec, distance, radius):
+        """Stars within a radius (parsecs) of a point given as RA/Dec/distance"""
+        center = sky_to_cartesian([ra], [dec], [distance])[0]
+        rows, separations = self.star_space.within_radius(center, radius)
+        return self._with_separation(self.stars.rows(rows), separations, 'separation_pc')
+
+    def get_nearest_hosts(self, name, k=10):
+        """The k host stars nearest to a named host or star"""
+        key = name.casefold()
+        exclude = None
+        center = None
+
+        if key in self.host_slot:
+            exclude = self.host_slot[key]
+            center = self.host_space.position_of(exclude)
+        elif key in self.star_index:
+            center = self.star_space.position_of(self.star_index[key])
+        else:
+            return {'error': 'Star not found'}
+
+        if center is None:
+            return {'error': 'Star has no known distance'}
+
+        slots, separations = self.host_space.nearest(center, k, exclude_row=exclude)
+        return {
+            'name': name,
+            'hosts': self._with_separation(self._host_records(slots), separations, 'separation_pc')
+        }
+
+    def cone_search(self, ra, dec, radius, target='stars'):
+        """Stars or host stars within an angular radius (degrees) of RA/Dec"""
+        radius = min(float(radius), 180.0)
+        if target == 'hosts':
+            slots, separations = self.host_space.cone(ra, dec, radius)
+            records = self._host_records(slots)
+        elif target == 'stars':
+            rows, separations = self.star_space.cone(ra, dec, radius)
+            records = self.stars.rows(rows)
+        else:
+            raise ValueError("target must be 'stars' or 'hosts'")
+        return self._with_separation(records, separations, 'separation_deg')
+
+class ExoplanetCatalog:
+    """Process-wide exoplanet catalog, loaded once and shared by every request"""
+
+    def __init__(self, nasa_api=None):
+        self.nasa_api = nasa_api or NASAExoplanetAPI()
+        self._snapshot = None
+        self._lock = threading.Lock()
+        self._listeners = []
+        self._request = threading.local()
+
+    @property
+    def snapshot(self):
+        """Current catalog snapshot, loaded on first access
+
+        Between `begin_request` and `end_request`, the first snapshot read
+        by the thread is returned for the rest of the request.
+        """
+        request = self._request
+        if getattr(request, 'active', False) and request.snapshot is not None:
+            return request.snapshot
+        snapshot = self._snapshot
+        if snapshot is None:
+            snapshot = self.load()
+        if getattr(request, 'active', False):
+            request.snapshot = snapshot
+        return snapshot
+
+    def begin_request(self):
+        """Serve the rest of this thread's request from one snapshot"""
+        self._request.active = True
+        self._request.snapshot = None
+
+    def end_request(self):
+        """Stop pinning; returns the snapshot the request used, or None if it read none"""
+        snapshot = getattr(self._request, 'snapshot', None)
+        self._request.active = False
+        self._request.snapshot = None
+        return snapshot
+
+    @property
+    def version(self):
+        """Version number of the current snapshot"""
+        return self.snapshot.version
+
+    def peek_version(self):
+        """Version of the current snapshot without triggering a load"""
+        snapshot = self._snapshot
+        return snapshot.version if snapshot else None
+
+    def add_listener(self, callback):
+        """Call `callback(snapshot)` for every new snapshot, just before it is published
+
+        Callbacks get the new snapshot as an argument and must not read
+        `catalog.snapshot`, which still returns the previous one.
+        """
+        self._listeners.append(callback)
+
+    def _publish(self, snapshot):
+        # Listeners materialize their derived data first, so no request can
+        # see the new snapshot before it and build the same data again
+        for callback in self._listeners:
+            try:
+                callback(snapshot)
+            except Exception as e:
+                print(f"Catalog listener failed: {e}")
+        self._snapshot = snapshot
+
+    def load(self):
+        """Load the catalog if no snapshot exists yet"""
+        with self._lock:
+            if self._snapshot is None:
+                self._publish(self._build_snapshot(1))
+            return self._snapshot
+
+    def reload(self):
+        """Re-read the data source and publish it as a new catalog version
+
+        The new snapshot is built while requests keep using the old one and
+        is published with a single reference swap. If the build fails, the
+        old snapshot stays in place.
+        """
+        with self._lock:
+            version = self._snapshot.version + 1 if self._snapshot else 1
+            self._publish(self._build_snapshot(version))
+            return self._snapshot
+
+    def _build_snapshot(self, version):
+        """Open the cached exoplanet and star tables as a new snapshot"""
+        self.nasa_api.initialize_data()
+        return CatalogSnapshot(version, self.nasa_api.exoplanets_table, self.nasa_api.stars_table)
+
+    def _published_source(self):
+        store = self.nasa_api.store
+        return (store.current('exoplanets'), store.current('stars'))
+
+    def source_changed(self):
+        """Whether the store has published data newer than the current snapshot"""
+        snapshot = self._snapshot
+        return snapshot is None or self._published_source() != snapshot.source
+
+    def _pushdown_store(self, snapshot):
+        # Only for snapshots read from the store, whose version it can check
+        store = self.nasa_api.store
+        if getattr(store, 'supports_queries', False) and snapshot.source[0] is not None:
+            return store
+        return None
+
+    def query_planets(self, query, snapshot=None):
+        """Execute a TableQuery over a snapshot's planets, in SQL when the store supports it
+
+        The store checks, in the same transaction as the query, that it
+        still holds the snapshot's version; otherwise the query runs in
+        memory, so results always match the served version.
+        """
+        snapshot = snapshot or self.snapshot
+        store = self._pushdown_store(snapshot)
+        if store is not None:
+            result = store.execute_query('exoplanets', query, version=snapshot.source[0])
+            if result is not None:
+                return result
+        return query.execute()
+
+    def select_planets(self, query, snapshot=None):
+        """Row indexes and total of a TableQuery over a snapshot's planets, in SQL when possible"""
+        snapshot = snapshot or self.snapshot
+        store = self._pushdown_store(snapshot)
+        if store is not None:
+            selected = store.select_rows('exoplanets', query, version=snapshot.source[0])
+            if selected is not None:
+                return selected
+        return query.select()
+
+    def get_info(self):
+        """Summary of the loaded catalog"""
+        snapshot = self.snapshot
+        return {
+            'version': snapshot.version,
+            'fingerprint': snapshot.fingerprint,
+            'exoplanet_count': len(snapshot.planets),
+            'star_count': len(snapshot.stars),
+            'memory_bytes': snapshot.planets.nbytes() + snapshot.stars.nbytes()
+        }
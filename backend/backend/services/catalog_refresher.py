@@ -0,0 +1,204 @@
+from contextlib import contextmanager
+from datetime import datetime
+import multiprocessing
+import os
+import signal
+import threading
+import time
+
+try:
+    import fcntl
+except ImportError:
+    # Windows: no cross-process lock, each process may sync on its own
+    fcntl = None
+
+class CatalogRefresher:
+    """Background thread that refreshes the catalog off the request path
+
+    Requests keep reading the current snapshot while a new one is built,
+    and the catalog swaps the new one in with a single reference
+    assignment. Every `sync_interval` seconds one process, guarded by a lock
+    file, pulls changes from NASA TAP into the binary store. Every
+    `poll_interval` seconds each process checks whether the published store
+    changed and, if so, reloads its snapshot.
+
+    With `shared=True` (gunicorn.conf.py) a version counter lives in shared
+    memory that forked workers inherit. Every sync bumps it, and workers
+    poll it every second, so a new catalog is picked up almost at once
+    without each worker re-reading the store pointers.
+    """
+
+    # Seconds between checks of the shared version counter
+    SHARED_POLL_INTERVAL = 1
+
+    def __init__(self, catalog, tap_sync=None, sync_interval=3600, poll_interval=60,
+                 lock_file="data/.refresh.lock", shared=False):
+        self.catalog = catalog
+        self.tap_sync = tap_sync
+        self.sync_interval = sync_interval
+        self.poll_interval = poll_interval
+        self.lock_file = lock_file
+        self.last_sync = None
+        self.last_reload = None
+        self.last_error = None
+        # Single writer (whoever holds the sync lock), so no lock is needed
+        self.generation = multiprocessing.RawValue('Q', 0) if shared else None
+        self._seen_generation = 0
+        self.sync_enabled = True
+        self._thread = None
+        self._stop_event = threading.Event()
+        self._sync_lock = threading.Lock()
+
+    def start(self, sync=True):
+        """Start the refresher thread if it is not already running
+
+        With `sync=False` the thread only reloads what another process
+        publishes, e.g. in gunicorn workers next to the sync process.
+        """
+        if self._thread and self._thread.is_alive():
+            return
+        self.sync_enabled = sync
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self._run, name='catalog-refresher', daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout=5):
+        """Stop the refresher thread"""
+        self._stop_event.set()
+        if self._thread:
+            self._thread.join(timeout)
+
+    @property
+    def running(self):
+        return bool(self._thread and self._thread.is_alive())
+
+    def _run(self):
+        self._guarded(self.catalog.load)
+        next_sync = time.monotonic() + self.sync_interval
+        next_poll = time.monotonic() + self.poll_interval
+        tick = self.poll_interval
+        if self.generation is not None:
+            tick = min(tick, self.SHARED_POLL_INTERVAL)
+
+        while not self._stop_event.wait(tick):
+            if self.tap_sync and self.sync_enabled and time.monotonic() >= next_sync:
+                self._guarded(self.sync_once)
+                next_sync = time.monotonic() + self.sync_interval
+            # The store itself is still polled, in case it was written by
+            # something that does not share the counter
+            if self._generation_changed() or time.monotonic() >= next_poll:
+                self._guarded(self.reload_if_changed)
+                next_poll = time.monotonic() + self.poll_interval
+
+    def _generation_changed(self):
+        if self.generation is None:
+            return False
+        generation = self.generation.value
+        if generation == self._seen_generation:
+            return False
+        self._seen_generation = generation
+        return True
+
+    def start_sync_process(self):
+        """Fork a process that only runs the TAP sync every `sync_interval` seconds
+
+        Meant for the gunicorn master, which must not run threads itself
+        because it keeps forking workers. Returns the child's pid; the child
+        exits on SIGTERM or when its parent goes away.
+        """
+        parent = os.getpid()
+        pid = os.fork()
+        if pid:
+            return pid
+        try:
+            self._sync_loop(parent)
+        finally:
+            os._exit(0)
+
+    def _sync_loop(self, parent):
+        # Replace the signal handlers inherited from the gunicorn master
+        for name in ('SIGINT', 'SIGHUP', 'SIGQUIT', 'SIGCHLD', 'SIGUSR1', 'SIGUSR2',
+                     'SIGTTIN', 'SIGTTOU', 'SIGWINCH'):
+            if hasattr(signal, name):
+                signal.signal(getattr(signal, name), signal.SIG_DFL)
+        signal.signal(signal.SIGTERM, lambda signum, frame: os._exit(0))
+
+        next_sync = time.monotonic() + self.sync_interval
+        while os.getppid() == parent:
+            if time.monotonic() >= next_sync:
+                self._guarded(self.sync_once)
+                next_sync = time.monotonic() + self.sync_interval
+            time.sleep(min(self.sync_interval, self.SHARED_POLL_INTERVAL))
+
+    def _guarded(self, step):
+        """Run a refresh step; failures are recorded and the old snapshot keeps serving"""
+        try:
+            return step()
+        except Exception as e:
+            self.last_error = {'time': datetime.now().isoformat(), 'error': str(e)}
+            print(f"Catalog refresh failed: {e}")
+            return None
+
+    @contextmanager
+    def _process_lock(self):
+        """Non-blocking lock shared by all worker processes; yields whether it was acquired"""
+        if fcntl is None:
+            yield True
+            return
+
+        directory = os.path.dirname(self.lock_file)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with open(self.lock_file, 'a') as handle:
+            try:
+                fcntl.flock(handle, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except OSError:
+                yield False
+                return
+            try:
+                yield True
+            finally:
+                fcntl.flock(handle, fcntl.LOCK_UN)
+
+    def sync_once(self, full=False):
+        """Pull changes from TAP into the store; None if another sync is running"""
+        if not self._sync_lock.acquire(blocking=False):
+            return None
+        try:
+            with self._process_lock() as acquired:
+                if not acquired:
+                    return None
+                result = self.tap_sync.sync(full=full)
+                self.last_sync = result.get('last_sync')
+                if self.generation is not None:
+                    self.generation.value += 1
+                return result
+        finally:
+            self._sync_lock.release()
+
+    def reload_if_changed(self):
+        """Rebuild and swap the snapshot when the published store has changed"""
+        if not self.catalog.source_changed():
+            return False
+        self.catalog.reload()
+        self.last_reload = datetime.now().isoformat()
+        return True
+
+    def refresh(self, full=False):
+        """Run one sync and reload cycle immediately"""
+        result = self.sync_once(full) if self.tap_sync else None
+        self.reload_if_changed()
+        return result
+
+    def status(self):
+        """State of the background refresher"""
+        return {
+            'running': self.running,
+            'shared': self.generation is not None,
+            'generation': self.generation.value if self.generation is not None else None,
+            'sync_interval': self.sync_interval,
+            'poll_interval': self.poll_interval,
+            'last_sync': self.last_sync,
+            'last_reload': self.last_reload,
+            'last_error': self.last_error
+        }
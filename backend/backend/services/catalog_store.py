@@ -0,0 +1,150 @@
+import numpy as np
+from datetime import datetime
+import json
+import os
+import shutil
+import uuid
+from services.columnar import ColumnarTable
+
+class BinaryCatalogStore:
+    """On-disk cache for columnar tables, one memory-mappable .npy file per column
+
+    Each save goes to a fresh directory that is published by atomically
+    replacing a small pointer file, so readers never see a half-written
+    table. Tables are opened with mmap, which lets every worker process
+    share the same page-cache pages instead of parsing its own copy.
+    """
+
+    FORMAT_VERSION = 1
+
+    def __init__(self, root="data/catalog"):
+        self.root = root
+
+    def _pointer_file(self, name):
+        return os.path.join(self.root, f"{name}.current")
+
+    def _current_dir(self, name):
+        """Directory of the published version of a table, or None"""
+        try:
+            with open(self._pointer_file(name), 'r') as f:
+                directory = f.read().strip()
+        except OSError:
+            return None
+        path = os.path.join(self.root, directory)
+        return path if os.path.isdir(path) else None
+
+    def current(self, name):
+        """Name of the published version of a table, or None"""
+        path = self._current_dir(name)
+        return os.path.basename(path) if path else None
+
+    def exists(self, name):
+        """Whether a published copy of the table exists"""
+        return self._current_dir(name) is not None
+
+    def save(self, name, table, meta=None):
+        """Write a table to a new directory and publish it atomically
+
+        `meta` is a JSON-serializable dict kept in the manifest, e.g. to
+        record which source file the table was built from.
+        """
+        os.makedirs(self.root, exist_ok=True)
+        directory = f"{name}-{datetime.now().strftime('%Y%m%d%H%M%S')}-{uuid.uuid4().hex[:8]}"
+        tmp_path = os.path.join(self.root, f".{directory}.tmp")
+        os.makedirs(tmp_path)
+
+        try:
+            for column, values in table.columns.items():
+                np.save(os.path.join(tmp_path, f"{column}.npy"), np.ascontiguousarray(values))
+            for column, mask in table.masks.items():
+                np.save(os.path.join(tmp_path, f"{column}.mask.npy"), np.ascontiguousarray(mask))
+
+            manifest = {
+                'format': self.FORMAT_VERSION,
+                'size': len(table),
+                'schema': table.schema,
+                'categories': table.categories,
+                'masks': list(table.masks.keys()),
+                'meta': meta or {},
+                'created': datetime.now().isoformat()
+            }
+            with open(os.path.join(tmp_path, 'manifest.json'), 'w') as f:
+                json.dump(manifest, f)
+
+            os.rename(tmp_path, os.path.join(self.root, directory))
+        except Exception:
+            shutil.rmtree(tmp_path, ignore_errors=True)
+            raise
+
+        previous = self.current(name)
+        pointer_tmp = self._pointer_file(name) + f".{uuid.uuid4().hex[:8]}.tmp"
+        with open(pointer_tmp, 'w') as f:
+            f.write(directory)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(pointer_tmp, self._pointer_file(name))
+
+        self._remove_stale(name, {directory, previous})
+        return directory
+
+    def metadata(self, name):
+        """`meta` dict saved with the published table, or None if there is none"""
+        path = self._current_dir(name)
+        if path is None:
+            return None
+        with open(os.path.join(path, 'manifest.json'), 'r') as f:
+            return json.load(f).get('meta', {})
+
+    def load(self, name, mmap=True):
+        """Open the published table, memory-mapping its columns by default"""
+        path = self._current_dir(name)
+        if path is None:
+            raise FileNotFoundError(f"No cached table named '{name}' in {self.root}")
+
+        with open(os.path.join(path, 'manifest.json'), 'r') as f:
+            manifest = json.load(f)
+        if manifest.get('format') != self.FORMAT_VERSION:
+            raise ValueError(f"Unsupported catalog cache format in {path}")
+
+        # Empty files cannot be memory-mapped
+        mmap_mode = 'r' if mmap and manifest['size'] > 0 else None
+
+        schema = [tuple(field) for field in manifest['schema']]
+        columns = {
+            column: np.load(os.path.join(path, f"{column}.npy"), mmap_mode=mmap_mode)
+            for column, _ in schema
+        }
+        masks = {
+            column: np.load(os.path.join(path, f"{column}.mask.npy"), mmap_mode=mmap_mode)
+            for column in manifest['masks']
+        }
+        table = ColumnarTable(schema, columns, masks, manifest['categories'])
+        table.source_id = os.path.basename(path)
+        return table
+
+    def _remove_stale(self, name, keep):
+        """Best-effort removal of superseded versions of a table
+
+        `keep` holds the new version and the one the pointer named just
+        before the swap, so that a reader which resolved the old pointer
+        can still open its files. Directory names are not used to order
+        versions: two saves in the same second differ only by a random id.
+        """
+        stale = [
+            entry for entry in os.listdir(self.root)
+            if entry.startswith(f"{name}-") and entry not in keep
+        ]
+        for entry in stale:
+            # Open memory maps keep unlinked files alive on POSIX; on Windows
+            # the removal fails and is retried on the next save
+            shutil.rmtree(os.path.join(self.root, entry), ignore_errors=True)
+
+def open_store(root="data/catalog", backend=None):
+    """Catalog store selected by `backend` or EXORA_STORE: 'binary' (default) or 'sqlite'"""
+    backend = backend or os.environ.get('EXORA_STORE', 'binary')
+    if backend == 'sqlite':
+        from services.sqlite_store import SQLiteCatalogStore
+        return SQLiteCatalogStore(os.path.join(os.path.dirname(root) or '.', 'catalog.sqlite'))
+    if backend != 'binary':
+        raise ValueError(f"Unknown catalog store backend '{backend}'")
+    return BinaryCatalogStore(root)
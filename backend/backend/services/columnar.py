@@ -0,0 +1,166 @@
+import numpy as np
+
+# Column kinds understood by ColumnarTable
+FLOAT = 'float'
+INT = 'int'
+BOOL = 'bool'
+STR = 'str'
+CATEGORY = 'category'
+
+class ColumnarTable:
+    """Column-oriented table holding one typed NumPy array per field
+
+    Missing values are NaN in float columns, '' in string columns and -1 in
+    category code columns. Integer columns carry a boolean presence mask.
+    """
+
+    def __init__(self, schema, columns, masks=None, categories=None):
+        self.schema = list(schema)
+        self.kinds = dict(self.schema)
+        self.columns = columns
+        self.masks = masks or {}
+        self.categories = categories or {}
+        self.size = len(columns[self.schema[0][0]]) if self.schema else 0
+        # Identifies the stored copy the table was loaded from, if any
+        self.source_id = None
+
+    @classmethod
+    def from_records(cls, records, schema):
+        """Build a table from a list of row dicts"""
+        columns = {}
+        masks = {}
+        categories = {}
+
+        for name, kind in schema:
+            values = [record.get(name) for record in records]
+
+            if kind == FLOAT:
+                columns[name] = np.array(
+                    [np.nan if v is None else v for v in values], dtype=np.float64
+                )
+            elif kind == INT:
+                masks[name] = np.array([v is not None for v in values], dtype=bool)
+                columns[name] = np.array(
+                    [0 if v is None else int(v) for v in values], dtype=np.int32
+                )
+            elif kind == BOOL:
+                columns[name] = np.array([bool(v) for v in values], dtype=bool)
+            elif kind == STR:
+                columns[name] = np.array(['' if v is None else str(v) for v in values], dtype=str)
+            elif kind == CATEGORY:
+                labels = sorted({str(v) for v in values if v is not None})
+                lookup = {label: code for code, label in enumerate(labels)}
+                categories[name] = labels
+                columns[name] = np.array(
+                    [-1 if v is None else lookup[str(v)] for v in values], dtype=np.int16
+                )
+            else:
+                raise ValueError(f"Unknown column kind '{kind}' for '{name}'")
+
+        return cls(schema, columns, masks, categories)
+
+    @classmethod
+    def from_frame(cls, frame, schema):
+        """Build a table from the columns of a pandas DataFrame"""
+        columns = {}
+        masks = {}
+        categories = {}
+
+        for name, kind in schema:
+            series = frame[name]
+            present = series.notna().to_numpy()
+
+            if kind == FLOAT:
+                columns[name] = series.to_numpy(dtype=np.float64, na_value=np.nan)
+            elif kind == INT:
+                masks[name] = present
+                columns[name] = series.fillna(0).to_numpy(dtype=np.int64).astype(np.int32)
+            elif kind == BOOL:
+                columns[name] = series.fillna(False).to_numpy(dtype=bool)
+            elif kind == STR:
+                columns[name] = np.array(series.fillna('').astype(str).tolist(), dtype=str)
+            elif kind == CATEGORY:
+                labels = sorted(series[present].astype(str).unique().tolist())
+                categories[name] = labels
+                codes = np.full(len(series), -1, dtype=np.int16)
+                codes[present] = np.searchsorted(np.array(labels, dtype=str), series[present].to_numpy(dtype=str))
+                columns[name] = codes
+            else:
+                raise ValueError(f"Unknown column kind '{kind}' for '{name}'")
+
+        return cls(schema, columns, masks, categories)
+
+    def __len__(self):
+        return self.size
+
+    @property
+    def field_names(self):
+        """Field names in schema order"""
+        return [name for name, _ in self.schema]
+
+    def column(self, name):
+        """Raw array for a column (category columns return their codes)"""
+        return self.columns[name]
+
+    def present(self, name):
+        """Boolean mask of rows where the column has a value"""
+        kind = self.kinds[name]
+        values = self.columns[name]
+        if kind == FLOAT:
+            return ~np.isnan(values)
+        if kind == INT:
+            return self.masks[name]
+        if kind == STR:
+            return values != ''
+        if kind == CATEGORY:
+            return values >= 0
+        return np.ones(self.size, dtype=bool)
+
+    def category_code(self, name, label):
+        """Code of a category label, or -1 when the label is unknown"""
+        try:
+            return self.categories[name].index(label)
+        except ValueError:
+            return -1
+
+    def values(self, name, indices=None):
+        """Python values of a column for the given rows, with None for missing"""
+        kind = self.kinds[name]
+        column = self.columns[name]
+        if indices is not None:
+            column = column[indices]
+
+        if kind == FLOAT:
+            return [None if v != v else v for v in column.tolist()]
+        if kind == INT:
+            mask = self.masks[name] if indices is None else self.masks[name][indices]
+            return [v if ok else None for v, ok in zip(column.tolist(), mask.tolist())]
+        if kind == STR:
+            return [v or None for v in column.tolist()]
+        if kind == CATEGORY:
+            labels = self.categories[name]
+            return [labels[c] if c >= 0 else None for c in column.tolist()]
+        return column.tolist()
+
+    def rows(self, indices=None, fields=None):
+        """Row dicts for the given row indices (all rows when None)"""
+        if indices is not None:
+            indices = np.asarray(indices, dtype=np.intp)
+        fields = fields or self.field_names
+        value_lists = [self.values(name, indices) for name in fields]
+        return [dict(zip(fields, row)) for row in zip(*value_lists)]
+
+    def row(self, index):
+        """Single row dict"""
+        return self.rows([index])[0]
+
+    def take(self, indices):
+        """New table containing only the given rows"""
+        indices = np.asarray(indices, dtype=np.intp)
+        columns = {name: values[indices] for name, values in self.columns.items()}
+        masks = {name: mask[indices] for name, mask in self.masks.items()}
+        return ColumnarTable(self.schema, columns, masks, self.categories)
+
+    def nbytes(self):
+        """Approximate memory used by the column arrays"""
+        return sum(a.nbytes for a in self.columns.values()) + sum(m.nbytes for m in self.masks.values())
@@ -2,147 +2,173 @@ import pandas as pd
 import numpy as np
 from datetime import datetime
 import json
-from collections import Counter
+from services.catalog import ExoplanetCatalog
+from services.orbits import KeplerOrbits, DAYS_PER_YEAR
+
+# Julian day of 1970-01-01T00:00 UTC
+UNIX_EPOCH_JD = 2440587.5
 
 class DataProcessor:
     """Service for processing and analyzing exoplanet data"""
     
-    def __init__(self):
+    def __init__(self, catalog=None):
         self.cache_stats_file = "data/stats_cache.json"
+        self.catalog = catalog or ExoplanetCatalog()
     
-    def get_discovery_statistics(self):
+    def get_discovery_statistics(self, snapshot=None):
         """Get discovery statistics by year"""
-        from services.nasa_api import NASAExoplanetAPI
-        nasa_api = NASAExoplanetAPI()
-        
-        if not nasa_api.exoplanets_data:
-            nasa_api.load_exoplanets()
+        planets = (snapshot or self.catalog.snapshot).planets
         
-        years = []
-        for planet in nasa_api.exoplanets_data:
-            if planet.get('discovery_year'):
-                years.append(int(planet['discovery_year']))
+        years = planets.column('discovery_year')[planets.present('discovery_year')]
+        years = years[years > 0]
+        if not len(years):
+            return {'years': [], 'counts': [], 'total_planets': len(planets),
+                    'total_years': 0, 'peak_year': None, 'peak_count': 0}
         
-        year_counts = Counter(years)
+        # One bin per year between the first and last discovery
+        first_year = int(years.min())
+        year_counts = np.bincount(years - first_year)
+        offsets = np.flatnonzero(year_counts)
+        counts = year_counts[offsets]
+        peak = int(np.argmax(counts))
         
         stats = {
-            'years': sorted(year_counts.keys()),
-            'counts': [year_counts[year] for year in sorted(year_counts.keys())],
-            'total_planets': len(nasa_api.exoplanets_data),
-            'total_years': len(year_counts),
-            'peak_year': max(year_counts, key=year_counts.get),
-            'peak_count': max(year_counts.values())
+            'years': (offsets + first_year).tolist(),
+            'counts': counts.tolist(),
+            'total_planets': len(planets),
+            'total_years': len(offsets),
+            'peak_year': int(offsets[peak] + first_year),
+            'peak_count': int(counts[peak])
         }
         
         return stats
     
-    def get_discovery_methods(self):
+    def get_discovery_methods(self, snapshot=None):
         """Get discovery methods distribution"""
-        from services.nasa_api import NASAExoplanetAPI
-        nasa_api = NASAExoplanetAPI()
-        
-        if not nasa_api.exoplanets_data:
-            nasa_api.load_exoplanets()
+        planets = (snapshot or self.catalog.snapshot).planets
         
-        methods = []
-        for planet in nasa_api.exoplanets_data:
-            method = planet.get('discovery_method', 'Unknown')
-            methods.append(method)
+        # Shift category codes by one so missing (-1) gets bin 0
+        bins = planets.column('discovery_method').astype(np.intp) + 1
+        labels = ['Unknown'] + planets.categories['discovery_method']
+        method_counts = np.bincount(bins, minlength=len(labels))
         
-        method_counts = Counter(methods)
+        # Keep the order in which methods first appear in the catalog
+        first_seen = np.full(len(labels), len(bins), dtype=np.intp)
+        np.minimum.at(first_seen, bins, np.arange(len(bins)))
+        present = np.flatnonzero(method_counts)
+        present = present[np.argsort(first_seen[present], kind='stable')]
+        counts = method_counts[present]
         
         return {
-            'methods': list(method_counts.keys()),
-            'counts': list(method_counts.values()),
-            'percentages': [count/sum(method_counts.values())*100 for count in method_counts.values()]
+            'methods': [labels[b] for b in present.tolist()],
+            'counts': counts.tolist(),
+            'percentages': (counts / counts.sum() * 100).tolist() if len(counts) else []
         }
     
-    def get_planet_size_distribution(self):
-        """Get planet size distribution and comparisons"""
-        from services.nasa_api import NASAExoplanetAPI
-        nasa_api = NASAExoplanetAPI()
-        
-        if not nasa_api.exoplanets_data:
-            nasa_api.load_exoplanets()
-        
-        radii = []
-        for planet in nasa_api.exoplanets_data:
-            if planet.get('radius') and planet['radius'] > 0:
-                radii.append(float(planet['radius']))
-        
-        size_categories = {
-            'Super-Earth (1-1.75 R⊕)': 0,
-            'Sub-Neptune (1.75-3.5 R⊕)': 0,
-            'Neptune-size (3.5-8 R⊕)': 0,
-            'Jupiter-size (8+ R⊕)': 0
-        }
-        
-        for radius in radii:
-            if 1 <= radius < 1.75:
-                size_categories['Super-Earth (1-1.75 R⊕)'] += 1
-            elif 1.75 <= radius < 3.5:
-                size_categories['Sub-Neptune (1.75-3.5 R⊕)'] += 1
-            elif 3.5 <= radius < 8:
-                size_categories['Neptune-size (3.5-8 R⊕)'] += 1
-            elif radius >= 8:
-                size_categories['Jupiter-size (8+ R⊕)'] += 1
-        
-        return {
-            'categories': list(size_categories.keys()),
-            'counts': list(size_categories.values()),
-            'raw_radii': radii,
+    # Lower edges of the size categories, in Earth radii
+    SIZE_EDGES = np.array([1, 1.75, 3.5, 8])
+    SIZE_LABELS = [
+        'Super-Earth (1-1.75 R⊕)',
+        'Sub-Neptune (1.75-3.5 R⊕)',
+        'Neptune-size (3.5-8 R⊕)',
+        'Jupiter-size (8+ R⊕)'
+    ]
+    
+    # Quantiles reported alongside the size histogram
+    SIZE_QUANTILES = [0.05, 0.25, 0.5, 0.75, 0.95]
+    
+    def get_planet_size_distribution(self, snapshot=None, resolution=10, include_raw=False):
+        """Get planet size distribution and comparisons
+        
+        Radii are summarized as a histogram with `resolution` log-spaced bins
+        per decade, aligned to powers of ten, plus quantiles. The full list of
+        radii is only included with `include_raw`.
+        """
+        radii = (snapshot or self.catalog.snapshot).planets.column('radius')
+        radii = radii[radii > 0]
+        
+        # Bin 0 holds radii below 1 R⊕, which belong to no category
+        size_counts = np.bincount(np.digitize(radii, self.SIZE_EDGES), minlength=len(self.SIZE_EDGES) + 1)
+        
+        has_radii = len(radii) > 0
+        quantiles = np.quantile(radii, self.SIZE_QUANTILES) if has_radii else np.zeros(len(self.SIZE_QUANTILES))
+        sizes = {
+            'categories': list(self.SIZE_LABELS),
+            'counts': size_counts[1:].tolist(),
+            'histogram': self._log_histogram(radii, resolution),
+            'quantiles': {
+                f"p{round(q * 100)}": float(v) for q, v in zip(self.SIZE_QUANTILES, quantiles)
+            },
             'earth_radius': 1.0,
             'jupiter_radius': 11.2,
             'statistics': {
-                'min': min(radii) if radii else 0,
-                'max': max(radii) if radii else 0,
-                'mean': np.mean(radii) if radii else 0,
-                'median': np.median(radii) if radii else 0
+                'min': float(radii.min()) if has_radii else 0,
+                'max': float(radii.max()) if has_radii else 0,
+                'mean': float(radii.mean()) if has_radii else 0,
+                'median': float(np.median(radii)) if has_radii else 0
             }
         }
+        if include_raw:
+            sizes['raw_radii'] = radii.tolist()
+        return sizes
     
-    def get_orbital_parameters(self, planet_name):
-        """Get orbital parameters for 3D visualization"""
-        from services.nasa_api import NASAExoplanetAPI
-        nasa_api = NASAExoplanetAPI()
+    def _log_histogram(self, values, resolution):
+        """Counts of positive values in log bins, `resolution` per decade"""
+        if not len(values):
+            return {'scale': 'log', 'resolution': resolution, 'edges': [], 'counts': []}
         
-        if not nasa_api.exoplanets_data:
-            nasa_api.load_exoplanets()
+        # Bin k spans 10**(k / resolution) to 10**((k + 1) / resolution)
+        bins = np.floor(np.log10(values) * resolution).astype(np.int64)
+        first = int(bins.min())
+        counts = np.bincount(bins - first)
+        edges = 10.0 ** (np.arange(first, first + len(counts) + 1) / resolution)
         
-        planet = next((p for p in nasa_api.exoplanets_data if p['name'].lower() == planet_name.lower()), None)
-        
-        if not planet:
-            planet = {
+        return {
+            'scale': 'log',
+            'resolution': resolution,
+            'edges': edges.tolist(),
+            'counts': counts.tolist()
+        }
+    
+    def get_orbital_parameters(self, planet_name, num_points=100, epoch=None):
+        """Get orbital parameters for 3D visualization
+
+        Positions cover one orbit in `num_points` equal time steps, starting
+        at periastron or at `epoch` (days, BJD when the planet has a transit
+        time), from the planet's Keplerian elements and host star mass.
+        """
+        snapshot = self.catalog.snapshot
+        
+        index = snapshot.find_planet(planet_name)
+        planet = snapshot.planets.row(index) if index is not None else None
+        
+        if planet and planet.get('orbital_period'):
+            orbits = KeplerOrbits.from_planets(snapshot.planets, [index])
+        else:
+            planet = planet or {
                 'name': planet_name,
                 'orbital_period': 365.25,
                 'radius': 1.0,
                 'distance': 50
             }
+            orbits = KeplerOrbits([planet.get('orbital_period') or 365.25])
         
-        orbital_period = planet.get('orbital_period', 365.25)  # days
+        orbital_period = float(orbits.period[0])  # days
         planet_radius = planet.get('radius', 1.0)  # Earth radii
+        semi_major_axis = float(orbits.semi_major_axis[0])  # AU
         
-        num_points = 100
-        angles = np.linspace(0, 2*np.pi, num_points)
-        
-        # Semi-major axis (AU) - rough calculation from orbital period using Kepler's 3rd law
-        # Assumes solar mass star: a³ ∝ T²
-        semi_major_axis = (orbital_period / 365.25) ** (2/3)
-        
-        positions = []
-        for angle in angles:
-            x = semi_major_axis * np.cos(angle)
-            y = semi_major_axis * np.sin(angle)
-            z = 0  # Assume coplanar orbit for simplicity
-            positions.append({'x': x, 'y': y, 'z': z})
+        positions = orbits.positions(orbits.orbit_times(num_points, epoch))[0]
         
         return {
             'planet_name': planet['name'],
             'host_star': planet.get('host_star', 'Unknown Star'),
             'orbital_period': orbital_period,
             'semi_major_axis': semi_major_axis,
+            'eccentricity': float(orbits.eccentricity[0]),
+            'inclination': float(orbits.inclination[0]),
+            'star_mass': float(orbits.star_mass[0]),
             'planet_radius': planet_radius,
-            'orbital_positions': positions,
+            'orbital_positions': [dict(zip('xyz', p)) for p in positions.tolist()],
             'planet_properties': {
                 'mass': planet.get('mass'),
                 'equilibrium_temp': planet.get('equilibrium_temp'),
@@ -151,22 +177,66 @@ class DataProcessor:
             }
         }
     
+    def get_system_orbits(self, host_star, num_points=200, start=None, span=None):
+        """Positions of every planet of a host star at shared time steps, or None for an unknown host
+
+        All orbits are solved in one KeplerOrbits pass over the host's
+        planets. Times are Julian days starting at `start` (default now)
+        and cover `span` days (default the longest orbital period).
+        Planets are listed from the innermost orbit outwards.
+        """
+        snapshot = self.catalog.snapshot
+        rows = snapshot.planets_of_host(host_star)
+        if not len(rows):
+            return None
+        
+        planets = snapshot.planets
+        orbits = KeplerOrbits.from_planets(planets, rows)
+        known = np.isfinite(orbits.period) & (orbits.period > 0)
+        
+        if start is None:
+            start = datetime.now().timestamp() / 86400.0 + UNIX_EPOCH_JD
+        if span is None:
+            span = float(orbits.period[known].max()) if known.any() else DAYS_PER_YEAR
+        times = start + np.linspace(0, span, num_points)
+        positions = orbits.positions(times)
+        
+        # Innermost first by semi-major axis (derived from the period when the
+        # archive has none), then by period; planets with neither go last
+        order = np.lexsort((
+            planets.column('name')[rows],
+            np.where(known, orbits.period, np.inf),
+            np.nan_to_num(orbits.semi_major_axis, nan=np.inf)
+        ))
+        
+        star = snapshot.find_star(host_star)
+        system = []
+        for i, planet in zip(order.tolist(), planets.rows(rows[order], fields=['name', 'radius', 'mass'])):
+            planet.update({
+                'orbital_period': float(orbits.period[i]) if known[i] else None,
+                'semi_major_axis': float(orbits.semi_major_axis[i]) if known[i] else None,
+                'eccentricity': float(orbits.eccentricity[i]),
+                'inclination': float(orbits.inclination[i]),
+                'periastron_arg': float(orbits.periastron_arg[i]),
+                'positions': positions[i].tolist() if known[i] else None
+            })
+            system.append(planet)
+        
+        return {
+            'host_star': planets.values('host_star', [rows[0]])[0],
+            'star': snapshot.stars.row(star) if star is not None else None,
+            'star_mass': float(orbits.star_mass[0]),
+            'times': times.tolist(),
+            'planets': system
+        }
+    
     def get_habitable_zone_planets(self):
         """Get planets potentially in the habitable zone"""
-        from services.nasa_api import NASAExoplanetAPI
-        nasa_api = NASAExoplanetAPI()
-        
-        if not nasa_api.exoplanets_data:
-            nasa_api.load_exoplanets()
-        
-        habitable_planets = []
+        planets = self.catalog.snapshot.planets
+        temp = planets.column('equilibrium_temp')
+        radius = planets.column('radius')
         
-        for planet in nasa_api.exoplanets_data:
-            temp = planet.get('equilibrium_temp')
-            radius = planet.get('radius')
-            
-            if temp and radius:
-                if 200 <= temp <= 350 and 0.5 <= radius <= 2.5:
-                    habitable_planets.append(planet)
+        # Comparisons against NaN are False, so missing values drop out
+        habitable = (temp >= 200) & (temp <= 350) & (radius >= 0.5) & (radius <= 2.5)
         
-        return habitable_planets
\ No newline at end of file
+        return planets.rows(np.flatnonzero(habitable))
\ No newline at end of file
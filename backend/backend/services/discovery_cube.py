@@ -0,0 +1,88 @@
+import numpy as np
+from services.data_processor import DataProcessor
+
+# Radius bins of the size axis; planets without a radius land in 'unknown'
+SIZE_KEYS = ['unknown', 'sub-earth', 'super-earth', 'sub-neptune', 'neptune', 'jupiter']
+SIZE_LABELS = ['Unknown radius', 'Sub-Earth (<1 R⊕)'] + DataProcessor.SIZE_LABELS
+
+DIMENSIONS = ('year', 'method', 'size')
+
+class DiscoveryCube:
+    """Dense year × discovery method × size category planet counts
+
+    Built with one bincount over the planet table, after which any slice or
+    marginal (e.g. transit discoveries per year) is an array sum over a few
+    thousand cells. Planets without a discovery year are left out.
+    """
+
+    def __init__(self, years, methods, counts):
+        self.years = years
+        self.methods = methods
+        self.counts = counts
+
+    @classmethod
+    def from_table(cls, planets):
+        """Count planets into the cube"""
+        years = planets.column('discovery_year')
+        has_year = planets.present('discovery_year') & (years > 0)
+        years = years[has_year].astype(np.int64)
+        first_year = int(years.min()) if len(years) else 0
+        year_axis = np.arange(first_year, int(years.max()) + 1 if len(years) else 0)
+
+        # Missing method (-1) becomes 'Unknown' at position 0
+        methods = planets.column('discovery_method')[has_year].astype(np.intp) + 1
+        method_axis = ['Unknown'] + list(planets.categories['discovery_method'])
+
+        radii = planets.column('radius')[has_year]
+        sizes = np.where(radii > 0, np.digitize(radii, DataProcessor.SIZE_EDGES) + 1, 0)
+
+        shape = (len(year_axis), len(method_axis), len(SIZE_KEYS))
+        cells = np.zeros(0, dtype=np.intp)
+        if len(years):
+            cells = np.ravel_multi_index((years - first_year, methods, sizes), shape)
+        counts = np.bincount(cells, minlength=int(np.prod(shape))).reshape(shape)
+        return cls(year_axis, method_axis, counts)
+
+    def _method_index(self, names):
+        wanted = {name.strip().casefold() for name in names}
+        return [i for i, method in enumerate(self.methods) if method.casefold() in wanted]
+
+    def slice(self, methods=None, sizes=None, year_min=None, year_max=None, by=('year', 'method')):
+        """Counts restricted to the given methods, sizes and years, summed over axes not in `by`"""
+        unknown = [dim for dim in by if dim not in DIMENSIONS]
+        if unknown or len(set(by)) != len(by):
+            raise ValueError(f"Dimensions must be distinct values from {list(DIMENSIONS)}")
+
+        year_rows = np.ones(len(self.years), dtype=bool)
+        if year_min is not None:
+            year_rows &= self.years >= year_min
+        if year_max is not None:
+            year_rows &= self.years <= year_max
+        method_rows = self._method_index(methods) if methods else list(range(len(self.methods)))
+        if sizes:
+            bad = [s for s in sizes if s not in SIZE_KEYS]
+            if bad:
+                raise ValueError(f"Unknown sizes {bad}; use {SIZE_KEYS}")
+            size_rows = [SIZE_KEYS.index(s) for s in sizes]
+        else:
+            size_rows = list(range(len(SIZE_KEYS)))
+
+        counts = self.counts[np.flatnonzero(year_rows)][:, method_rows][:, :, size_rows]
+        axes = {
+            'year': self.years[year_rows].tolist(),
+            'method': [self.methods[i] for i in method_rows],
+            'size': [SIZE_KEYS[i] for i in size_rows]
+        }
+
+        summed = tuple(i for i, dim in enumerate(DIMENSIONS) if dim not in by)
+        counts = counts.sum(axis=summed)
+        # Reorder the remaining axes to follow `by`
+        kept = [dim for dim in DIMENSIONS if dim in by]
+        counts = np.transpose(counts, [kept.index(dim) for dim in by])
+
+        result = {'dimensions': list(by), 'counts': counts.tolist(), 'total': int(counts.sum())}
+        for dim in by:
+            result[dim] = axes[dim]
+        if 'size' in by:
+            result['size_labels'] = [SIZE_LABELS[SIZE_KEYS.index(s)] for s in axes['size']]
+        return result
@@ -0,0 +1,25 @@
+import csv
+import io
+import json
+
+def iter_ndjson(table, rows, fields=None, batch_size=500):
+    """Yield newline-delimited JSON for the given rows, one batch of lines per chunk"""
+    for start in range(0, len(rows), batch_size):
+        records = table.rows(rows[start:start + batch_size], fields=fields)
+        yield ''.join(json.dumps(record) + '\n' for record in records)
+
+def iter_csv(table, rows, fields=None, batch_size=500):
+    """Yield CSV text for the given rows: the header first, then one batch per chunk"""
+    fields = fields or table.field_names
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+
+    writer.writerow(fields)
+    yield buffer.getvalue()
+
+    for start in range(0, len(rows), batch_size):
+        buffer.seek(0)
+        buffer.truncate()
+        records = table.rows(rows[start:start + batch_size], fields=fields)
+        writer.writerows(['' if record[f] is None else record[f] for f in fields] for record in records)
+        yield buffer.getvalue()
@@ -0,0 +1,94 @@
+import numpy as np
+from services.columnar import ColumnarTable, FLOAT, INT, BOOL, STR, CATEGORY
+
+STAR_SCHEMA = [
+    ('name', STR),
+    ('ra', FLOAT),
+    ('dec', FLOAT),
+    ('distance', FLOAT),
+    ('magnitude', FLOAT),
+    ('spectral_type', CATEGORY),
+    ('temperature', FLOAT),
+    ('has_planets', BOOL),
+    ('planet_count', INT)
+]
+
+# Harvard spectral classes, as labels of the spectral_type category column
+SPECTRAL_CLASSES = sorted('OBAFGKM')
+
+# Lower effective-temperature bound (K) of each class, used when the archive
+# gives a temperature but no spectral type
+CLASS_TEMPERATURES = [
+    (30000, 'O'), (10000, 'B'), (7500, 'A'), (6000, 'F'), (5200, 'G'), (3700, 'K'), (0, 'M')
+]
+
+def spectral_classes(letters, temperatures):
+    """spectral_type codes from the first letter of the spectral type, else from the temperature"""
+    known = np.isin(letters, SPECTRAL_CLASSES)
+
+    bounds = np.array([bound for bound, _ in CLASS_TEMPERATURES[::-1]], dtype=np.float64)
+    by_temperature = np.array([label for _, label in CLASS_TEMPERATURES[::-1]], dtype='<U1')
+    slots = np.clip(np.searchsorted(bounds, temperatures, side='right') - 1, 0, len(bounds) - 1)
+    letters = np.where(known, letters, by_temperature[slots])
+
+    codes = np.searchsorted(np.array(SPECTRAL_CLASSES), letters).astype(np.int16)
+    codes[~known & np.isnan(temperatures)] = -1
+    return codes
+
+def build_star_table(planets, hosts=None):
+    """Host star table by a group-by over the planets' host_star, sorted by name
+
+    Each star takes its position, distance, magnitude, temperature and
+    spectral type from the first of its planets that has a value. With
+    `hosts`, only those host stars are built.
+    """
+    host_names = planets.column('host_star')
+    rows = np.flatnonzero(host_names != '')
+    if hosts is not None:
+        rows = rows[np.isin(host_names[rows], list(hosts))]
+    names, groups, counts = np.unique(host_names[rows], return_inverse=True, return_counts=True)
+    starts = np.arange(len(names))
+
+    def first_present(field):
+        # Within each host, rows with a value sort first; lexsort is stable
+        present = planets.present(field)[rows]
+        order = np.lexsort((~present, groups))
+        return rows[order[np.searchsorted(groups[order], starts)]]
+
+    columns = {'name': names}
+    for field, planet_field in [('ra', 'ra'), ('dec', 'dec'), ('distance', 'distance'),
+                                ('magnitude', 'star_magnitude'), ('temperature', 'star_temperature')]:
+        columns[field] = planets.column(planet_field)[first_present(planet_field)].astype(np.float64)
+
+    # Code -1 (no spectral type) picks the trailing ''
+    labels = planets.categories['star_spectral_type']
+    letters = np.array([label[:1].upper() for label in labels] + [''], dtype='<U1')
+    codes = planets.column('star_spectral_type')[first_present('star_spectral_type')]
+    columns['spectral_type'] = spectral_classes(letters[codes], columns['temperature'])
+
+    columns['has_planets'] = np.ones(len(names), dtype=bool)
+    columns['planet_count'] = counts.astype(np.int32)
+    masks = {'planet_count': np.ones(len(names), dtype=bool)}
+    return ColumnarTable(STAR_SCHEMA, columns, masks, {'spectral_type': SPECTRAL_CLASSES})
+
+def update_star_table(stars, planets, hosts):
+    """Rebuild only the rows of `hosts` in a star table made by build_star_table
+
+    Hosts left without planets are dropped and new ones are inserted, so
+    the result is the same table a full rebuild would produce.
+    """
+    hosts = set(hosts)
+    rebuilt = build_star_table(planets, hosts)
+    kept = stars.take(np.flatnonzero(~np.isin(stars.column('name'), list(hosts))))
+
+    names = np.concatenate([kept.column('name'), rebuilt.column('name')])
+    order = np.argsort(names, kind='stable')
+    columns = {
+        field: np.concatenate([kept.column(field), rebuilt.column(field)])[order]
+        for field in stars.field_names
+    }
+    masks = {
+        field: np.concatenate([kept.masks[field], rebuilt.masks[field]])[order]
+        for field in stars.masks
+    }
+    return ColumnarTable(STAR_SCHEMA, columns, masks, {'spectral_type': SPECTRAL_CLASSES})
@@ -0,0 +1,158 @@
+import hashlib
+import os
+import threading
+import numpy as np
+import pandas as pd
+from services.columnar import ColumnarTable, FLOAT, INT, STR, CATEGORY
+from services.catalog_store import open_store
+
+# Kepler cumulative KOI table; every column not listed here is a float
+KOI_TYPED_COLUMNS = {
+    'rowid': INT,
+    'kepid': INT,
+    'kepoi_name': STR,
+    'kepler_name': STR,
+    'koi_disposition': CATEGORY,
+    'koi_pdisposition': CATEGORY,
+    'koi_fpflag_nt': INT,
+    'koi_fpflag_ss': INT,
+    'koi_fpflag_co': INT,
+    'koi_fpflag_ec': INT,
+    'koi_tce_plnt_num': INT,
+    'koi_tce_delivname': CATEGORY
+}
+
+KOI_COLUMNS = [
+    'rowid', 'kepid', 'kepoi_name', 'kepler_name', 'koi_disposition', 'koi_pdisposition',
+    'koi_score', 'koi_fpflag_nt', 'koi_fpflag_ss', 'koi_fpflag_co', 'koi_fpflag_ec',
+    'koi_period', 'koi_period_err1', 'koi_period_err2',
+    'koi_time0bk', 'koi_time0bk_err1', 'koi_time0bk_err2',
+    'koi_impact', 'koi_impact_err1', 'koi_impact_err2',
+    'koi_duration', 'koi_duration_err1', 'koi_duration_err2',
+    'koi_depth', 'koi_depth_err1', 'koi_depth_err2',
+    'koi_prad', 'koi_prad_err1', 'koi_prad_err2',
+    'koi_teq', 'koi_teq_err1', 'koi_teq_err2',
+    'koi_insol', 'koi_insol_err1', 'koi_insol_err2',
+    'koi_model_snr', 'koi_tce_plnt_num', 'koi_tce_delivname',
+    'koi_steff', 'koi_steff_err1', 'koi_steff_err2',
+    'koi_slogg', 'koi_slogg_err1', 'koi_slogg_err2',
+    'koi_srad', 'koi_srad_err1', 'koi_srad_err2',
+    'ra', 'dec', 'koi_kepmag'
+]
+
+KOI_SCHEMA = [(name, KOI_TYPED_COLUMNS.get(name, FLOAT)) for name in KOI_COLUMNS]
+
+# pandas dtypes used when parsing the CSV
+PANDAS_DTYPES = {
+    INT: 'Int64',
+    FLOAT: 'float64',
+    STR: 'string',
+    CATEGORY: 'string'
+}
+
+def file_sha256(path):
+    """Hex SHA-256 of a file's contents"""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 20), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+class KOICatalog:
+    """Kepler Objects of Interest from the cumulative table, kept as a binary columnar store
+
+    The CSV is parsed once with explicit dtypes and cached in the binary
+    store together with its SHA-256. Later loads memory-map the cache and
+    only re-parse when the CSV changes.
+    """
+
+    def __init__(self, csv_path="../cumulative.csv", store=None):
+        self.csv_path = csv_path
+        self.store = store or open_store()
+        self.table = None
+        self.source_sha256 = None
+        self._lock = threading.Lock()
+
+    def load(self, recheck=False):
+        """Open the cached KOI table, rebuilding it when the CSV has changed
+
+        Once loaded, the CSV is only hashed again with `recheck`.
+        """
+        with self._lock:
+            if self.table is not None and not recheck:
+                return self.table
+
+            sha256 = file_sha256(self.csv_path) if os.path.exists(self.csv_path) else None
+            if self.table is not None and sha256 in (None, self.source_sha256):
+                return self.table
+            meta = self.store.metadata('koi')
+            if meta is not None and (sha256 is None or meta.get('sha256') == sha256):
+                print("Loading KOI table from cache...")
+                table = self.store.load('koi')
+                sha256 = meta.get('sha256')
+            elif sha256 is not None:
+                print("Parsing KOI cumulative table...")
+                self.store.save('koi', self.parse_csv(self.csv_path), meta={'sha256': sha256})
+                table = self.store.load('koi')
+            else:
+                raise FileNotFoundError(f"KOI table not found at {self.csv_path}")
+
+            self._build_indexes(table)
+            self.source_sha256 = sha256
+            self.table = table
+            return table
+
+    @staticmethod
+    def parse_csv(path):
+        """Parse the cumulative CSV into a ColumnarTable"""
+        dtypes = {name: PANDAS_DTYPES[kind] for name, kind in KOI_SCHEMA}
+        frame = pd.read_csv(path, usecols=KOI_COLUMNS, dtype=dtypes, comment='#')
+        return ColumnarTable.from_frame(frame, KOI_SCHEMA)
+
+    def _build_indexes(self, table):
+        """kepid -> rows (via a sorted array), and case-folded KOI / Kepler names -> row"""
+        kepids = table.column('kepid')
+        self.kepid_order = np.argsort(kepids, kind='stable')
+        self.sorted_kepids = kepids[self.kepid_order]
+
+        self.kepoi_index = {
+            name.casefold(): row for row, name in enumerate(table.column('kepoi_name').tolist())
+        }
+        self.kepler_index = {}
+        for row, name in enumerate(table.column('kepler_name').tolist()):
+            if name:
+                self.kepler_index.setdefault(name.casefold(), row)
+
+    def rows_for_kepid(self, kepid):
+        """Row indexes of every KOI around one Kepler target star"""
+        self.load()
+        low = np.searchsorted(self.sorted_kepids, kepid, side='left')
+        high = np.searchsorted(self.sorted_kepids, kepid, side='right')
+        return np.sort(self.kepid_order[low:high])
+
+    def find(self, name):
+        """Row index of a KOI by KOI name (K00752.01) or Kepler name (Kepler-227 b), or None"""
+        self.load()
+        key = name.strip().casefold()
+        row = self.kepoi_index.get(key)
+        return row if row is not None else self.kepler_index.get(key)
+
+    def lookup(self, identifier):
+        """KOI rows matching a kepid, KOI name or Kepler name"""
+        table = self.load()
+        if identifier.isdigit():
+            rows = self.rows_for_kepid(int(identifier))
+        else:
+            row = self.find(identifier)
+            rows = [] if row is None else [row]
+        return table.rows(rows)
+
+    def get_info(self):
+        """Summary of the loaded KOI table"""
+        table = self.load()
+        return {
+            'koi_count': len(table),
+            'star_count': int(len(np.unique(self.sorted_kepids))),
+            'source_sha256': self.source_sha256,
+            'memory_bytes': table.nbytes()
+        }
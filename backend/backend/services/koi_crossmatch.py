@@ -0,0 +1,160 @@
+import threading
+import numpy as np
+from collections import OrderedDict
+from services.columnar import ColumnarTable, FLOAT, INT, STR, CATEGORY
+from services.spatial import match_sky
+
+MATCH_SCHEMA = [
+    ('kepoi_name', STR),
+    ('kepid', INT),
+    ('kepler_name', STR),
+    ('host_star', STR),
+    ('planet_name', STR),
+    ('separation_arcsec', FLOAT),
+    ('rank', INT),
+    ('match_type', CATEGORY)
+]
+
+DEFAULT_RADIUS_ARCSEC = 2.0
+MAX_RADIUS_ARCSEC = 600.0
+
+# KOI and catalog periods this close (relative) are taken to be the same planet
+PERIOD_TOLERANCE = 0.01
+
+class KOICrossMatch:
+    """Positional cross-match of KOI targets against NASA planet host stars
+
+    Every KOI is paired with each host star within `radius_arcsec` on the sky
+    (rank 1 is the closest). Within a matched host, the KOI is tied to a
+    specific planet by Kepler name, or failing that by orbital period;
+    otherwise only the host is known (match_type 'position'). The default
+    radius is persisted in the binary store, keyed by the KOI data hash and
+    the catalog fingerprint; other radii are computed on demand and kept in
+    a small in-memory cache.
+    """
+
+    def __init__(self, koi_catalog, catalog, store=None, max_cached=8):
+        self.koi_catalog = koi_catalog
+        self.catalog = catalog
+        self.store = store or koi_catalog.store
+        self.max_cached = max_cached
+        self._cache = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _sources(self, snapshot, radius_arcsec):
+        self.koi_catalog.load()
+        return {
+            'koi_sha256': self.koi_catalog.source_sha256,
+            'catalog_fingerprint': snapshot.fingerprint,
+            'radius_arcsec': radius_arcsec
+        }
+
+    def matches(self, radius_arcsec=DEFAULT_RADIUS_ARCSEC):
+        """Match table for the current catalog snapshot at a given radius"""
+        radius_arcsec = float(radius_arcsec)
+        if not 0 < radius_arcsec <= MAX_RADIUS_ARCSEC:
+            raise ValueError(f"'radius' must be between 0 and {MAX_RADIUS_ARCSEC} arcsec")
+
+        snapshot = self.catalog.snapshot
+        sources = self._sources(snapshot, radius_arcsec)
+        key = tuple(sorted(sources.items()))
+        with self._lock:
+            if key in self._cache:
+                self._cache.move_to_end(key)
+                return self._cache[key]
+
+            persist = radius_arcsec == DEFAULT_RADIUS_ARCSEC
+            meta = self.store.metadata('koi_crossmatch') if persist else None
+            if meta and all(meta.get(k) == v for k, v in sources.items()):
+                table = self.store.load('koi_crossmatch')
+            else:
+                table = self.build(snapshot, radius_arcsec)
+                if persist:
+                    self.store.save('koi_crossmatch', table, meta=sources)
+                    table = self.store.load('koi_crossmatch')
+
+            self._cache[key] = table
+            while len(self._cache) > self.max_cached:
+                self._cache.popitem(last=False)
+            return table
+
+    def build(self, snapshot, radius_arcsec):
+        """Cross-match every KOI against the snapshot's host stars"""
+        kois = self.koi_catalog.load()
+        planets = snapshot.planets
+        host_rows = snapshot.host_rows
+
+        koi_rows, host_slots, separations = match_sky(
+            kois.column('ra'), kois.column('dec'),
+            planets.column('ra')[host_rows], planets.column('dec')[host_rows],
+            radius_arcsec
+        )
+
+        # Rank matches per KOI; pairs arrive grouped by KOI, closest first
+        starts = np.flatnonzero(np.r_[True, koi_rows[1:] != koi_rows[:-1]]) if len(koi_rows) else []
+        ranks = np.arange(len(koi_rows)) - np.repeat(starts, np.diff(np.r_[starts, len(koi_rows)]))
+
+        hosts = planets.column('host_star')[host_rows[host_slots]]
+        kepler_names = kois.column('kepler_name')[koi_rows]
+        koi_periods = kois.column('koi_period')[koi_rows]
+        planet_names, match_types = self._pair_planets(snapshot, hosts, kepler_names, koi_periods)
+
+        columns = {
+            'kepoi_name': np.array(kois.column('kepoi_name')[koi_rows]),
+            'kepid': np.array(kois.column('kepid')[koi_rows]),
+            'kepler_name': np.array(kepler_names),
+            'host_star': np.array(hosts),
+            'planet_name': np.array(planet_names, dtype=str),
+            'separation_arcsec': separations,
+            'rank': (ranks + 1).astype(np.int32)
+        }
+        labels = ['name', 'period', 'position']
+        codes = np.array([labels.index(t) for t in match_types], dtype=np.int16)
+        columns['match_type'] = codes
+
+        masks = {
+            'kepid': kois.present('kepid')[koi_rows],
+            'rank': np.ones(len(koi_rows), dtype=bool)
+        }
+        return ColumnarTable(MATCH_SCHEMA, columns, masks, {'match_type': labels})
+
+    def _pair_planets(self, snapshot, hosts, kepler_names, koi_periods):
+        """Planet of the matched host for each pair, and how it was chosen"""
+        periods = snapshot.planets.column('orbital_period')
+        names = snapshot.planets.column('name')
+        planet_names = []
+        match_types = []
+
+        for host, kepler_name, koi_period in zip(hosts.tolist(), kepler_names.tolist(), koi_periods.tolist()):
+            rows = snapshot.planets_of_host(host)
+            named = snapshot.find_planet(kepler_name) if kepler_name else None
+            if named is not None and named in rows:
+                planet_names.append(names[named])
+                match_types.append('name')
+                continue
+
+            if np.isfinite(koi_period) and len(rows):
+                offsets = np.abs(periods[rows] - koi_period) / periods[rows]
+                best = np.nanargmin(offsets) if np.isfinite(offsets).any() else None
+                if best is not None and offsets[best] <= PERIOD_TOLERANCE:
+                    planet_names.append(names[rows[best]])
+                    match_types.append('period')
+                    continue
+
+            planet_names.append('')
+            match_types.append('position')
+        return planet_names, match_types
+
+    def summary(self, radius_arcsec=DEFAULT_RADIUS_ARCSEC):
+        """Counts of matched KOIs by match type"""
+        table = self.matches(radius_arcsec)
+        best = table.column('rank') == 1
+        codes, counts = np.unique(table.column('match_type')[best], return_counts=True)
+        labels = table.categories['match_type']
+        return {
+            'radius_arcsec': float(radius_arcsec),
+            'pairs': len(table),
+            'matched_kois': int(np.count_nonzero(best)),
+            'koi_count': len(self.koi_catalog.load()),
+            'by_match_type': {labels[c]: n for c, n in zip(codes.tolist(), counts.tolist())}
+        }
@@ -0,0 +1,157 @@
+import re
+import threading
+import numpy as np
+from services.columnar import ColumnarTable, FLOAT, INT, STR
+from services.koi_catalog import KOICatalog, file_sha256
+
+class KOIScorer:
+    """Batch classification of every KOI with the trained model, persisted by kepoi_name
+
+    Feature columns are stacked into one float matrix and scored in chunks
+    of `chunk_size` rows with `predict_proba`. KOIs missing any feature are
+    left unscored. The scores are saved to the binary store together with
+    the SHA-256 of the loaded model and of the KOI CSV, and are only
+    recomputed when either file changes; the changed file is reloaded first.
+    """
+
+    def __init__(self, koi_catalog, predictor, store=None, chunk_size=4096):
+        self.koi_catalog = koi_catalog
+        self.predictor = predictor
+        self.store = store or koi_catalog.store
+        self.chunk_size = chunk_size
+        self.table = None
+        self.meta = None
+        self._lock = threading.Lock()
+
+    @property
+    def model_file(self):
+        return self.predictor.model_path / "model.pkl"
+
+    def _labels(self):
+        """Class labels in predict_proba column order"""
+        return [self.predictor.inv_label_map[code] for code in range(len(self.predictor.inv_label_map))]
+
+    @staticmethod
+    def probability_field(label):
+        """Column name for a class probability ("FALSE POSITIVE" -> "prob_false_positive")"""
+        return 'prob_' + re.sub(r'\W+', '_', label.strip().lower())
+
+    def current_sources(self):
+        """Hashes of the model and KOI data the scores must match
+
+        A model file or CSV that changed since it was loaded is loaded
+        again first, so the hashes always name what gets scored.
+        """
+        self.koi_catalog.load(recheck=True)
+        if file_sha256(self.model_file) != self.predictor.model_sha256:
+            print("Model file changed, reloading the model...")
+            self.predictor.load_model_and_metadata()
+        return {
+            'model_sha256': self.predictor.model_sha256,
+            'csv_sha256': self.koi_catalog.source_sha256
+        }
+
+    def ensure_scored(self, recheck=False):
+        """Load persisted scores, re-scoring first if the model or CSV changed
+
+        Once loaded, the file hashes are only compared again with `recheck`.
+        """
+        with self._lock:
+            if self.table is not None and not recheck:
+                return self.table
+            sources = self.current_sources()
+            if self.table is not None and self._matches(self.meta, sources):
+                return self.table
+
+            meta = self.store.metadata('koi_scores')
+            if not self._matches(meta, sources):
+                print("Scoring KOI table...")
+                table = self.score_all()
+                meta = dict(sources, features=list(self.predictor.features), labels=self._labels())
+                self.store.save('koi_scores', table, meta=meta)
+
+            self._open(self.store.load('koi_scores'), meta)
+            return self.table
+
+    @staticmethod
+    def _matches(meta, sources):
+        return bool(meta) and all(meta.get(key) == value for key, value in sources.items())
+
+    def _open(self, table, meta):
+        self.index = {name.casefold(): row for row, name in enumerate(table.column('kepoi_name').tolist())}
+        self.meta = meta
+        self.table = table
+
+    def score_all(self):
+        """Score every KOI and return the results as a ColumnarTable"""
+        kois = self.koi_catalog.load()
+        features = np.column_stack([
+            kois.column(name).astype(np.float64) for name in self.predictor.features
+        ])
+        scored = ~np.isnan(features).any(axis=1)
+        labels = self._labels()
+
+        probabilities = np.full((len(kois), len(labels)), np.nan)
+        rows = np.flatnonzero(scored)
+        for start in range(0, len(rows), self.chunk_size):
+            chunk = rows[start:start + self.chunk_size]
+            probabilities[chunk] = self.predictor.model.predict_proba(features[chunk])
+
+        codes = np.zeros(len(kois), dtype=np.int32)
+        codes[scored] = np.argmax(probabilities[scored], axis=1)
+        confidence = np.full(len(kois), np.nan)
+        confidence[scored] = probabilities[scored].max(axis=1)
+
+        columns = {
+            'kepoi_name': np.array(kois.column('kepoi_name')),
+            'prediction': np.where(scored, np.array(labels, dtype=str)[codes], ''),
+            'prediction_code': codes,
+            'confidence': confidence
+        }
+        schema = [('kepoi_name', STR), ('prediction', STR), ('prediction_code', INT), ('confidence', FLOAT)]
+        for i, label in enumerate(labels):
+            field = self.probability_field(label)
+            columns[field] = probabilities[:, i]
+            schema.append((field, FLOAT))
+
+        return ColumnarTable(schema, columns, masks={'prediction_code': scored})
+
+    def get_score(self, identifier):
+        """Cached score of one KOI by KOI name or Kepler name, or None"""
+        table = self.ensure_scored()
+        row = self.index.get(identifier.strip().casefold())
+        if row is None:
+            koi_row = self.koi_catalog.find(identifier)
+            if koi_row is None:
+                return None
+            kepoi_name = self.koi_catalog.table.column('kepoi_name')[koi_row]
+            row = self.index.get(kepoi_name.casefold())
+            if row is None:
+                return None
+
+        score = table.row(row)
+        score['probabilities'] = {
+            label: score.pop(self.probability_field(label)) for label in self.meta['labels']
+        }
+        score['scored'] = score['prediction'] is not None
+        return score
+
+    def get_info(self):
+        """Summary of the persisted scores"""
+        table = self.ensure_scored()
+        scored = table.present('prediction_code')
+        predictions = table.column('prediction')[scored]
+        labels, counts = np.unique(predictions, return_counts=True)
+        return {
+            'koi_count': len(table),
+            'scored': int(np.count_nonzero(scored)),
+            'predictions': dict(zip(labels.tolist(), counts.tolist())),
+            'model_sha256': self.meta['model_sha256'],
+            'csv_sha256': self.meta['csv_sha256']
+        }
+
+if __name__ == '__main__':
+    import json
+    from services.prediction_service import ExoplanetPredictor
+    scorer = KOIScorer(KOICatalog(), ExoplanetPredictor())
+    print(json.dumps(scorer.get_info(), indent=2))
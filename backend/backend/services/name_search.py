@@ -0,0 +1,146 @@
+import re
+import numpy as np
+
+def normalize_name(name):
+    """Case-folded name with whitespace collapsed"""
+    return ' '.join(name.casefold().split())
+
+def compact_name(name):
+    """Normalized name with spaces and punctuation removed ("Kepler-22 b" -> "kepler22b")"""
+    return re.sub(r'[\W_]+', '', normalize_name(name))
+
+def trigrams(key):
+    """Set of character trigrams of a key, padded so word starts weigh more"""
+    padded = f"  {key} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+class NameSearchIndex:
+    """Autocomplete index over names: sorted-array prefix search plus trigram fuzzy matching
+
+    Every name is stored under its normalized and compact forms in one
+    sorted NumPy array, so a prefix lookup is two binary searches. Typos
+    are handled by a trigram inverted index scored with the Dice
+    coefficient, which is only consulted when prefixes do not fill the
+    result list.
+    """
+
+    def __init__(self, names, kinds, min_score=0.35):
+        self.names = list(names)
+        self.kinds = np.array(kinds)
+        self.min_score = min_score
+        self.lengths = np.array([len(name) for name in self.names], dtype=np.int32)
+
+        # Rank of every entry when ordered shortest first, then alphabetically
+        normalized = np.array([normalize_name(name) for name in self.names], dtype=str)
+        self.by_rank = np.lexsort((normalized, self.lengths)).astype(np.intp)
+        self.rank = np.empty(len(self.names), dtype=np.intp)
+        self.rank[self.by_rank] = np.arange(len(self.names))
+
+        keys = []
+        key_ids = []
+        postings = {}
+        gram_counts = np.zeros(len(self.names), dtype=np.int32)
+        for entry, name in enumerate(self.names):
+            key = normalize_name(name)
+            for variant in {key, compact_name(name)}:
+                keys.append(variant)
+                key_ids.append(entry)
+            grams = trigrams(key)
+            gram_counts[entry] = len(grams)
+            for gram in grams:
+                postings.setdefault(gram, []).append(entry)
+
+        keys = np.array(keys, dtype=str)
+        order = np.argsort(keys, kind='stable')
+        self.keys = keys[order]
+        self.key_ids = np.array(key_ids, dtype=np.intp)[order]
+        self.postings = {gram: np.array(ids, dtype=np.intp) for gram, ids in postings.items()}
+        self.gram_counts = gram_counts
+
+    def __len__(self):
+        return len(self.names)
+
+    def _lookup(self, query, allowed, prefix, limit=None):
+        """Entries whose normalized or compact name equals (or starts with) the query
+
+        Entries come back shortest first, then alphabetically, and at most
+        `limit` of them are returned.
+        """
+        candidates = []
+        for key in {normalize_name(query), compact_name(query)}:
+            if not key:
+                continue
+            low = np.searchsorted(self.keys, key, side='left')
+            if prefix:
+                high = np.searchsorted(self.keys, key + '\U0010ffff', side='left')
+            else:
+                high = np.searchsorted(self.keys, key, side='right')
+            candidates.append(self.key_ids[low:high])
+        if not candidates:
+            return np.empty(0, dtype=np.intp)
+
+        entries = np.concatenate(candidates)
+        if allowed is not None:
+            entries = entries[allowed[entries]]
+        ranks = self.rank[entries]
+        # Each entry appears at most twice, so 2 * limit ranks cover the top `limit`
+        if limit is not None and len(ranks) > 2 * limit:
+            ranks = np.partition(ranks, 2 * limit)[:2 * limit]
+        ranks = np.sort(ranks)
+        ranks = ranks[np.concatenate(([True], ranks[1:] != ranks[:-1]))] if len(ranks) else ranks
+        return self.by_rank[ranks[:limit]]
+
+    def exact(self, query, allowed=None):
+        """Entries whose name matches the query exactly, ignoring case and punctuation"""
+        return self._lookup(query, allowed, prefix=False)
+
+    def prefix(self, query, allowed=None, limit=None):
+        """Entries whose normalized or compact name starts with the query, shortest first"""
+        return self._lookup(query, allowed, prefix=True, limit=limit)
+
+    def fuzzy(self, query, allowed=None, limit=None):
+        """Up to `limit` (entries, scores) sharing enough trigrams with the query, best first"""
+        grams = trigrams(normalize_name(query))
+        lists = [self.postings[gram] for gram in grams if gram in self.postings]
+        if not lists:
+            return np.empty(0, dtype=np.intp), np.empty(0)
+
+        shared = np.bincount(np.concatenate(lists), minlength=len(self.names))
+        entries = np.flatnonzero(shared)
+        if allowed is not None:
+            entries = entries[allowed[entries]]
+        scores = 2.0 * shared[entries] / (len(grams) + self.gram_counts[entries])
+        keep = scores >= self.min_score
+        entries, scores = entries[keep], scores[keep]
+        if limit is not None and len(scores) > limit:
+            # Only rank entries scoring at least the limit-th best score
+            threshold = np.partition(scores, len(scores) - limit)[len(scores) - limit]
+            best = scores >= threshold
+            entries, scores = entries[best], scores[best]
+        order = np.lexsort((self.rank[entries], -scores))
+        return entries[order][:limit], scores[order][:limit]
+
+    def search(self, query, limit=10, kinds=None):
+        """Top matches as (entry, match, score): exact, then prefix, then fuzzy"""
+        if not normalize_name(query):
+            return []
+        allowed = np.isin(self.kinds, list(kinds)) if kinds else None
+
+        results = []
+        seen = set()
+        exact = self.exact(query, allowed).tolist()
+        prefix = self.prefix(query, allowed, limit + len(exact)).tolist()
+        for entry, match in [(e, 'exact') for e in exact] + [(e, 'prefix') for e in prefix]:
+            if entry not in seen and len(results) < limit:
+                results.append((entry, match, 1.0))
+                seen.add(entry)
+
+        if len(results) < limit:
+            entries, scores = self.fuzzy(query, allowed, limit + len(seen))
+            for entry, score in zip(entries.tolist(), scores.tolist()):
+                if entry in seen:
+                    continue
+                results.append((entry, 'fuzzy', round(score, 3)))
+                if len(results) >= limit:
+                    break
+        return results
@@ -1,19 +1,85 @@
-import requests
 import pandas as pd
 import numpy as np
 from datetime import datetime
 import json
 import os
+from services.columnar import ColumnarTable, FLOAT, INT, STR, CATEGORY
+from services.catalog_store import open_store
+from services.host_stars import build_star_table, update_star_table
+from services.tap_client import TAPClient, TAPNotModified
+
+PLANET_SCHEMA = [
+    ('name', STR),
+    ('host_star', STR),
+    ('orbital_period', FLOAT),
+    ('radius', FLOAT),
+    ('mass', FLOAT),
+    ('equilibrium_temp', FLOAT),
+    ('discovery_year', INT),
+    ('discovery_method', CATEGORY),
+    ('ra', FLOAT),
+    ('dec', FLOAT),
+    ('distance', FLOAT),
+    ('star_temperature', FLOAT),
+    ('star_magnitude', FLOAT),
+    ('star_spectral_type', CATEGORY),
+    ('star_mass', FLOAT),
+    ('semi_major_axis', FLOAT),
+    ('eccentricity', FLOAT),
+    ('inclination', FLOAT),
+    ('periastron_arg', FLOAT),
+    ('transit_midpoint', FLOAT)
+]
+
+# Columns requested from the TAP `ps` table
+PLANET_COLUMNS = [
+    'pl_name', 'hostname', 'pl_orbper', 'pl_rade', 'pl_masse',
+    'pl_eqt', 'disc_year', 'discoverymethod', 'ra', 'dec', 'sy_dist',
+    'st_teff', 'sy_vmag', 'st_spectype', 'st_mass',
+    'pl_orbsmax', 'pl_orbeccen', 'pl_orbincl', 'pl_orblper', 'pl_tranmid'
+]
+
+def process_planet_rows(rows):
+    """Map raw TAP `ps` rows onto catalog records, skipping unnamed planets"""
+    processed_data = []
+    for planet in rows:
+        if planet.get('pl_name') and planet.get('hostname'):
+            processed_planet = {
+                'name': planet['pl_name'],
+                'host_star': planet['hostname'],
+                'orbital_period': planet.get('pl_orbper'),
+                'radius': planet.get('pl_rade'),
+                'mass': planet.get('pl_masse'),
+                'equilibrium_temp': planet.get('pl_eqt'),
+                'discovery_year': planet.get('disc_year'),
+                'discovery_method': planet.get('discoverymethod') or 'Unknown',
+                'ra': planet.get('ra'),
+                'dec': planet.get('dec'),
+                'distance': planet.get('sy_dist'),
+                'star_temperature': planet.get('st_teff'),
+                'star_magnitude': planet.get('sy_vmag'),
+                'star_spectral_type': planet.get('st_spectype') or None,
+                'star_mass': planet.get('st_mass'),
+                'semi_major_axis': planet.get('pl_orbsmax'),
+                'eccentricity': planet.get('pl_orbeccen'),
+                'inclination': planet.get('pl_orbincl'),
+                'periastron_arg': planet.get('pl_orblper'),
+                'transit_midpoint': planet.get('pl_tranmid')
+            }
+            processed_data.append(processed_planet)
+    return processed_data
 
 class NASAExoplanetAPI:
     """Service for fetching and processing NASA exoplanet data"""
     
     def __init__(self):
         self.base_url = "https://exoplanetarchive.ipac.caltech.edu/TAP/sync"
+        # Legacy JSON cache, only read once to seed the binary store
         self.cache_file = "data/exoplanets_cache.json"
-        self.stars_cache_file = "data/stars_cache.json"
-        self.exoplanets_data = []
-        self.stars_data = []
+        self.store = open_store("data/catalog")
+        self.tap_client = TAPClient(self.base_url)
+        self.exoplanets_table = None
+        self.stars_table = None
     
     def initialize_data(self):
         """Initialize exoplanet and star data"""
@@ -21,74 +87,91 @@ class NASAExoplanetAPI:
         self.load_stars()
     
     def load_exoplanets(self):
-        """Load exoplanet data from NASA API or cache"""
-        if os.path.exists(self.cache_file):
+        """Load exoplanet data from the binary cache or NASA API"""
+        if self.store.exists('exoplanets'):
             print("Loading exoplanet data from cache...")
+            self.exoplanets_table = self.store.load('exoplanets')
+            if self.exoplanets_table.field_names != [name for name, _ in PLANET_SCHEMA]:
+                print("Upgrading exoplanet cache to the current schema...")
+                self.save_exoplanets(self.exoplanets_table.rows())
+        elif os.path.exists(self.cache_file):
+            print("Converting JSON exoplanet cache to binary format...")
             with open(self.cache_file, 'r') as f:
-                self.exoplanets_data = json.load(f)
+                self.save_exoplanets(json.load(f))
         else:
             print("Fetching exoplanet data from NASA API...")
             self.fetch_exoplanet_data()
     
     def load_stars(self):
-        """Load star data from cache or generate sample data"""
-        if os.path.exists(self.stars_cache_file):
-            with open(self.stars_cache_file, 'r') as f:
-                self.stars_data = json.load(f)
+        """Load the host star table, rebuilding it if it does not match the planets"""
+        meta = self.store.metadata('stars')
+        if meta and meta.get('planets') == self.store.current('exoplanets'):
+            self.stars_table = self.store.load('stars')
         else:
-            print("Generating sample star data...")
-            self.generate_sample_stars()
+            print("Building host star table from the planet catalog...")
+            self.save_stars()
+    
+    def save_exoplanets(self, records, changed_hosts=None):
+        """Write exoplanet records to the binary cache and reopen them memory-mapped
+
+        The host star table follows; with `changed_hosts`, only the rows of
+        those stars are rebuilt.
+        """
+        self.save_exoplanet_table(ColumnarTable.from_records(records, PLANET_SCHEMA), changed_hosts)
+
+    def save_exoplanet_table(self, table, changed_hosts=None):
+        """Like save_exoplanets, for a planet table that is already columnar"""
+        previous = self.store.current('exoplanets')
+        self.store.save('exoplanets', table)
+        self.exoplanets_table = self.store.load('exoplanets')
+        self.save_stars(changed_hosts, previous)
+    
+    def save_stars(self, changed_hosts=None, previous_planets=None):
+        """Derive the host star table from the planets and write it to the binary cache
+
+        An incremental update is only done when the stored star table was
+        built from `previous_planets`; otherwise every star is rebuilt.
+        """
+        meta = self.store.metadata('stars')
+        if changed_hosts is not None and meta and previous_planets and meta.get('planets') == previous_planets:
+            stars = update_star_table(self.store.load('stars'), self.exoplanets_table, changed_hosts)
+        else:
+            stars = build_star_table(self.exoplanets_table)
+        self.store.save('stars', stars, meta={'planets': self.store.current('exoplanets')})
+        self.stars_table = self.store.load('stars')
+    
+    def export_json(self, exoplanets_path, stars_path=None):
+        """Export the cached tables as JSON files"""
+        with open(exoplanets_path, 'w') as f:
+            json.dump(self.exoplanets_table.rows(), f, indent=2)
+        if stars_path:
+            with open(stars_path, 'w') as f:
+                json.dump(self.stars_table.rows(), f, indent=2)
     
     def fetch_exoplanet_data(self):
         """Fetch exoplanet data from NASA Exoplanet Archive"""
+        has_cache = self.store.exists('exoplanets')
         try:
-            # Query for confirmed exoplanets
-            query = """
-            SELECT pl_name, hostname, pl_orbper, pl_rade, pl_masse, 
-                   pl_eqt, disc_year, discoverymethod, ra, dec, sy_dist
-            FROM ps 
-            WHERE default_flag = 1 
-            ORDER BY disc_year DESC
-            """
-            
-            params = {
-                'query': query,
-                'format': 'json'
-            }
-            
-            response = requests.get(self.base_url, params=params, timeout=30)
-            response.raise_for_status()
-            
-            data = response.json()
-            
-            processed_data = []
-            for planet in data:
-                if planet.get('pl_name') and planet.get('hostname'):
-                    processed_planet = {
-                        'name': planet['pl_name'],
-                        'host_star': planet['hostname'],
-                        'orbital_period': planet.get('pl_orbper'),
-                        'radius': planet.get('pl_rade'),
-                        'mass': planet.get('pl_masse'),
-                        'equilibrium_temp': planet.get('pl_eqt'),
-                        'discovery_year': planet.get('disc_year'),
-                        'discovery_method': planet.get('discoverymethod', 'Unknown'),
-                        'ra': planet.get('ra'),
-                        'dec': planet.get('dec'),
-                        'distance': planet.get('sy_dist')
-                    }
-                    processed_data.append(processed_planet)
-            
-            self.exoplanets_data = processed_data
+            # Query for confirmed exoplanets, streamed in pages
+            rows = self.tap_client.iter_rows(
+                PLANET_COLUMNS, 'ps', 'default_flag = 1', key='pl_name', conditional=has_cache
+            )
+            processed_data = process_planet_rows(rows)
+            processed_data.sort(key=lambda p: -(p.get('discovery_year') or 0))
             
-            with open(self.cache_file, 'w') as f:
-                json.dump(self.exoplanets_data, f, indent=2)
+            self.save_exoplanets(processed_data)
             
-            print(f"Fetched {len(self.exoplanets_data)} exoplanets")
+            print(f"Fetched {len(processed_data)} exoplanets")
             
+        except TAPNotModified:
+            print("NASA exoplanet data unchanged, keeping cache")
+            self.exoplanets_table = self.store.load('exoplanets')
         except Exception as e:
             print(f"Error fetching NASA data: {e}")
-            self.generate_sample_exoplanets()
+            if has_cache:
+                self.exoplanets_table = self.store.load('exoplanets')
+            else:
+                self.generate_sample_exoplanets()
     
     def generate_sample_exoplanets(self):
         """Generate sample exoplanet data for demonstration"""
@@ -113,58 +196,4 @@ class NASAExoplanetAPI:
             }
             sample_planets.append(planet)
         
-        self.exoplanets_data = sample_planets
-        
-        with open(self.cache_file, 'w') as f:
-            json.dump(self.exoplanets_data, f, indent=2)
-    
-    def generate_sample_stars(self):
-        """Generate sample star data for the star map"""
-        print("Generating sample star data...")
-        
-        sample_stars = []
-        star_types = ['G', 'K', 'M', 'F', 'A']
-        
-        for i in range(500):
-            has_planets = np.random.random() < 0.3 
-            
-            star = {
-                'name': f'HD {i+1000}',
-                'ra': np.random.uniform(0, 360),
-                'dec': np.random.uniform(-90, 90),
-                'distance': np.random.uniform(1, 100),
-                'magnitude': np.random.uniform(-1, 12),
-                'spectral_type': np.random.choice(star_types),
-                'temperature': np.random.uniform(3000, 8000),
-                'has_planets': has_planets,
-                'planet_count': np.random.randint(1, 8) if has_planets else 0
-            }
-            sample_stars.append(star)
-        
-        self.stars_data = sample_stars
-        
-        with open(self.stars_cache_file, 'w') as f:
-            json.dump(self.stars_data, f, indent=2)
-    
-    def get_exoplanets(self, limit=100):
-        """Get exoplanet data with optional limit"""
-        return self.exoplanets_data[:limit]
-    
-    def get_star_info(self, star_name):
-        """Get information about a specific star"""
-        star = next((s for s in self.stars_data if s['name'].lower() == star_name.lower()), None)
-        
-        if not star:
-            return {'error': 'Star not found'}
-        
-        planets = [p for p in self.exoplanets_data if p['host_star'].lower() == star_name.lower()]
-        
-        return {
-            'star': star,
-            'planets': planets
-        }
-    
-    def get_nearby_stars(self, distance_limit):
-        """Get stars within a certain distance"""
-        nearby = [s for s in self.stars_data if s['distance'] <= distance_limit]
-        return sorted(nearby, key=lambda x: x['distance'])
\ No newline at end of file
+        self.save_exoplanets(sample_planets)
@@ -0,0 +1,150 @@
+import numpy as np
+
+DAYS_PER_YEAR = 365.25
+
+# Bound orbits only; archive eccentricities at or above this are clipped
+MAX_ECCENTRICITY = 0.99
+
+# Upper bound on time steps per orbit served to the viewer
+MAX_ORBIT_POINTS = 2000
+
+def semi_major_axis_au(period_days, star_mass=1.0):
+    """Semi-major axis in AU from Kepler's third law (a³ = M P², M in solar masses, P in years)"""
+    period_years = np.asarray(period_days, dtype=np.float64) / DAYS_PER_YEAR
+    return np.cbrt(np.asarray(star_mass, dtype=np.float64) * period_years ** 2)
+
+def solve_kepler(mean_anomaly, eccentricity, tolerance=1e-12, max_iterations=50):
+    """Eccentric anomaly E with E - e sin E = M, by Newton iterations over whole arrays
+
+    `mean_anomaly` and `eccentricity` broadcast against each other, so one
+    call solves every planet at every time step. Each iteration only
+    touches the elements that have not converged yet.
+    """
+    shape = np.broadcast(mean_anomaly, eccentricity).shape
+    mean_anomaly = np.broadcast_to(np.asarray(mean_anomaly, dtype=np.float64), shape).ravel()
+    eccentricity = np.broadcast_to(np.asarray(eccentricity, dtype=np.float64), shape).ravel()
+
+    # Third-order series start; pi converges for every M on very eccentric orbits
+    sin_m = np.sin(mean_anomaly)
+    anomaly = mean_anomaly + eccentricity * sin_m * (1 + eccentricity * np.cos(mean_anomaly))
+    anomaly = np.where(eccentricity < 0.8, anomaly, np.pi)
+
+    active = np.arange(anomaly.size)
+    for _ in range(max_iterations):
+        current = anomaly[active]
+        e = eccentricity[active]
+        step = (current - e * np.sin(current) - mean_anomaly[active]) / (1 - e * np.cos(current))
+        anomaly[active] = current - step
+        # NaN steps (no period) compare False and drop out too
+        active = active[np.abs(step) > tolerance]
+        if not active.size:
+            break
+    return anomaly.reshape(shape)
+
+class KeplerOrbits:
+    """Two-body Keplerian orbits of many planets, evaluated together with NumPy
+
+    Elements are arrays with one entry per planet: period (days),
+    eccentricity, inclination and argument of periastron (degrees),
+    semi-major axis (AU) and the time of periastron passage (days, e.g.
+    BJD). Positions are in AU in the frame the archive's elements refer
+    to: x and y in the plane of the sky, z towards the observer, so
+    i = 90° is an edge-on orbit. The longitude of the ascending node is
+    not in the archive and is taken as 0.
+
+    Unknown elements fall back to a circular, face-on orbit around a
+    one solar mass star with periastron at time 0.
+    """
+
+    def __init__(self, period, eccentricity=None, inclination=None, periastron_arg=None,
+                 semi_major_axis=None, star_mass=None, periastron_time=None):
+        self.period = np.asarray(period, dtype=np.float64)
+        n = self.period.shape
+
+        def element(values, default):
+            if values is None:
+                return np.full(n, default, dtype=np.float64)
+            values = np.asarray(values, dtype=np.float64)
+            return np.where(np.isnan(values), default, values)
+
+        self.eccentricity = np.clip(element(eccentricity, 0.0), 0.0, MAX_ECCENTRICITY)
+        self.inclination = element(inclination, 0.0)
+        self.periastron_arg = element(periastron_arg, 0.0)
+        self.star_mass = element(star_mass, 1.0)
+        self.semi_major_axis = element(semi_major_axis, np.nan)
+        derived = np.isnan(self.semi_major_axis)
+        self.semi_major_axis[derived] = semi_major_axis_au(self.period[derived], self.star_mass[derived])
+        self.periastron_time = element(periastron_time, 0.0)
+
+    @classmethod
+    def from_planets(cls, planets, rows):
+        """Orbits of catalog planets, timed from their transits when the archive has one"""
+        rows = np.asarray(rows, dtype=np.intp)
+        elements = {
+            name: planets.column(name)[rows] for name in (
+                'orbital_period', 'eccentricity', 'inclination', 'periastron_arg',
+                'semi_major_axis', 'star_mass', 'transit_midpoint'
+            )
+        }
+        period = elements['orbital_period']
+        eccentricity = np.clip(np.nan_to_num(elements['eccentricity']), 0.0, MAX_ECCENTRICITY)
+        periastron_arg = np.nan_to_num(elements['periastron_arg'])
+        periastron_time = KeplerOrbits.periastron_from_transit(
+            elements['transit_midpoint'], period, eccentricity, periastron_arg
+        )
+        return cls(
+            period, eccentricity, elements['inclination'], periastron_arg,
+            elements['semi_major_axis'], elements['star_mass'], periastron_time
+        )
+
+    @staticmethod
+    def periastron_from_transit(transit_time, period, eccentricity, periastron_arg):
+        """Time of periastron from a transit mid-time (NaN where there is no transit)
+
+        A transit happens when the planet crosses the line of sight in
+        front of the star, at true anomaly 90° - ω.
+        """
+        anomaly = np.radians(90.0 - np.asarray(periastron_arg, dtype=np.float64))
+        eccentric = 2 * np.arctan2(
+            np.sqrt(1 - eccentricity) * np.sin(anomaly / 2),
+            np.sqrt(1 + eccentricity) * np.cos(anomaly / 2)
+        )
+        mean = eccentric - eccentricity * np.sin(eccentric)
+        return np.asarray(transit_time, dtype=np.float64) - period * mean / (2 * np.pi)
+
+    def positions(self, times):
+        """Positions in AU at the given times (days), shaped (planets, times, 3)
+
+        `times` is either one array shared by all planets or one row of
+        times per planet. Planets without a period get NaN positions.
+        """
+        times = np.asarray(times, dtype=np.float64)
+        if times.ndim < 2:
+            times = np.broadcast_to(times, self.period.shape + np.shape(times))
+
+        # One row per planet, broadcast against the time axis
+        phase = (times - self.periastron_time[:, None]) / self.period[:, None]
+        mean_anomaly = 2 * np.pi * np.mod(phase, 1.0)
+        eccentricity = self.eccentricity[:, None]
+        eccentric = solve_kepler(mean_anomaly, eccentricity)
+
+        # Position in the orbital plane, periastron along +x
+        a = self.semi_major_axis[:, None]
+        in_plane_x = a * (np.cos(eccentric) - eccentricity)
+        in_plane_y = a * np.sqrt(1 - eccentricity ** 2) * np.sin(eccentric)
+
+        # Rotate by the argument of periastron, then tilt by the inclination
+        omega = np.radians(self.periastron_arg[:, None])
+        inclination = np.radians(self.inclination[:, None])
+        along_node = in_plane_x * np.cos(omega) - in_plane_y * np.sin(omega)
+        across_node = in_plane_x * np.sin(omega) + in_plane_y * np.cos(omega)
+        return np.stack([
+            along_node,
+            across_node * np.cos(inclination),
+            across_node * np.sin(inclination)
+        ], axis=-1)
+
+    def orbit_times(self, points, start=None):
+        """`points` evenly spaced times over one period of each planet, shaped (planets, points)"""
+        start = self.periastron_time if start is None else np.broadcast_to(start, self.period.shape)
+        return start[:, None] + self.period[:, None] * np.linspace(0, 1, points)
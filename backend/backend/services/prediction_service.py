@@ -1,3 +1,5 @@
+import hashlib
+import io
 import joblib
 import json
 import pandas as pd
@@ -15,6 +17,7 @@ class ExoplanetPredictor:
             
         self.model_path = model_path
         self.model = None
+        self.model_sha256 = None
         self.features = None
         self.label_map = None
         self.inv_label_map = None
@@ -29,7 +32,12 @@ class ExoplanetPredictor:
             if not model_file.exists():
                 raise FileNotFoundError(f"Model file not found at {model_file}")
             
-            self.model = joblib.load(model_file)
+            # Hash the bytes that are loaded, so a file replaced meanwhile
+            # cannot be recorded as the model in use
+            with open(model_file, 'rb') as f:
+                model_bytes = f.read()
+            self.model = joblib.load(io.BytesIO(model_bytes))
+            self.model_sha256 = hashlib.sha256(model_bytes).hexdigest()
             
             # Load feature list
             feature_file = self.model_path / "feature_list.json"
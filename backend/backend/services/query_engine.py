@@ -0,0 +1,194 @@
+import numpy as np
+import base64
+import hashlib
+import json
+from services.columnar import FLOAT, INT, BOOL, STR, CATEGORY
+
+# Query-string parameters that are not column filters
+RESERVED_PARAMS = {'limit', 'offset', 'cursor', 'sort', 'fields', 'format'}
+
+class QueryError(ValueError):
+    """Invalid query parameters"""
+
+class TableQuery:
+    """Vectorized filter, sort, pagination and projection over a ColumnarTable
+
+    Filters are `<field>=value` for equality (comma-separated values match
+    any of them) and `<field>_min` / `<field>_max` for inclusive ranges on
+    numeric fields. `sort` takes comma-separated fields, each optionally
+    prefixed with `-` for descending; missing values always sort last.
+    """
+
+    def __init__(self, table, equals=None, ranges=None, sort=None, offset=0, limit=100, fields=None):
+        self.table = table
+        self.equals = equals or {}
+        self.ranges = ranges or {}
+        self.sort = sort or []
+        self.offset = offset
+        self.limit = limit
+        self.fields = fields
+
+    @classmethod
+    def from_args(cls, table, args, default_limit=100, max_limit=None):
+        """Build a query from request arguments"""
+        equals = {}
+        ranges = {}
+
+        for name, value in args.items():
+            if name in RESERVED_PARAMS or name.startswith('_'):
+                continue
+            base, _, bound = name.rpartition('_')
+            if bound in ('min', 'max') and base in table.kinds:
+                if table.kinds[base] not in (FLOAT, INT):
+                    raise QueryError(f"Range filter on non-numeric field '{base}'")
+                low, high = ranges.get(base, (None, None))
+                try:
+                    number = float(value)
+                except ValueError:
+                    raise QueryError(f"'{name}' must be a number")
+                ranges[base] = (number, high) if bound == 'min' else (low, number)
+            elif name in table.kinds:
+                equals[name] = value
+            else:
+                raise QueryError(f"Unknown query parameter '{name}'")
+
+        sort = []
+        for key in filter(None, args.get('sort', '').split(',')):
+            descending = key.startswith('-')
+            field = key.lstrip('-+')
+            if field not in table.kinds:
+                raise QueryError(f"Cannot sort by unknown field '{field}'")
+            sort.append((field, descending))
+
+        fields = None
+        if args.get('fields'):
+            fields = [f for f in args['fields'].split(',') if f]
+            unknown = [f for f in fields if f not in table.kinds]
+            if unknown:
+                raise QueryError(f"Unknown fields: {unknown}")
+
+        try:
+            limit = args.get('limit', default_limit)
+            limit = int(limit) if limit is not None else None
+            offset = int(args.get('offset', 0))
+        except ValueError:
+            raise QueryError("'limit' and 'offset' must be integers")
+        if (limit is not None and limit < 0) or offset < 0:
+            raise QueryError("'limit' and 'offset' must not be negative")
+        if max_limit is not None:
+            limit = max_limit if limit is None else min(limit, max_limit)
+
+        query = cls(table, equals, ranges, sort, offset, limit, fields)
+        if args.get('cursor'):
+            query.offset = query.decode_cursor(args['cursor'])
+        return query
+
+    def normalized_key(self):
+        """Stable description of the filters and sort, independent of paging"""
+        return json.dumps({
+            'equals': sorted(self.equals.items()),
+            'ranges': sorted(self.ranges.items()),
+            'sort': self.sort,
+            'fields': self.fields
+        }, sort_keys=True)
+
+    def _query_hash(self):
+        return hashlib.sha1(self.normalized_key().encode('utf-8')).hexdigest()[:12]
+
+    def encode_cursor(self, offset):
+        """Opaque cursor pointing at a row offset of this query"""
+        payload = json.dumps({'o': offset, 'q': self._query_hash()}).encode('utf-8')
+        return base64.urlsafe_b64encode(payload).decode('ascii').rstrip('=')
+
+    def decode_cursor(self, cursor):
+        """Offset stored in a cursor produced by encode_cursor for the same query"""
+        try:
+            padded = cursor + '=' * (-len(cursor) % 4)
+            payload = json.loads(base64.urlsafe_b64decode(padded.encode('ascii')))
+            offset = int(payload['o'])
+        except (ValueError, KeyError, TypeError):
+            raise QueryError("Invalid cursor")
+        if payload.get('q') != self._query_hash():
+            raise QueryError("Cursor does not belong to this query")
+        return offset
+
+    def _equals_mask(self, field, value):
+        kind = self.table.kinds[field]
+        column = self.table.column(field)
+
+        if kind == CATEGORY:
+            wanted = {v.strip().casefold() for v in value.split(',')}
+            codes = [code for code, label in enumerate(self.table.categories[field])
+                     if label.casefold() in wanted]
+            return np.isin(column, codes)
+        if kind == STR:
+            wanted = [v.strip().lower() for v in value.split(',')]
+            return np.isin(np.char.lower(column), wanted)
+        if kind == BOOL:
+            return column == (value.lower() in ('1', 'true', 'yes'))
+        try:
+            numbers = [float(v) for v in value.split(',')]
+        except ValueError:
+            raise QueryError(f"'{field}' must be a number or comma-separated numbers")
+        return np.isin(column, numbers) & self.table.present(field)
+
+    def mask(self):
+        """Boolean mask of rows matching every filter"""
+        mask = np.ones(len(self.table), dtype=bool)
+        for field, value in self.equals.items():
+            mask &= self._equals_mask(field, value)
+        for field, (low, high) in self.ranges.items():
+            column = self.table.column(field)
+            present = self.table.present(field)
+            if low is not None:
+                mask &= present & (column >= low)
+            if high is not None:
+                mask &= present & (column <= high)
+        return mask
+
+    def _sort_keys(self, field, descending, rows):
+        """(missing flag, value) sort keys for one field over the given rows"""
+        kind = self.table.kinds[field]
+        values = self.table.column(field)[rows]
+        missing = ~self.table.present(field)[rows]
+
+        if kind == STR:
+            values = np.unique(values, return_inverse=True)[1]
+        elif kind == FLOAT:
+            values = np.where(missing, 0.0, values)
+        else:
+            values = values.astype(np.int64)
+
+        if descending:
+            values = -values
+        return missing, values
+
+    def order(self, rows):
+        """Row indexes sorted by the requested keys (stable)"""
+        if not self.sort or not len(rows):
+            return rows
+        keys = []
+        for field, descending in self.sort:
+            keys.extend(self._sort_keys(field, descending, rows))
+        # np.lexsort treats the last key as primary
+        return rows[np.lexsort(keys[::-1])]
+
+    def select(self):
+        """Matching row indexes in result order, plus the total before paging"""
+        rows = self.order(np.flatnonzero(self.mask()))
+        end = None if self.limit is None else self.offset + self.limit
+        return rows[self.offset:end], len(rows)
+
+    def execute(self):
+        """Run the query and return the page of rows with paging metadata"""
+        page, total = self.select()
+        next_offset = self.offset + len(page)
+
+        return {
+            'total': total,
+            'offset': self.offset,
+            'limit': self.limit,
+            'next_cursor': self.encode_cursor(next_offset) if next_offset < total else None,
+            'rows': page,
+            'results': self.table.rows(page, fields=self.fields)
+        }
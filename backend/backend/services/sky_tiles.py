@@ -0,0 +1,205 @@
+import json
+import threading
+import numpy as np
+from collections import OrderedDict
+
+# Depth of the quad-tree; level L splits the sky into 4**L equal-area tiles
+MAX_LEVEL = 10
+
+# From this level on, tiles list individual stars instead of counts
+DETAIL_LEVEL = 4
+
+# Coarse tiles report counts for their sub-tiles this many levels down
+CELL_DEPTH = 2
+
+# Brightest stars listed per detail tile
+MAX_TILE_STARS = 200
+
+def tile_coordinates(ra, dec, level):
+    """Tile x (along RA) and y (along sin Dec) of sky positions at a level
+
+    Tiles are equal steps in RA and in sin(Dec), i.e. a regular grid on the
+    Lambert cylindrical equal-area projection, so every tile of a level
+    covers the same solid angle and each splits into four at the next.
+    """
+    n = 1 << level
+    x = np.floor(np.mod(ra, 360.0) / 360.0 * n).astype(np.int64)
+    y = np.floor((np.sin(np.radians(dec)) + 1) / 2 * n).astype(np.int64)
+    return np.clip(x, 0, n - 1), np.clip(y, 0, n - 1)
+
+def tile_bounds(level, x, y):
+    """RA/Dec box of a tile in degrees"""
+    n = 1 << level
+    return {
+        'ra_min': 360.0 * x / n,
+        'ra_max': 360.0 * (x + 1) / n,
+        'dec_min': float(np.degrees(np.arcsin(2.0 * y / n - 1))),
+        'dec_max': float(np.degrees(np.arcsin(2.0 * (y + 1) / n - 1)))
+    }
+
+def interleave(x, y):
+    """Z-order (Morton) code of tile coordinates: children of a tile share its prefix"""
+    x = np.asarray(x, dtype=np.int64)
+    y = np.asarray(y, dtype=np.int64)
+    code = np.zeros(np.shape(x), dtype=np.int64)
+    for bit in range(MAX_LEVEL):
+        code |= ((x >> bit) & 1) << (2 * bit)
+        code |= ((y >> bit) & 1) << (2 * bit + 1)
+    return code
+
+def deinterleave(code):
+    """Tile coordinates (x, y) of Z-order codes"""
+    code = np.asarray(code, dtype=np.int64)
+    x = np.zeros(np.shape(code), dtype=np.int64)
+    y = np.zeros(np.shape(code), dtype=np.int64)
+    for bit in range(MAX_LEVEL):
+        x |= ((code >> (2 * bit)) & 1) << bit
+        y |= ((code >> (2 * bit + 1)) & 1) << bit
+    return x, y
+
+class SkyTileIndex:
+    """Stars of one catalog version sorted along a Z-order curve over the sky
+
+    Every tile at every level is then a contiguous slice of the sorted
+    stars, found with two binary searches.
+    """
+
+    def __init__(self, stars):
+        self.stars = stars
+        ra = stars.column('ra')
+        dec = stars.column('dec')
+        rows = np.flatnonzero(np.isfinite(ra) & np.isfinite(dec))
+        codes = interleave(*tile_coordinates(ra[rows], dec[rows], MAX_LEVEL))
+
+        order = np.argsort(codes, kind='stable')
+        self.rows = rows[order]
+        self.codes = codes[order]
+        self.planet_counts = stars.column('planet_count')[self.rows].astype(np.int64)
+        # Stars without a magnitude sort after the faintest one
+        magnitude = stars.column('magnitude')[self.rows]
+        self.magnitude = np.where(np.isnan(magnitude), np.inf, magnitude)
+
+    def _slice(self, level, x, y):
+        shift = 2 * (MAX_LEVEL - level)
+        first = int(interleave(x, y)) << shift
+        low = np.searchsorted(self.codes, first, side='left')
+        high = np.searchsorted(self.codes, first + (1 << shift), side='left')
+        return low, high
+
+    def tile(self, level, x, y):
+        """Counts by sub-tile for coarse levels, brightest stars for detail levels"""
+        if not 0 <= level <= MAX_LEVEL:
+            raise ValueError(f"'level' must be between 0 and {MAX_LEVEL}")
+        n = 1 << level
+        if not (0 <= x < n and 0 <= y < n):
+            raise ValueError(f"Tile coordinates at level {level} must be between 0 and {n - 1}")
+
+        low, high = self._slice(level, x, y)
+        result = {
+            'key': f"{level}/{x}/{y}",
+            'level': level,
+            'x': x,
+            'y': y,
+            'bounds': tile_bounds(level, x, y),
+            'star_count': int(high - low),
+            'planet_count': int(self.planet_counts[low:high].sum())
+        }
+
+        if level < DETAIL_LEVEL:
+            cell_level = min(level + CELL_DEPTH, MAX_LEVEL)
+            cell_codes = self.codes[low:high] >> (2 * (MAX_LEVEL - cell_level))
+            cells, first, counts = np.unique(cell_codes, return_index=True, return_counts=True)
+            planets = np.add.reduceat(self.planet_counts[low:high], first) if len(first) else first
+            cell_x, cell_y = deinterleave(cells)
+            result['cell_level'] = cell_level
+            result['cells'] = [
+                {'x': cx, 'y': cy, 'star_count': count, 'planet_count': planet_count}
+                for cx, cy, count, planet_count in zip(
+                    cell_x.tolist(), cell_y.tolist(), counts.tolist(), planets.tolist()
+                )
+            ]
+        else:
+            # Brightest first, ties in catalog order
+            slots = np.lexsort((self.rows[low:high], self.magnitude[low:high]))[:MAX_TILE_STARS]
+            result['stars'] = self.stars.rows(self.rows[low:high][slots])
+            result['truncated'] = bool(high - low > MAX_TILE_STARS)
+            if result['truncated']:
+                result['mag_limit'] = float(self.magnitude[low:high][slots[-1]])
+        return result
+
+class SkyTiles:
+    """Serialized sky tiles for the current catalog version
+
+    The Z-order index of a snapshot is built as soon as the catalog
+    publishes it, together with every coarse tile (levels below
+    DETAIL_LEVEL). Detail tiles are serialized on first request and kept
+    in a bounded LRU. ETags combine the snapshot fingerprint and the tile
+    key, so tiles stay cacheable until the catalog changes.
+    """
+
+    def __init__(self, catalog, max_cached=4096):
+        self.catalog = catalog
+        self.max_cached = max_cached
+        self._materialized = None
+        self._lock = threading.Lock()
+        catalog.add_listener(self.materialize)
+
+    def materialize(self, snapshot):
+        """Index a snapshot's stars and serialize its coarse tiles"""
+        index = SkyTileIndex(snapshot.stars)
+        coarse = {}
+        for level in range(DETAIL_LEVEL):
+            for x in range(1 << level):
+                for y in range(1 << level):
+                    coarse[(level, x, y)] = self._serialize(snapshot, index.tile(level, x, y))
+
+        materialized = (snapshot, index, coarse, OrderedDict())
+        with self._lock:
+            current = self._materialized
+            # Never replace a newer version with an older one
+            if current is None or current[0].version <= snapshot.version:
+                self._materialized = materialized
+        return materialized
+
+    def _current(self):
+        snapshot = self.catalog.snapshot
+        materialized = self._materialized
+        if materialized is not None and materialized[0] is snapshot:
+            return materialized
+        return self.materialize(snapshot)
+
+    @staticmethod
+    def _serialize(snapshot, tile):
+        body = json.dumps(tile, sort_keys=True, separators=(',', ':'))
+        return body.encode('utf-8'), f"{snapshot.fingerprint}-tile-{tile['level']}-{tile['x']}-{tile['y']}"
+
+    def get(self, level, x, y):
+        """(body, etag) of one tile for the current catalog version"""
+        snapshot, index, coarse, cache = self._current()
+        key = (level, x, y)
+        if key in coarse:
+            return coarse[key]
+        with self._lock:
+            if key in cache:
+                cache.move_to_end(key)
+                return cache[key]
+
+        entry = self._serialize(snapshot, index.tile(level, x, y))
+        with self._lock:
+            cache[key] = entry
+            while len(cache) > self.max_cached:
+                cache.popitem(last=False)
+        return entry
+
+    def get_info(self):
+        """Parameters of the tiling scheme"""
+        snapshot, index, _, _ = self._current()
+        return {
+            'scheme': 'equal-area quad-tree (RA x sin Dec), Z-order keys level/x/y',
+            'max_level': MAX_LEVEL,
+            'detail_level': DETAIL_LEVEL,
+            'cell_depth': CELL_DEPTH,
+            'max_tile_stars': MAX_TILE_STARS,
+            'star_count': len(index.rows),
+            'fingerprint': snapshot.fingerprint
+        }
@@ -0,0 +1,147 @@
+import numpy as np
+
+try:
+    from scipy.spatial import cKDTree
+except ImportError:
+    print("Warning: scipy not available, spatial queries will use brute force")
+    cKDTree = None
+
+def sky_to_unit_vectors(ra, dec):
+    """Convert RA/Dec in degrees to unit vectors on the celestial sphere"""
+    ra = np.radians(np.asarray(ra, dtype=np.float64))
+    dec = np.radians(np.asarray(dec, dtype=np.float64))
+    cos_dec = np.cos(dec)
+    return np.column_stack((cos_dec * np.cos(ra), cos_dec * np.sin(ra), np.sin(dec)))
+
+def sky_to_cartesian(ra, dec, distance):
+    """Convert RA/Dec in degrees and distance in parsecs to heliocentric x, y, z"""
+    return sky_to_unit_vectors(ra, dec) * np.asarray(distance, dtype=np.float64)[:, None]
+
+def angle_to_chord(radius_deg):
+    """Straight-line distance between two unit vectors separated by an angle"""
+    return 2 * np.sin(np.radians(radius_deg) / 2)
+
+def chord_to_angle(chord):
+    """Angular separation in degrees for a chord length on the unit sphere"""
+    return np.degrees(2 * np.arcsin(np.clip(chord / 2, 0, 1)))
+
+class _BruteForceTree:
+    """Minimal stand-in for cKDTree when scipy is missing"""
+
+    def __init__(self, points):
+        self.data = points
+        self.n = len(points)
+
+    def query_ball_point(self, x, r):
+        d = np.linalg.norm(self.data - x, axis=1)
+        return np.flatnonzero(d <= r).tolist()
+
+    def query(self, x, k):
+        d = np.linalg.norm(self.data - x, axis=1)
+        order = np.argsort(d, kind='stable')[:k]
+        return d[order], order
+
+class SpatialIndex:
+    """KD-tree over 3D positions and sky directions of catalog rows
+
+    Rows with a known RA/Dec go into the sky tree used by cone searches;
+    rows that also have a distance go into the 3D tree (parsecs) used by
+    radius and nearest-neighbour queries. Query results are row indexes of
+    the source table.
+    """
+
+    def __init__(self, ra, dec, distance):
+        ra = np.asarray(ra, dtype=np.float64)
+        dec = np.asarray(dec, dtype=np.float64)
+        distance = np.asarray(distance, dtype=np.float64)
+        tree_class = cKDTree or _BruteForceTree
+
+        on_sky = np.isfinite(ra) & np.isfinite(dec)
+        self.sky_rows = np.flatnonzero(on_sky)
+        self.sky_tree = tree_class(sky_to_unit_vectors(ra[on_sky], dec[on_sky]))
+
+        located = on_sky & np.isfinite(distance)
+        self.space_rows = np.flatnonzero(located)
+        self.space_tree = tree_class(sky_to_cartesian(ra[located], dec[located], distance[located]))
+
+    def position_of(self, row):
+        """Cartesian position of an indexed row, or None if it has no distance"""
+        slot = np.searchsorted(self.space_rows, row)
+        if slot < len(self.space_rows) and self.space_rows[slot] == row:
+            return self.space_tree.data[slot]
+        return None
+
+    def within_radius(self, center, radius):
+        """Rows within a radius (parsecs) of a 3D point, nearest first"""
+        center = np.asarray(center, dtype=np.float64)
+        slots = np.asarray(self.space_tree.query_ball_point(center, radius), dtype=np.intp)
+        separations = np.linalg.norm(self.space_tree.data[slots] - center, axis=1)
+        rows = self.space_rows[slots]
+        order = np.lexsort((rows, separations))
+        return rows[order], separations[order]
+
+    def nearest(self, center, k, exclude_row=None):
+        """The k rows closest to a 3D point, nearest first"""
+        if k <= 0 or not len(self.space_rows):
+            return np.empty(0, dtype=np.intp), np.empty(0)
+
+        extra = 1 if exclude_row is not None else 0
+        count = min(k + extra, len(self.space_rows))
+        separations, slots = self.space_tree.query(np.asarray(center, dtype=np.float64), k=count)
+        separations = np.atleast_1d(separations)
+        rows = self.space_rows[np.atleast_1d(slots)]
+
+        if exclude_row is not None:
+            keep = rows != exclude_row
+            rows, separations = rows[keep], separations[keep]
+        return rows[:k], separations[:k]
+
+    def cone(self, ra, dec, radius_deg):
+        """Rows within an angular radius (degrees) of a sky position, closest first"""
+        center = sky_to_unit_vectors([ra], [dec])[0]
+        slots = np.asarray(
+            self.sky_tree.query_ball_point(center, angle_to_chord(radius_deg)), dtype=np.intp
+        )
+        separations = chord_to_angle(np.linalg.norm(self.sky_tree.data[slots] - center, axis=1))
+        rows = self.sky_rows[slots]
+        order = np.lexsort((rows, separations))
+        return rows[order], separations[order]
+
+def match_sky(ra_a, dec_a, ra_b, dec_b, radius_arcsec, block_size=2048):
+    """All pairs of positions from two catalogs within an angular radius
+
+    Returns (rows_a, rows_b, separations_arcsec), ordered by row of the first
+    catalog and then by separation. Uses a dual KD-tree traversal when scipy
+    is available and blocked unit-vector dot products otherwise.
+    """
+    ra_a, dec_a = np.asarray(ra_a, dtype=np.float64), np.asarray(dec_a, dtype=np.float64)
+    ra_b, dec_b = np.asarray(ra_b, dtype=np.float64), np.asarray(dec_b, dtype=np.float64)
+    valid_a = np.flatnonzero(np.isfinite(ra_a) & np.isfinite(dec_a))
+    valid_b = np.flatnonzero(np.isfinite(ra_b) & np.isfinite(dec_b))
+    vectors_a = sky_to_unit_vectors(ra_a[valid_a], dec_a[valid_a])
+    vectors_b = sky_to_unit_vectors(ra_b[valid_b], dec_b[valid_b])
+    chord = angle_to_chord(radius_arcsec / 3600.0)
+
+    if not len(vectors_a) or not len(vectors_b):
+        slots_a = slots_b = np.empty(0, dtype=np.intp)
+        chords = np.empty(0)
+    elif cKDTree is not None:
+        pairs = cKDTree(vectors_a).sparse_distance_matrix(
+            cKDTree(vectors_b), chord, output_type='ndarray'
+        )
+        slots_a, slots_b, chords = pairs['i'], pairs['j'], pairs['v']
+    else:
+        min_dot = 1 - chord ** 2 / 2
+        found = []
+        for start in range(0, len(vectors_a), block_size):
+            dots = vectors_a[start:start + block_size] @ vectors_b.T
+            block_a, block_b = np.nonzero(dots >= min_dot)
+            found.append((block_a + start, block_b))
+        slots_a = np.concatenate([a for a, _ in found]).astype(np.intp)
+        slots_b = np.concatenate([b for _, b in found]).astype(np.intp)
+        chords = np.linalg.norm(vectors_a[slots_a] - vectors_b[slots_b], axis=1)
+
+    rows_a, rows_b = valid_a[slots_a], valid_b[slots_b]
+    separations = chord_to_angle(np.asarray(chords, dtype=np.float64)) * 3600.0
+    order = np.lexsort((rows_b, separations, rows_a))
+    return rows_a[order], rows_b[order], separations[order]
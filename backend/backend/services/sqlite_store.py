@@ -0,0 +1,254 @@
+import json
+import os
+import sqlite3
+import threading
+import uuid
+from datetime import datetime
+import numpy as np
+import pandas as pd
+from services.columnar import ColumnarTable, FLOAT, INT, BOOL, STR, CATEGORY
+from services.query_engine import QueryError
+
+# Columns indexed per table; text columns are indexed case-insensitively
+DEFAULT_INDEXES = {
+    'exoplanets': ['name', 'host_star', 'discovery_year', 'discovery_method', 'distance'],
+    'stars': ['name', 'distance']
+}
+
+SQL_TYPES = {FLOAT: 'REAL', INT: 'INTEGER', BOOL: 'INTEGER', STR: 'TEXT', CATEGORY: 'TEXT'}
+
+def quote(identifier):
+    return '"' + identifier.replace('"', '""') + '"'
+
+class SQLiteCatalogStore:
+    """Catalog store backed by one SQLite database in WAL mode
+
+    Drop-in alternative to BinaryCatalogStore: tables are saved and loaded
+    as ColumnarTables, and each save publishes a new version id inside a
+    single transaction, so readers in other workers keep seeing the old
+    rows until it commits. Filters, sorting and paging from a TableQuery
+    can also be pushed down into indexed SQL with `execute_query`.
+    """
+
+    supports_queries = True
+
+    def __init__(self, path="data/catalog.sqlite", indexes=None):
+        self.path = path
+        self.indexes = DEFAULT_INDEXES if indexes is None else indexes
+        self._local = threading.local()
+
+    def _connection(self):
+        """One connection per thread, created on first use"""
+        connection = getattr(self._local, 'connection', None)
+        if connection is None:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            connection = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            connection.execute('PRAGMA journal_mode=WAL')
+            connection.execute('PRAGMA synchronous=NORMAL')
+            connection.execute(
+                'CREATE TABLE IF NOT EXISTS catalog_tables ('
+                'name TEXT PRIMARY KEY, version TEXT NOT NULL, size INTEGER NOT NULL, '
+                'schema TEXT NOT NULL, categories TEXT NOT NULL, meta TEXT NOT NULL, created TEXT NOT NULL)'
+            )
+            self._local.connection = connection
+        return connection
+
+    def _registry(self, name):
+        row = self._connection().execute(
+            'SELECT version, size, schema, categories, meta FROM catalog_tables WHERE name = ?', (name,)
+        ).fetchone()
+        if row is None:
+            return None
+        version, size, schema, categories, meta = row
+        return {
+            'version': version,
+            'size': size,
+            'schema': [tuple(field) for field in json.loads(schema)],
+            'categories': json.loads(categories),
+            'meta': json.loads(meta)
+        }
+
+    def current(self, name):
+        """Version id of the published table, or None"""
+        registry = self._registry(name)
+        return registry['version'] if registry else None
+
+    def exists(self, name):
+        """Whether a published copy of the table exists"""
+        return self._registry(name) is not None
+
+    def metadata(self, name):
+        """`meta` dict saved with the published table, or None if there is none"""
+        registry = self._registry(name)
+        return registry['meta'] if registry else None
+
+    def save(self, name, table, meta=None):
+        """Replace a table and its indexes in one transaction"""
+        version = f"{name}-{datetime.now().strftime('%Y%m%d%H%M%S')}-{uuid.uuid4().hex[:8]}"
+        sql_table = quote(f"t_{name}")
+        fields = table.field_names
+        definitions = ', '.join(f"{quote(field)} {SQL_TYPES[table.kinds[field]]}" for field in fields)
+
+        # Column-wise Python values; '' and NaN are stored as NULL
+        values = [table.values(field) for field in fields]
+        for i, field in enumerate(fields):
+            if table.kinds[field] == BOOL:
+                values[i] = [int(v) for v in values[i]]
+
+        connection = self._connection()
+        connection.execute('BEGIN IMMEDIATE')
+        try:
+            connection.execute(f"DROP TABLE IF EXISTS {sql_table}")
+            connection.execute(f"CREATE TABLE {sql_table} ({definitions})")
+            placeholders = ', '.join('?' * len(fields))
+            connection.executemany(f"INSERT INTO {sql_table} VALUES ({placeholders})", zip(*values))
+
+            for field in self.indexes.get(name, []):
+                if field not in table.kinds:
+                    continue
+                collate = ' COLLATE NOCASE' if table.kinds[field] in (STR, CATEGORY) else ''
+                connection.execute(
+                    f"CREATE INDEX {quote(f'ix_{name}_{field}')} ON {sql_table} ({quote(field)}{collate})"
+                )
+
+            connection.execute(
+                'INSERT OR REPLACE INTO catalog_tables VALUES (?, ?, ?, ?, ?, ?, ?)',
+                (name, version, len(table), json.dumps(table.schema), json.dumps(table.categories),
+                 json.dumps(meta or {}), datetime.now().isoformat())
+            )
+            connection.execute('COMMIT')
+        except Exception:
+            connection.execute('ROLLBACK')
+            raise
+        return version
+
+    def load(self, name, mmap=True):
+        """Read the published table into a ColumnarTable (`mmap` is accepted for compatibility)"""
+        connection = self._connection()
+        # Read the registry and the rows from one consistent WAL snapshot
+        connection.execute('BEGIN')
+        try:
+            registry = self._registry(name)
+            if registry is None:
+                raise FileNotFoundError(f"No cached table named '{name}' in {self.path}")
+            columns = ', '.join(quote(field) for field, _ in registry['schema'])
+            frame = pd.read_sql_query(
+                f"SELECT {columns} FROM {quote(f't_{name}')} ORDER BY rowid", connection
+            )
+        finally:
+            connection.execute('COMMIT')
+
+        table = ColumnarTable.from_frame(frame, registry['schema'])
+        table.source_id = registry['version']
+        return table
+
+    def _where(self, query):
+        """SQL condition and parameters equivalent to a TableQuery's filters"""
+        clauses = []
+        params = []
+        for field, value in query.equals.items():
+            kind = query.table.kinds[field]
+            column = quote(field)
+            if kind in (STR, CATEGORY):
+                wanted = [v.strip() for v in value.split(',')]
+                clauses.append(f"{column} COLLATE NOCASE IN ({', '.join('?' * len(wanted))})")
+                params.extend(wanted)
+            elif kind == BOOL:
+                clauses.append(f"{column} = ?")
+                params.append(int(value.lower() in ('1', 'true', 'yes')))
+            else:
+                try:
+                    numbers = [float(v) for v in value.split(',')]
+                except ValueError:
+                    raise QueryError(f"'{field}' must be a number or comma-separated numbers")
+                clauses.append(f"{column} IN ({', '.join('?' * len(numbers))})")
+                params.extend(numbers)
+        for field, (low, high) in query.ranges.items():
+            if low is not None:
+                clauses.append(f"{quote(field)} >= ?")
+                params.append(low)
+            if high is not None:
+                clauses.append(f"{quote(field)} <= ?")
+                params.append(high)
+        return (' WHERE ' + ' AND '.join(clauses)) if clauses else '', params
+
+    def _order_by(self, query):
+        # Missing values sort last, ties keep table order, as in TableQuery.order
+        order = [f"{quote(field)} IS NULL, {quote(field)}{' DESC' if descending else ''}"
+                 for field, descending in query.sort]
+        order.append('rowid')
+        return ', '.join(order)
+
+    def _is_version(self, name, version):
+        # Read inside the query's transaction, so no save can commit in between
+        return version is None or self.current(name) == version
+
+    def select_rows(self, name, query, version=None):
+        """Matching row indexes in result order and the total, as TableQuery.select()
+
+        Only row ids are read, so callers can serialize the rows from the
+        in-memory table of the same version. With `version`, None is
+        returned if the published table is a different version.
+        """
+        sql_table = quote(f"t_{name}")
+        where, params = self._where(query)
+        limit = -1 if query.limit is None else query.limit
+
+        connection = self._connection()
+        connection.execute('BEGIN')
+        try:
+            if not self._is_version(name, version):
+                return None
+            total = connection.execute(f"SELECT COUNT(*) FROM {sql_table}{where}", params).fetchone()[0]
+            rowids = connection.execute(
+                f"SELECT rowid FROM {sql_table}{where} ORDER BY {self._order_by(query)} LIMIT ? OFFSET ?",
+                params + [limit, query.offset]
+            ).fetchall()
+        finally:
+            connection.execute('COMMIT')
+        return np.array([rowid for rowid, in rowids], dtype=np.intp) - 1, total
+
+    def execute_query(self, name, query, version=None):
+        """Run a TableQuery in SQL; same result shape as TableQuery.execute()
+
+        With `version`, None is returned if the published table is a
+        different version.
+        """
+        sql_table = quote(f"t_{name}")
+        where, params = self._where(query)
+        fields = query.fields or query.table.field_names
+        columns = ', '.join(['rowid'] + [quote(field) for field in fields])
+        limit = -1 if query.limit is None else query.limit
+
+        connection = self._connection()
+        connection.execute('BEGIN')
+        try:
+            if not self._is_version(name, version):
+                return None
+            total = connection.execute(f"SELECT COUNT(*) FROM {sql_table}{where}", params).fetchone()[0]
+            records = connection.execute(
+                f"SELECT {columns} FROM {sql_table}{where} ORDER BY {self._order_by(query)} LIMIT ? OFFSET ?",
+                params + [limit, query.offset]
+            ).fetchall()
+        finally:
+            connection.execute('COMMIT')
+
+        bool_fields = [i for i, field in enumerate(fields) if query.table.kinds[field] == BOOL]
+        results = []
+        for record in records:
+            values = list(record[1:])
+            for i in bool_fields:
+                values[i] = bool(values[i])
+            results.append(dict(zip(fields, values)))
+
+        next_offset = query.offset + len(records)
+        return {
+            'total': total,
+            'offset': query.offset,
+            'limit': query.limit,
+            'next_cursor': query.encode_cursor(next_offset) if next_offset < total else None,
+            'rows': [record[0] - 1 for record in records],
+            'results': results
+        }
@@ -0,0 +1,198 @@
+import requests
+from requests.adapters import HTTPAdapter
+import csv
+import hashlib
+import json
+import os
+import random
+import time
+
+# Columns parsed as integers; other non-string columns are parsed as floats
+INTEGER_COLUMNS = {'disc_year', 'default_flag', 'sy_pnum', 'sy_snum'}
+STRING_COLUMNS = {
+    'pl_name', 'hostname', 'discoverymethod', 'rowupdate', 'releasedate',
+    'st_spectype', 'disc_facility'
+}
+
+RETRY_STATUS_CODES = {429, 500, 502, 503, 504}
+
+class TAPNotModified(Exception):
+    """The TAP result has not changed since the validators were stored"""
+
+class _RetryableStatus(Exception):
+    """Transient HTTP status worth retrying"""
+
+    def __init__(self, response):
+        super().__init__(f"HTTP {response.status_code}")
+        self.response = response
+
+class TAPClient:
+    """HTTP client for NASA TAP ingestion
+
+    Uses one pooled keep-alive session and retries transient failures with
+    jittered exponential backoff. Results are streamed as CSV and parsed row
+    by row, in pages of at most `page_size` rows. Paging is keyset-based:
+    each page asks for rows after the last key seen. A request that fails
+    mid-stream resumes after the last row already yielded, so memory stays
+    flat and no row is duplicated. ETag/Last-Modified validators are sent
+    with the first request, and a 304 raises TAPNotModified. Validators are
+    only stored for results that fit in a single page, because a 304 on
+    page one says nothing about later pages.
+    """
+
+    def __init__(self, base_url, page_size=10000, max_retries=4, backoff=1.0,
+                 timeout=(10, 120), validators_file="data/tap_validators.json"):
+        self.base_url = base_url
+        self.page_size = page_size
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.timeout = timeout
+        self.validators_file = validators_file
+
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=4, pool_maxsize=8, max_retries=0)
+        self.session.mount('https://', adapter)
+        self.session.mount('http://', adapter)
+        self.session.headers.update({'Accept-Encoding': 'gzip, deflate'})
+
+    def _load_validators(self):
+        if os.path.exists(self.validators_file):
+            with open(self.validators_file, 'r') as f:
+                return json.load(f)
+        return {}
+
+    def _save_validators(self, key, response):
+        validators = {
+            'etag': response.headers.get('ETag'),
+            'last_modified': response.headers.get('Last-Modified')
+        }
+        if not any(validators.values()):
+            return
+        stored = self._load_validators()
+        stored[key] = validators
+        directory = os.path.dirname(self.validators_file)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        tmp_file = self.validators_file + '.tmp'
+        with open(tmp_file, 'w') as f:
+            json.dump(stored, f, indent=2)
+        os.replace(tmp_file, self.validators_file)
+
+    def _backoff_delay(self, attempt, response=None):
+        """Full-jitter exponential backoff, honouring Retry-After when given"""
+        delay = random.uniform(0, self.backoff * (2 ** attempt))
+        retry_after = response.headers.get('Retry-After') if response is not None else None
+        if retry_after and retry_after.isdigit():
+            delay = max(delay, float(retry_after))
+        return delay
+
+    def _get(self, query, headers):
+        """Open a streaming GET for one page of CSV results"""
+        params = {
+            'query': query,
+            'format': 'csv',
+            'maxrec': self.page_size
+        }
+        response = self.session.get(
+            self.base_url, params=params, headers=headers, timeout=self.timeout, stream=True
+        )
+        if response.status_code in RETRY_STATUS_CODES:
+            response.close()
+            raise _RetryableStatus(response)
+        if response.status_code != 304:
+            response.raise_for_status()
+        return response
+
+    def _iter_text(self, response):
+        """Decoded response text, split after each newline with the newline kept
+
+        csv.reader joins the pieces of a quoted field that spans lines again.
+        """
+        if 'charset' not in response.headers.get('Content-Type', '').lower():
+            # requests assumes ISO-8859-1 for text/* without a charset; TAP sends UTF-8
+            response.encoding = 'utf-8'
+        pending = ''
+        for chunk in response.iter_content(chunk_size=1 << 16, decode_unicode=True):
+            *lines, pending = (pending + chunk).split('\n')
+            for line in lines:
+                yield line + '\n'
+        if pending:
+            yield pending
+
+    def _parse_csv(self, response):
+        """Stream CSV text from a response into typed row dicts"""
+        reader = csv.reader(self._iter_text(response))
+        header = next(reader, None)
+        if not header:
+            return
+        for values in reader:
+            if values:
+                yield {column: self._convert(column, value) for column, value in zip(header, values)}
+
+    def _convert(self, column, value):
+        if value == '':
+            return None
+        if column in STRING_COLUMNS:
+            return value
+        try:
+            if column in INTEGER_COLUMNS:
+                return int(float(value))
+            return float(value)
+        except ValueError:
+            return value
+
+    def iter_rows(self, columns, table, where, key, conditional=True):
+        """Yield every row of `SELECT columns FROM table WHERE where`, ordered by `key`
+
+        With `conditional` set, stored validators are sent so an unchanged
+        result raises TAPNotModified instead of being downloaded again.
+        """
+        base_query = f"SELECT {', '.join(columns)} FROM {table} WHERE ({where})"
+        cache_key = hashlib.sha1(base_query.encode('utf-8')).hexdigest()
+
+        conditional_headers = {}
+        if conditional:
+            validators = self._load_validators().get(cache_key, {})
+            if validators.get('etag'):
+                conditional_headers['If-None-Match'] = validators['etag']
+            if validators.get('last_modified'):
+                conditional_headers['If-Modified-Since'] = validators['last_modified']
+
+        last_key = None
+        attempt = 0
+        while True:
+            query = base_query
+            if last_key is not None:
+                escaped = str(last_key).replace("'", "''")
+                query += f" AND {key} > '{escaped}'"
+            query += f" ORDER BY {key}"
+            page_start = last_key
+            headers = conditional_headers if page_start is None else {}
+
+            received = 0
+            try:
+                response = self._get(query, headers)
+                if response.status_code == 304:
+                    response.close()
+                    raise TAPNotModified(base_query)
+                with response:
+                    for row in self._parse_csv(response):
+                        received += 1
+                        last_key = row[key]
+                        yield row
+            except (requests.ConnectionError, requests.Timeout,
+                    requests.exceptions.ChunkedEncodingError, _RetryableStatus) as e:
+                if attempt >= self.max_retries:
+                    raise
+                failed_response = e.response if isinstance(e, _RetryableStatus) else None
+                time.sleep(self._backoff_delay(attempt, failed_response))
+                attempt += 1
+                continue
+
+            attempt = 0
+            if received < self.page_size:
+                break
+
+        # Only a result served whole by one request can be revalidated later
+        if page_start is None:
+            self._save_validators(cache_key, response)
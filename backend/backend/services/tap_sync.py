@@ -0,0 +1,198 @@
+from datetime import datetime
+import json
+import os
+import numpy as np
+from services.columnar import ColumnarTable, INT, CATEGORY
+from services.nasa_api import NASAExoplanetAPI, PLANET_COLUMNS, PLANET_SCHEMA, process_planet_rows
+from services.tap_client import TAPNotModified
+
+def remap_codes(codes, labels, new_labels):
+    """Category codes against `labels` translated to codes against `new_labels`"""
+    # Code -1 (missing) picks the trailing -1
+    lookup = np.searchsorted(np.array(new_labels, dtype=str), np.array(labels, dtype=str))
+    return np.append(lookup, -1).astype(np.int16)[codes]
+
+class TAPSync:
+    """Incremental sync of the local exoplanet store against the NASA TAP `ps` table
+
+    The first run pulls every default-flagged row and replaces the store.
+    Later runs only ask for rows whose `rowupdate` is on or after the stored
+    watermark and merge them into the binary store by planet name, and only
+    the host stars of merged planets are rebuilt in the star table. The
+    watermark day is re-requested each time, so merging is idempotent and no
+    same-day update is missed.
+    """
+
+    def __init__(self, nasa_api=None, state_file="data/sync_state.json"):
+        self.nasa_api = nasa_api or NASAExoplanetAPI()
+        self.state_file = state_file
+
+    def load_state(self):
+        """Read the sync watermark and bookkeeping"""
+        if os.path.exists(self.state_file):
+            with open(self.state_file, 'r') as f:
+                return json.load(f)
+        return {'watermark': None}
+
+    def save_state(self, state):
+        """Write the sync state atomically"""
+        directory = os.path.dirname(self.state_file)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        tmp_file = self.state_file + '.tmp'
+        with open(tmp_file, 'w') as f:
+            json.dump(state, f, indent=2)
+        os.replace(tmp_file, self.state_file)
+
+    def build_where(self, watermark=None):
+        """ADQL filter for all default rows, or only those updated since the watermark"""
+        where = "default_flag = 1"
+        if watermark:
+            where += f" AND rowupdate >= '{watermark}'"
+        return where
+
+    def fetch_rows(self, watermark=None):
+        """Stream raw `ps` rows from the TAP service
+
+        Only delta syncs are conditional: a full sync has to download the
+        rows even when the stored validators say nothing changed, since the
+        store they were recorded for may be gone.
+        """
+        return self.nasa_api.tap_client.iter_rows(
+            PLANET_COLUMNS + ['rowupdate'], 'ps', self.build_where(watermark), key='pl_name',
+            conditional=bool(watermark)
+        )
+
+    def merge(self, records):
+        """Merge planet records into the store by name and return (added, updated)
+
+        Only the rows named in the delta are looked up, compared and
+        replaced; new planets are appended column by column. The delta is
+        merged into the published table, which another process (the sync
+        process or a worker serving a manual sync) may have written since
+        this one last loaded it.
+        """
+        store = self.nasa_api.store
+        table = self.nasa_api.exoplanets_table
+        if store.exists('exoplanets') and (table is None or table.source_id != store.current('exoplanets')):
+            table = self.nasa_api.exoplanets_table = store.load('exoplanets')
+
+        if table is None:
+            table = ColumnarTable.from_records([], PLANET_SCHEMA)
+        # Later records for the same name win, as they would one by one
+        last = {record['name']: i for i, record in enumerate(records)}
+        delta = ColumnarTable.from_records([records[i] for i in sorted(last.values())], PLANET_SCHEMA)
+        if not len(delta):
+            return 0, 0
+
+        existing_names = table.column('name')
+        by_name = np.argsort(existing_names, kind='stable')
+        delta_names = delta.column('name')
+        if len(table):
+            slots = np.minimum(np.searchsorted(existing_names[by_name], delta_names), len(table) - 1)
+            found = existing_names[by_name][slots] == delta_names
+        else:
+            slots = np.zeros(len(delta), dtype=np.intp)
+            found = np.zeros(len(delta), dtype=bool)
+        matched_rows = by_name[slots[found]]
+        matched = np.flatnonzero(found)
+
+        # Only the matched rows are turned into dicts to spot real changes
+        differs = np.array([
+            current != record for current, record in zip(table.rows(matched_rows), delta.rows(matched))
+        ], dtype=bool)
+        replaced_rows = matched_rows[differs]
+        replacements = matched[differs]
+        appended = np.flatnonzero(~found)
+        added = len(appended)
+        updated = len(replacements)
+        if not added and not updated:
+            return 0, 0
+
+        hosts = table.column('host_star')
+        delta_hosts = delta.column('host_star')
+        changed_hosts = set(hosts[replaced_rows].tolist())
+        changed_hosts.update(delta_hosts[replacements].tolist())
+        changed_hosts.update(delta_hosts[appended].tolist())
+
+        columns = {}
+        masks = {}
+        categories = {}
+        for field, kind in PLANET_SCHEMA:
+            old_values = table.column(field)
+            new_values = delta.column(field)
+            if kind == CATEGORY:
+                labels = sorted(set(table.categories[field]) | set(delta.categories[field]))
+                old_values = remap_codes(old_values, table.categories[field], labels)
+                new_values = remap_codes(new_values, delta.categories[field], labels)
+            # Copy (the stored columns are read-only) wide enough for both
+            values = np.array(old_values, dtype=np.result_type(old_values, new_values))
+            values[replaced_rows] = new_values[replacements]
+            columns[field] = np.concatenate([values, new_values[appended]])
+            if kind == CATEGORY:
+                # Drop labels no row uses any more, as a full rebuild would
+                used = [labels[code] for code in np.unique(columns[field][columns[field] >= 0]).tolist()]
+                columns[field] = remap_codes(columns[field], labels, used)
+                categories[field] = used
+            if kind == INT:
+                mask = np.array(table.masks[field])
+                mask[replaced_rows] = delta.masks[field][replacements]
+                masks[field] = np.concatenate([mask, delta.masks[field][appended]])
+
+        merged = ColumnarTable(PLANET_SCHEMA, columns, masks, categories)
+        # Keep the archive's newest-discoveries-first order
+        years = np.where(merged.masks['discovery_year'], merged.column('discovery_year'), 0)
+        merged = merged.take(np.argsort(-years, kind='stable'))
+        self.nasa_api.save_exoplanet_table(merged, changed_hosts=changed_hosts)
+        return added, updated
+
+    def sync(self, full=False):
+        """Run one sync pass and return a summary"""
+        state = self.load_state()
+        has_store = self.nasa_api.store.exists('exoplanets')
+        # A change of requested columns needs a full pull to backfill old rows
+        columns_changed = state.get('columns') != PLANET_COLUMNS
+        watermark = None if full or not has_store or columns_changed else state.get('watermark')
+
+        rows_fetched = 0
+        new_watermark = watermark
+        records = []
+        not_modified = False
+        try:
+            for row in self.fetch_rows(watermark):
+                rows_fetched += 1
+                updated_on = str(row.get('rowupdate') or '')[:10]
+                if updated_on and (new_watermark is None or updated_on > new_watermark):
+                    new_watermark = updated_on
+                records.extend(process_planet_rows([row]))
+        except TAPNotModified:
+            not_modified = True
+
+        if not_modified:
+            added, updated = 0, 0
+        elif watermark:
+            added, updated = self.merge(records)
+        else:
+            # A full pull is authoritative and replaces the store outright
+            if not records:
+                raise ValueError("TAP service returned no planets for a full sync")
+            records.sort(key=lambda p: -(p.get('discovery_year') or 0))
+            self.nasa_api.save_exoplanets(records)
+            added, updated = len(records), 0
+
+        state.update({
+            'watermark': new_watermark,
+            'last_sync': datetime.now().isoformat(),
+            'mode': 'delta' if watermark else 'full',
+            'columns': PLANET_COLUMNS,
+            'rows_fetched': rows_fetched,
+            'added': added,
+            'updated': updated
+        })
+        self.save_state(state)
+        return state
+
+if __name__ == '__main__':
+    import sys
+    result = TAPSync().sync(full='--full' in sys.argv)
+    print(json.dumps(result, indent=2))
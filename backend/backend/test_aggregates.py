@@ -0,0 +1,154 @@
+from collections import Counter
+from types import SimpleNamespace
+
+import numpy as np
+
+from benchmark_aggregations import make_synthetic_table, legacy_aggregates, vectorized_aggregates
+from services.aggregate_query import AggregateQuery
+from services.aggregates import MaterializedAggregates
+from services.catalog import ExoplanetCatalog
+from services.data_processor import DataProcessor
+from services.discovery_cube import DiscoveryCube
+from services.host_stars import build_star_table
+from services.query_engine import QueryError
+
+def make_catalog(planets):
+    """ExoplanetCatalog over an in-memory planet table, without any store"""
+    nasa_api = SimpleNamespace(
+        initialize_data=lambda: None, exoplanets_table=planets,
+        stars_table=build_star_table(planets), store=None
+    )
+    return ExoplanetCatalog(nasa_api)
+
+def test_dashboard_aggregates_match_legacy():
+    """Vectorized dashboard aggregates equal the original loops on a synthetic catalog"""
+    table = make_synthetic_table(5000)
+    snapshot = SimpleNamespace(planets=table)
+    processor = DataProcessor(catalog=SimpleNamespace(snapshot=snapshot))
+
+    years, methods, _, sizes = legacy_aggregates(table.rows())
+    stats, method_counts, size_counts = vectorized_aggregates(processor, snapshot)
+    assert years == list(zip(stats['years'], stats['counts']))
+    assert dict(methods) == dict(zip(method_counts['methods'], method_counts['counts']))
+    assert sizes == size_counts['counts']
+    print("✓ Dashboard aggregates match the legacy implementation")
+
+def test_aggregates_materialized_once_per_version():
+    """A request racing a reload is served the old version instead of rebuilding the new one"""
+    catalog = make_catalog(make_synthetic_table(500))
+    served = []
+    # Registered before the aggregates, so it runs while they are not built yet
+    catalog.add_listener(lambda snapshot: served.append(
+        aggregates._current()[0].version if catalog.peek_version() else None
+    ))
+    aggregates = MaterializedAggregates(catalog, DataProcessor(catalog=catalog))
+
+    builds = []
+    build = aggregates.builders['discovery-stats']
+    aggregates.builders['discovery-stats'] = lambda snapshot: builds.append(snapshot.version) or build(snapshot)
+
+    body, etag = aggregates.get('discovery-stats')
+    catalog.reload()
+    new_body, new_etag = aggregates.get('discovery-stats')
+    assert builds == [1, 2] and served == [None, 1]
+    assert new_body == body and new_etag.endswith('-discovery-stats')
+    print("✓ Each catalog version is materialized exactly once")
+
+def test_aggregate_query():
+    """Histograms agree with np.histogram and group-by counts with a Counter, after filters"""
+    table = make_synthetic_table(4000)
+    radius = table.column('radius')
+    years = table.values('discovery_year')
+
+    result = AggregateQuery.from_args(table, {'column': 'radius', 'bins': '8', 'scale': 'log'}).execute()
+    counts, edges = np.histogram(radius[radius > 0], bins=np.array(result['edges']))
+    assert result['counts'] == counts.tolist() and np.isclose(edges[0], np.nanmin(radius))
+    assert result['missing'] == np.count_nonzero(np.isnan(radius)) and result['out_of_range'] == 0
+
+    args = {'group_by': 'discovery_year', 'discovery_year_min': '2020'}
+    result = AggregateQuery.from_args(table, args).execute()
+    expected = Counter(y for y in years if y is not None and y >= 2020)
+    assert {g['key']: g['count'] for g in result['groups']} == expected
+    assert result['total'] == sum(expected.values())
+
+    args = {'column': 'mass', 'bins': '0,10,100,1000', 'group_by': 'discovery_method'}
+    result = AggregateQuery.from_args(table, args).execute()
+    assert result['scale'] == 'custom'
+    assert [sum(c) for c in zip(*[g['counts'] for g in result['groups']])] == result['counts']
+
+    for bad in ({}, {'column': 'name'}, {'column': 'radius', 'bins': '5,1'}, {'group_by': 'radius'},
+                {'column': 'radius', 'start': 'nan'}, {'column': 'radius', 'stop': 'inf'},
+                {'column': 'radius', 'bins': '1,inf'}, {'column': 'radius', 'bins': 'nan,1'}):
+        try:
+            AggregateQuery.from_args(table, bad)
+        except QueryError:
+            continue
+        raise AssertionError(f"{bad} should be rejected")
+    print("✓ Ad-hoc histograms and group-by counts")
+
+def test_aggregate_query_cached_per_version():
+    """Equivalent aggregate queries share one cache entry until the catalog is reloaded"""
+    catalog = make_catalog(make_synthetic_table(500))
+    aggregates = MaterializedAggregates(catalog, DataProcessor(catalog=catalog))
+
+    body, etag = aggregates.query({'column': 'radius', 'discovery_method': 'Transit,Imaging'})
+    again = aggregates.query({'discovery_method': 'Transit,Imaging', 'column': 'radius'})
+    assert again == (body, etag)
+
+    catalog.reload()
+    reloaded_body, reloaded_etag = aggregates.query({'column': 'radius', 'discovery_method': 'Transit,Imaging'})
+    assert reloaded_body == body and reloaded_etag != etag
+    print("✓ Aggregate results cached per catalog version")
+
+def size_key(radius):
+    """Size category of a radius, written out by hand"""
+    if radius is None or radius <= 0:
+        return 'unknown'
+    for bound, key in [(1, 'sub-earth'), (1.75, 'super-earth'), (3.5, 'sub-neptune'), (8, 'neptune')]:
+        if radius < bound:
+            return key
+    return 'jupiter'
+
+def test_discovery_cube_slices():
+    """Cube slices equal counting the matching planets one by one"""
+    table = make_synthetic_table(3000)
+    planets = [p for p in table.rows() if p['discovery_year']]
+    cube = DiscoveryCube.from_table(table)
+    assert int(cube.counts.sum()) == len(planets)
+
+    result = cube.slice(methods=['transit', 'Imaging'], sizes=['super-earth', 'jupiter'],
+                        year_min=2000, year_max=2010, by=('method', 'year'))
+    expected = Counter(
+        (p['discovery_method'], p['discovery_year']) for p in planets
+        if p['discovery_method'] in ('Transit', 'Imaging') and 2000 <= p['discovery_year'] <= 2010
+        and size_key(p['radius']) in ('super-earth', 'jupiter')
+    )
+    assert result['method'] == ['Imaging', 'Transit'] and result['year'] == list(range(2000, 2011))
+    for i, method in enumerate(result['method']):
+        for j, year in enumerate(result['year']):
+            assert result['counts'][i][j] == expected[(method, year)]
+    assert result['total'] == sum(expected.values())
+
+    by_size = cube.slice(by=('size',))
+    sizes = Counter(size_key(p['radius']) for p in planets)
+    assert by_size['counts'] == [sizes[key] for key in by_size['size']]
+
+    for bad in ({'by': ('year', 'year')}, {'by': ('colour',)}, {'sizes': ['huge']}):
+        try:
+            cube.slice(**bad)
+        except ValueError:
+            continue
+        raise AssertionError(f"{bad} should be rejected")
+    print("✓ Discovery cube slices match per-planet counts")
+
+if __name__ == "__main__":
+    print("🚀 Testing catalog aggregations")
+    print("=" * 50)
+
+    test_dashboard_aggregates_match_legacy()
+    test_aggregates_materialized_once_per_version()
+    test_aggregate_query()
+    test_aggregate_query_cached_per_version()
+    test_discovery_cube_slices()
+
+    print("✅ All tests completed!")
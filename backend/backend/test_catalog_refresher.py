@@ -0,0 +1,90 @@
+import os
+import shutil
+import tempfile
+import time
+from types import SimpleNamespace
+
+from benchmark_aggregations import make_synthetic_table
+from services.catalog import ExoplanetCatalog
+from services.catalog_refresher import CatalogRefresher
+from services.host_stars import build_star_table
+from test_tap_sync import FakeTAPServer, make_row, make_sync
+
+def test_shared_generation_reaches_forked_workers():
+    """A sync bumps the shared version counter, and a forked worker reloads on it"""
+    if not hasattr(os, 'fork'):
+        print("- Skipped: needs os.fork")
+        return
+    data_dir = tempfile.mkdtemp()
+    server = FakeTAPServer([make_row('A b', 'A', 2020, '2024-01-10')])
+    try:
+        sync = make_sync(server, data_dir)
+        sync.sync()
+        catalog = ExoplanetCatalog(sync.nasa_api)
+        catalog.load()
+        refresher = CatalogRefresher(catalog, sync, lock_file=f"{data_dir}/.refresh.lock", shared=True)
+
+        read_end, write_end = os.pipe()
+        pid = os.fork()
+        if pid == 0:
+            # Worker: wait for the counter to move, then reload the catalog
+            try:
+                deadline = time.monotonic() + 10
+                while not refresher._generation_changed() and time.monotonic() < deadline:
+                    time.sleep(0.01)
+                refresher.reload_if_changed()
+                os.write(write_end, str(len(catalog.snapshot.planets)).encode())
+            finally:
+                os._exit(0)
+
+        server.rows.append(make_row('C b', 'C', 2024, '2024-03-06'))
+        assert refresher.sync_once()['added'] == 1
+        os.waitpid(pid, 0)
+        assert os.read(read_end, 16) == b'2'
+        assert refresher.generation.value == 1
+        assert len(catalog.snapshot.planets) == 1
+        print("✓ Forked worker picked up the new catalog via the shared counter")
+    finally:
+        server.close()
+        shutil.rmtree(data_dir, ignore_errors=True)
+
+def test_import_does_not_start_refresher():
+    """Importing the app (tests, tools) starts no background refresh thread"""
+    import app
+    assert not app.refresher.running
+    assert app.refresher._thread is None
+    print("✓ Importing the app left the refresher stopped")
+
+def test_request_served_from_one_snapshot():
+    """A request keeps the snapshot it read first, and its headers name that snapshot"""
+    import app
+    planets = make_synthetic_table(200)
+    app.catalog.nasa_api = SimpleNamespace(
+        initialize_data=lambda: None, exoplanets_table=planets,
+        stars_table=build_star_table(planets), store=None
+    )
+    first = app.catalog.reload()
+
+    app.catalog.begin_request()
+    assert app.catalog.snapshot is first
+    app.catalog.reload()
+    assert app.catalog.snapshot is first
+    assert app.catalog.end_request() is first
+    assert app.catalog.snapshot is not first
+
+    response = app.app.test_client().get('/api/catalog')
+    snapshot = app.catalog.snapshot
+    assert response.headers['X-Catalog-Fingerprint'] == snapshot.fingerprint
+    assert response.headers['X-Catalog-Version'] == str(snapshot.version)
+    assert 'X-Catalog-Fingerprint' not in app.app.test_client().get('/starmap').headers
+    print("✓ Requests pinned to one snapshot, named in the response headers")
+
+if __name__ == "__main__":
+    print("🚀 Testing the catalog refresher")
+    print("=" * 50)
+
+    test_shared_generation_reaches_forked_workers()
+    test_import_does_not_start_refresher()
+    test_request_served_from_one_snapshot()
+
+    print("✅ All tests completed!")
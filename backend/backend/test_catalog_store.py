@@ -0,0 +1,34 @@
+import os
+import shutil
+import tempfile
+
+from services.catalog_store import BinaryCatalogStore
+from services.columnar import ColumnarTable, FLOAT, STR
+
+SCHEMA = [('name', STR), ('radius', FLOAT)]
+
+def test_previous_version_survives_quick_saves():
+    """Saves within the same second always keep the version just superseded"""
+    data_dir = tempfile.mkdtemp()
+    try:
+        store = BinaryCatalogStore(data_dir)
+        previous = None
+        for i in range(20):
+            published = store.save('planets', ColumnarTable.from_records([{'name': f"P{i}", 'radius': i}], SCHEMA))
+            versions = sorted(e for e in os.listdir(data_dir) if e.startswith('planets-'))
+            assert versions == sorted(filter(None, [previous, published]))
+            previous = published
+
+        table = store.load('planets')
+        assert table.rows() == [{'name': 'P19', 'radius': 19.0}]
+        print("✓ Pruning keeps exactly the current and previous versions")
+    finally:
+        shutil.rmtree(data_dir, ignore_errors=True)
+
+if __name__ == "__main__":
+    print("🚀 Testing the binary catalog store")
+    print("=" * 50)
+
+    test_previous_version_survives_quick_saves()
+
+    print("✅ All tests completed!")
@@ -0,0 +1,46 @@
+import csv
+import io
+import json
+
+from benchmark_aggregations import make_synthetic_table
+from services.export import iter_ndjson, iter_csv
+from services.query_engine import TableQuery
+
+def test_ndjson_export():
+    """NDJSON chunks hold one batch of rows each and parse back to the query's rows"""
+    table = make_synthetic_table(1234)
+    query = TableQuery.from_args(table, {'discovery_method': 'transit', 'sort': '-radius'}, default_limit=None)
+    rows, total = query.select()
+
+    chunks = list(iter_ndjson(table, rows, batch_size=100))
+    assert len(chunks) == -(-total // 100)
+    records = [json.loads(line) for chunk in chunks for line in chunk.splitlines()]
+    assert records == table.rows(rows)
+    print("✓ NDJSON export streams every matching row in order")
+
+def test_csv_export():
+    """CSV starts with the projected header and writes missing values as empty cells"""
+    table = make_synthetic_table(300)
+    rows = TableQuery.from_args(table, {'sort': 'name'}, default_limit=None).select()[0]
+    fields = ['name', 'radius', 'discovery_year', 'star_temperature']
+
+    chunks = list(iter_csv(table, rows, fields, batch_size=64))
+    assert chunks[0] == 'name,radius,discovery_year,star_temperature\r\n'
+    parsed = list(csv.DictReader(io.StringIO(''.join(chunks))))
+    expected = table.rows(rows, fields=fields)
+    assert len(parsed) == len(expected) == 300
+    for line, record in zip(parsed, expected):
+        assert line['name'] == record['name']
+        assert line['star_temperature'] == ''
+        assert line['radius'] == ('' if record['radius'] is None else repr(record['radius']))
+        assert line['discovery_year'] == ('' if record['discovery_year'] is None else str(record['discovery_year']))
+    print("✓ CSV export writes a header and one line per row")
+
+if __name__ == "__main__":
+    print("🚀 Testing catalog export")
+    print("=" * 50)
+
+    test_ndjson_export()
+    test_csv_export()
+
+    print("✅ All tests completed!")
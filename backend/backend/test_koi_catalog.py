@@ -0,0 +1,67 @@
+import os
+import shutil
+import tempfile
+
+from services.catalog_store import BinaryCatalogStore
+from services.koi_catalog import KOICatalog
+from services.query_engine import TableQuery
+
+CUMULATIVE_CSV = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'cumulative.csv')
+
+def make_catalog(data_dir, rows=50):
+    """KOICatalog over the first rows of the shipped cumulative table"""
+    csv_path = os.path.join(data_dir, 'cumulative.csv')
+    with open(CUMULATIVE_CSV, 'r') as src, open(csv_path, 'w') as dst:
+        for _ in range(rows + 1):
+            dst.write(src.readline())
+    return KOICatalog(csv_path, BinaryCatalogStore(os.path.join(data_dir, 'catalog')))
+
+def test_parse_and_lookup():
+    """KOIs are found by KOI name, Kepler name and kepid"""
+    data_dir = tempfile.mkdtemp()
+    try:
+        kois = make_catalog(data_dir)
+        table = kois.load()
+        assert len(table) == 50
+        assert table.kinds['kepid'] == 'int' and table.kinds['koi_disposition'] == 'category'
+
+        assert kois.lookup('K00752.01')[0]['kepler_name'] == 'Kepler-227 b'
+        assert kois.lookup('kepler-227 c')[0]['kepoi_name'] == 'K00752.02'
+        assert [k['kepoi_name'] for k in kois.lookup('10797460')] == ['K00752.01', 'K00752.02']
+        assert kois.lookup('K99999.01') == []
+
+        query = TableQuery.from_args(table, {'koi_disposition': 'confirmed', 'fields': 'kepoi_name'})
+        assert query.execute()['total'] == sum(
+            r['koi_disposition'] == 'CONFIRMED' for r in table.rows()
+        )
+        print("✓ KOI table parsed and indexed")
+    finally:
+        shutil.rmtree(data_dir, ignore_errors=True)
+
+def test_binary_cache_follows_csv():
+    """The binary cache is reused until the CSV contents change"""
+    data_dir = tempfile.mkdtemp()
+    try:
+        first = make_catalog(data_dir, rows=20)
+        first.load()
+        published = first.store.current('koi')
+
+        again = make_catalog(data_dir, rows=20)
+        again.load()
+        assert again.store.current('koi') == published
+
+        changed = make_catalog(data_dir, rows=30)
+        assert len(changed.load()) == 30
+        assert changed.store.current('koi') != published
+        print("✓ KOI cache rebuilt only when the CSV changed")
+    finally:
+        shutil.rmtree(data_dir, ignore_errors=True)
+
+if __name__ == "__main__":
+    print("🚀 Testing the KOI catalog")
+    print("=" * 50)
+
+    test_parse_and_lookup()
+    test_binary_cache_follows_csv()
+
+    print("✅ All tests completed!")
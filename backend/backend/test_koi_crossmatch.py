@@ -0,0 +1,94 @@
+import shutil
+import tempfile
+from types import SimpleNamespace
+
+from services.catalog import ExoplanetCatalog
+from services.columnar import ColumnarTable
+from services.host_stars import build_star_table
+from services.koi_crossmatch import KOICrossMatch
+from services.nasa_api import PLANET_SCHEMA
+from test_koi_catalog import make_catalog
+
+ARCSEC = 1 / 3600.0
+
+def make_planet_catalog():
+    """Hosts placed around the first KOIs of the shipped table (K00752 at 291.93423, 48.141651)"""
+    planets = ColumnarTable.from_records([
+        {'name': 'Kepler-227 b', 'host_star': 'Kepler-227', 'orbital_period': 9.488,
+         'ra': 291.93423, 'dec': 48.141651 + 1.0 * ARCSEC},
+        {'name': 'Kepler-227 x', 'host_star': 'Kepler-227', 'orbital_period': 54.4183827 * 1.004,
+         'ra': 291.93423, 'dec': 48.141651 + 1.0 * ARCSEC},
+        {'name': 'Decoy b', 'host_star': 'Decoy', 'orbital_period': 100.0,
+         'ra': 291.93423, 'dec': 48.141651 + 1.8 * ARCSEC},
+        {'name': 'KOI-753 b', 'host_star': 'KOI-753', 'orbital_period': 30.0,
+         'ra': 297.00482, 'dec': 48.134129},
+        {'name': 'Far b', 'host_star': 'Far', 'orbital_period': 2.2, 'ra': 0.0, 'dec': 0.0},
+    ], PLANET_SCHEMA)
+    nasa_api = SimpleNamespace(
+        initialize_data=lambda: None, exoplanets_table=planets,
+        stars_table=build_star_table(planets), store=None
+    )
+    return ExoplanetCatalog(nasa_api)
+
+def test_crossmatch_ranks_and_pairs_planets():
+    """KOIs pair with every host in the radius, closest first, and with a planet by name or period"""
+    data_dir = tempfile.mkdtemp()
+    try:
+        crossmatch = KOICrossMatch(make_catalog(data_dir, rows=12), make_planet_catalog())
+        table = crossmatch.matches()
+        pairs = [
+            (m['kepoi_name'], m['host_star'], m['rank'], m['planet_name'], m['match_type'])
+            for m in table.rows()
+        ]
+        assert pairs == [
+            ('K00752.01', 'Kepler-227', 1, 'Kepler-227 b', 'name'),
+            ('K00752.01', 'Decoy', 2, None, 'position'),
+            ('K00752.02', 'Kepler-227', 1, 'Kepler-227 x', 'period'),
+            ('K00752.02', 'Decoy', 2, None, 'position'),
+            ('K00753.01', 'KOI-753', 1, None, 'position'),
+        ]
+        assert abs(table.row(0)['separation_arcsec'] - 1.0) < 1e-3
+
+        summary = crossmatch.summary()
+        assert summary['pairs'] == 5 and summary['matched_kois'] == 3 and summary['koi_count'] == 12
+        assert summary['by_match_type'] == {'name': 1, 'period': 1, 'position': 1}
+        assert [m['kepoi_name'] for m in crossmatch.matches(0.5).rows()] == ['K00753.01']
+        try:
+            crossmatch.matches(0)
+            raise AssertionError("radius 0 accepted")
+        except ValueError:
+            pass
+        print("✓ KOIs matched to hosts and planets")
+    finally:
+        shutil.rmtree(data_dir, ignore_errors=True)
+
+def test_crossmatch_persisted_per_catalog_version():
+    """The default-radius match table is stored once and rebuilt for a new catalog version"""
+    data_dir = tempfile.mkdtemp()
+    try:
+        kois = make_catalog(data_dir, rows=12)
+        catalog = make_planet_catalog()
+        KOICrossMatch(kois, catalog).matches()
+        published = kois.store.current('koi_crossmatch')
+
+        restarted = KOICrossMatch(kois, catalog)
+        assert len(restarted.matches()) == 5
+        assert kois.store.current('koi_crossmatch') == published
+        restarted.matches(3.0)
+        assert kois.store.current('koi_crossmatch') == published
+
+        catalog.reload()
+        assert len(restarted.matches()) == 5
+        assert kois.store.current('koi_crossmatch') != published
+        print("✓ Cross-match table persisted per catalog version")
+    finally:
+        shutil.rmtree(data_dir, ignore_errors=True)
+
+if __name__ == "__main__":
+    print("🚀 Testing the KOI cross-match")
+    print("=" * 50)
+
+    test_crossmatch_ranks_and_pairs_planets()
+    test_crossmatch_persisted_per_catalog_version()
+
+    print("✅ All tests completed!")
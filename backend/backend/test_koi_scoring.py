@@ -0,0 +1,93 @@
+import hashlib
+import os
+import shutil
+import tempfile
+from pathlib import Path
+
+import numpy as np
+
+from services.koi_scoring import KOIScorer
+from test_koi_catalog import make_catalog
+
+class PeriodModel:
+    """Two-class stand-in for the trained model: periods above `threshold` look like planets"""
+
+    def __init__(self, threshold):
+        self.threshold = threshold
+        self.calls = 0
+
+    def predict_proba(self, features):
+        self.calls += 1
+        planet = 1 / (1 + np.exp(np.clip(self.threshold - features[:, 0], -50, 50)))
+        return np.column_stack([1 - planet, planet])
+
+class ScratchPredictor:
+    """Predictor-shaped object whose model.pkl holds the PeriodModel threshold"""
+
+    def __init__(self, model_dir):
+        self.model_path = Path(model_dir)
+        self.features = ['koi_period', 'koi_prad']
+        self.inv_label_map = {0: 'FALSE POSITIVE', 1: 'CONFIRMED'}
+        self.load_model_and_metadata()
+
+    def load_model_and_metadata(self):
+        with open(self.model_path / 'model.pkl', 'rb') as f:
+            model_bytes = f.read()
+        self.model = PeriodModel(float(model_bytes))
+        self.model_sha256 = hashlib.sha256(model_bytes).hexdigest()
+
+def write_model(model_dir, threshold):
+    with open(os.path.join(model_dir, 'model.pkl'), 'wb') as f:
+        f.write(str(threshold).encode())
+
+def test_scores_persisted_and_invalidated():
+    """Scores are reused across restarts and recomputed when the model or the CSV changes"""
+    data_dir = tempfile.mkdtemp()
+    try:
+        write_model(data_dir, 10.0)
+        predictor = ScratchPredictor(data_dir)
+        first_model = predictor.model
+        scorer = KOIScorer(make_catalog(data_dir, rows=40), predictor, chunk_size=16)
+        info = scorer.get_info()
+        assert info['koi_count'] == 40 and first_model.calls == 3
+        assert sum(info['predictions'].values()) == info['scored']
+
+        score = scorer.get_score('K00752.01')
+        assert score['scored'] and set(score['probabilities']) == {'FALSE POSITIVE', 'CONFIRMED'}
+        assert np.isclose(sum(score['probabilities'].values()), 1.0)
+        assert scorer.get_score('kepler-227 b')['kepoi_name'] == 'K00752.01'
+        assert scorer.get_score('K99999.01') is None
+
+        # A restart with the same files loads the stored scores
+        again = KOIScorer(make_catalog(data_dir, rows=40), predictor)
+        again.ensure_scored()
+        assert first_model.calls == 3
+
+        # A new model file invalidates them, but only when asked to recheck,
+        # and the scores then come from the new model
+        write_model(data_dir, 1000.0)
+        again.ensure_scored()
+        assert predictor.model is first_model
+        again.ensure_scored(recheck=True)
+        assert predictor.model is not first_model and predictor.model.threshold == 1000.0
+        assert first_model.calls == 3 and predictor.model.calls == 1
+        info = again.get_info()
+        assert info['model_sha256'] == predictor.model_sha256
+        assert info['predictions'] == {'FALSE POSITIVE': info['scored']}
+
+        # So does a different KOI table, noticed by a running scorer on recheck
+        make_catalog(data_dir, rows=45)
+        assert again.get_info()['koi_count'] == 40
+        again.ensure_scored(recheck=True)
+        assert again.get_info()['koi_count'] == 45 and predictor.model.calls == 2
+        print("✓ KOI scores cached by model and CSV hash")
+    finally:
+        shutil.rmtree(data_dir, ignore_errors=True)
+
+if __name__ == "__main__":
+    print("🚀 Testing KOI batch scoring")
+    print("=" * 50)
+
+    test_scores_persisted_and_invalidated()
+
+    print("✅ All tests completed!")
@@ -0,0 +1,60 @@
+from services.catalog import CatalogSnapshot
+from services.columnar import ColumnarTable
+from services.host_stars import build_star_table
+from services.name_search import NameSearchIndex
+from services.nasa_api import PLANET_SCHEMA
+
+NAMES = ['Kepler-22 b', 'Kepler-22', 'Kepler-220 b', 'Kepler-2 b', 'TRAPPIST-1 e', 'TRAPPIST-1', 'HD 209458 b']
+KINDS = ['planet', 'host', 'planet', 'planet', 'planet', 'host', 'planet']
+
+def search(index, query, limit=10, kinds=None):
+    return [(index.names[entry], match) for entry, match, _ in index.search(query, limit, kinds)]
+
+def test_exact_then_prefix_ranking():
+    """Exact matches come first, then prefixes shortest first, ignoring case, spaces and dashes"""
+    index = NameSearchIndex(NAMES, KINDS)
+    assert search(index, 'kepler-22', limit=4) == [
+        ('Kepler-22', 'exact'), ('Kepler-22 b', 'prefix'), ('Kepler-220 b', 'prefix'), ('Kepler-2 b', 'fuzzy')
+    ]
+    assert search(index, 'KEPLER22B')[0] == ('Kepler-22 b', 'exact')
+    assert search(index, '  trappist-1   e ')[0] == ('TRAPPIST-1 e', 'exact')
+    assert search(index, 'kepler', limit=2) == [('Kepler-22', 'prefix'), ('Kepler-2 b', 'prefix')]
+    assert search(index, '') == []
+    print("✓ Exact and prefix matches ranked")
+
+def test_fuzzy_and_kind_filter():
+    """Typos fall back to trigram matches, and `kinds` restricts every stage"""
+    index = NameSearchIndex(NAMES, KINDS)
+    results = index.search('trapist-1 e', limit=3)
+    assert (index.names[results[0][0]], results[0][1]) == ('TRAPPIST-1 e', 'fuzzy')
+    assert all(score < 1 for _, _, score in results)
+    assert [score for _, _, score in results] == sorted((score for _, _, score in results), reverse=True)
+
+    assert search(index, 'kepler-22', kinds=['host']) == [('Kepler-22', 'exact')]
+    assert search(index, 'xyzzy') == []
+    print("✓ Fuzzy matches and type filter")
+
+def test_snapshot_search():
+    """Snapshot results name the host of planets and count the planets of hosts"""
+    planets = ColumnarTable.from_records([
+        {'name': 'Kepler-22 b', 'host_star': 'Kepler-22'},
+        {'name': 'TRAPPIST-1 b', 'host_star': 'TRAPPIST-1'},
+        {'name': 'TRAPPIST-1 c', 'host_star': 'TRAPPIST-1'},
+    ], PLANET_SCHEMA)
+    snapshot = CatalogSnapshot(1, planets, build_star_table(planets))
+
+    results = snapshot.search_names('trappist-1')
+    assert results[0] == {'name': 'TRAPPIST-1', 'type': 'host', 'planet_count': 2, 'match': 'exact', 'score': 1.0}
+    assert [r['name'] for r in results[1:3]] == ['TRAPPIST-1 b', 'TRAPPIST-1 c']
+    assert results[1]['host_star'] == 'TRAPPIST-1' and results[1]['type'] == 'planet'
+    print("✓ Snapshot search results")
+
+if __name__ == "__main__":
+    print("🚀 Testing name search")
+    print("=" * 50)
+
+    test_exact_then_prefix_ranking()
+    test_fuzzy_and_kind_filter()
+    test_snapshot_search()
+
+    print("✅ All tests completed!")
@@ -0,0 +1,79 @@
+from types import SimpleNamespace
+
+import numpy as np
+
+from services.catalog import CatalogSnapshot
+from services.columnar import ColumnarTable
+from services.data_processor import DataProcessor
+from services.host_stars import build_star_table
+from services.nasa_api import PLANET_SCHEMA
+from services.orbits import KeplerOrbits, solve_kepler
+
+def test_kepler_equation_solved():
+    """Newton iterations satisfy E - e sin E = M up to e = 0.99, across a whole grid"""
+    rng = np.random.default_rng(7)
+    mean_anomaly = rng.uniform(0, 2 * np.pi, (500, 200))
+    eccentricity = rng.uniform(0, 0.99, (500, 1))
+
+    anomaly = solve_kepler(mean_anomaly, eccentricity)
+    assert anomaly.shape == (500, 200)
+    assert np.abs(anomaly - eccentricity * np.sin(anomaly) - mean_anomaly).max() < 1e-10
+    print("✓ Kepler's equation solved for 100,000 points")
+
+def test_orbit_geometry():
+    """Circular face-on orbits are circles; eccentric edge-on orbits transit at the transit time"""
+    circle = KeplerOrbits([365.25]).positions(np.linspace(0, 365.25, 100))[0]
+    angles = np.linspace(0, 2 * np.pi, 100)
+    assert np.allclose(circle, np.column_stack([np.cos(angles), np.sin(angles), np.zeros(100)]))
+
+    # Kepler's third law with the host mass: 0.25 M☉, 1 year -> a = 0.25^(1/3) AU
+    assert np.isclose(KeplerOrbits([365.25], star_mass=[0.25]).semi_major_axis[0], 0.25 ** (1 / 3))
+
+    transit = 2459000.5
+    periastron = KeplerOrbits.periastron_from_transit(np.array([transit]), 12.0, 0.4, 65.0)
+    orbits = KeplerOrbits([12.0], [0.4], [90.0], [65.0], star_mass=[0.8], periastron_time=periastron)
+    x, y, z = orbits.positions([transit])[0, 0]
+    assert abs(x) < 1e-8 and abs(y) < 1e-8 and z > 0
+
+    distances = np.linalg.norm(orbits.positions(orbits.orbit_times(401))[0], axis=1)
+    a = orbits.semi_major_axis[0]
+    assert np.isclose(distances.min(), a * 0.6) and np.isclose(distances.max(), a * 1.4)
+    print("✓ Orbit shape, scale and transit timing")
+
+def test_system_orbits():
+    """A system's planets share one time grid and come innermost first"""
+    planets = ColumnarTable.from_records([
+        {'name': 'S d', 'host_star': 'S', 'orbital_period': 40.0, 'star_mass': 0.5, 'ra': 1.0, 'dec': 2.0},
+        {'name': 'S b', 'host_star': 'S', 'orbital_period': 3.0, 'ra': 1.0, 'dec': 2.0},
+        {'name': 'S e', 'host_star': 'S', 'orbital_period': None},
+        {'name': 'S c', 'host_star': 'S', 'orbital_period': 900.0, 'semi_major_axis': 0.03, 'eccentricity': 0.3},
+        {'name': 'T b', 'host_star': 'T', 'orbital_period': 5.0},
+    ], PLANET_SCHEMA)
+    snapshot = CatalogSnapshot(1, planets, build_star_table(planets))
+    processor = DataProcessor(catalog=SimpleNamespace(snapshot=snapshot))
+
+    system = processor.get_system_orbits('s', num_points=50, start=2460000.5)
+    assert [p['name'] for p in system['planets']] == ['S c', 'S b', 'S d', 'S e']
+    assert system['host_star'] == 'S' and system['star']['planet_count'] == 4
+    assert len(system['times']) == 50 and system['times'][0] == 2460000.5
+    assert np.isclose(system['times'][-1] - system['times'][0], 900.0)
+    for planet in system['planets'][:3]:
+        assert np.array(planet['positions']).shape == (50, 3)
+    assert system['planets'][3]['positions'] is None
+
+    # Same positions as the planet's own orbit at the shared times
+    orbits = KeplerOrbits.from_planets(planets, [0])
+    expected = orbits.positions(system['times'])[0]
+    assert np.allclose(system['planets'][2]['positions'], expected)
+    assert processor.get_system_orbits('Nowhere') is None
+    print("✓ System orbits on shared time steps, ordered by orbit size")
+
+if __name__ == "__main__":
+    print("🚀 Testing the Keplerian orbit engine")
+    print("=" * 50)
+
+    test_kepler_equation_solved()
+    test_orbit_geometry()
+    test_system_orbits()
+
+    print("✅ All tests completed!")
@@ -0,0 +1,76 @@
+from services.columnar import ColumnarTable
+from services.nasa_api import PLANET_SCHEMA
+from services.query_engine import TableQuery, QueryError
+
+def make_table():
+    """Six planets with a few missing values"""
+    return ColumnarTable.from_records([
+        {'name': 'Kepler-11 b', 'host_star': 'Kepler-11', 'radius': 1.8, 'discovery_year': 2011, 'discovery_method': 'Transit'},
+        {'name': 'Kepler-11 c', 'host_star': 'Kepler-11', 'radius': 2.9, 'discovery_year': 2011, 'discovery_method': 'Transit'},
+        {'name': 'TRAPPIST-1 b', 'host_star': 'TRAPPIST-1', 'radius': 1.1, 'discovery_year': 2016, 'discovery_method': 'Transit'},
+        {'name': '51 Peg b', 'host_star': '51 Peg', 'radius': None, 'discovery_year': 1995, 'discovery_method': 'Radial Velocity'},
+        {'name': 'HR 8799 b', 'host_star': 'HR 8799', 'radius': 13.0, 'discovery_year': None, 'discovery_method': 'Imaging'},
+        {'name': 'GJ 1214 b', 'host_star': 'GJ 1214', 'radius': 2.7, 'discovery_year': 2009, 'discovery_method': None},
+    ], PLANET_SCHEMA)
+
+def names(table, args):
+    return [r['name'] for r in TableQuery.from_args(table, args, default_limit=None).execute()['results']]
+
+def test_filters():
+    """Equality on strings, categories and numbers takes comma-separated values; ranges skip missing values"""
+    table = make_table()
+    assert names(table, {'host_star': 'kepler-11,TRAPPIST-1'}) == ['Kepler-11 b', 'Kepler-11 c', 'TRAPPIST-1 b']
+    assert names(table, {'host_star': 'Kepler-1'}) == []
+    assert names(table, {'discovery_method': 'imaging, radial velocity'}) == ['51 Peg b', 'HR 8799 b']
+    assert names(table, {'discovery_year': '2011,1995'}) == ['Kepler-11 b', 'Kepler-11 c', '51 Peg b']
+    assert names(table, {'radius_min': '2', 'radius_max': '3'}) == ['Kepler-11 c', 'GJ 1214 b']
+    assert names(table, {'discovery_year_max': '2010'}) == ['51 Peg b', 'GJ 1214 b']
+
+    for bad in ({'radius_min': 'big'}, {'name_min': 'a'}, {'colour': 'red'}, {'limit': '-1'}):
+        try:
+            TableQuery.from_args(table, bad)
+        except QueryError:
+            continue
+        raise AssertionError(f"{bad} should be rejected")
+    print("✓ Equality and range filters")
+
+def test_sort_and_projection():
+    """Multi-key sort puts missing values last in both directions; fields project the rows"""
+    table = make_table()
+    assert names(table, {'sort': '-radius'}) == [
+        'HR 8799 b', 'Kepler-11 c', 'GJ 1214 b', 'Kepler-11 b', 'TRAPPIST-1 b', '51 Peg b'
+    ]
+    assert names(table, {'sort': 'discovery_year,-radius'}) == [
+        '51 Peg b', 'GJ 1214 b', 'Kepler-11 c', 'Kepler-11 b', 'TRAPPIST-1 b', 'HR 8799 b'
+    ]
+    result = TableQuery.from_args(table, {'sort': 'name', 'fields': 'name,radius', 'limit': '2'}).execute()
+    assert result['results'] == [{'name': '51 Peg b', 'radius': None}, {'name': 'GJ 1214 b', 'radius': 2.7}]
+    print("✓ Sorting and projection")
+
+def test_cursor_paging():
+    """Cursors walk the whole result and only work for the query that made them"""
+    table = make_table()
+    args = {'sort': 'name', 'limit': '4'}
+    first = TableQuery.from_args(table, args).execute()
+    assert first['total'] == 6 and first['next_cursor']
+
+    second = TableQuery.from_args(table, dict(args, cursor=first['next_cursor'])).execute()
+    assert second['offset'] == 4 and second['next_cursor'] is None
+    assert [r['name'] for r in first['results'] + second['results']] == names(table, {'sort': 'name'})
+
+    try:
+        TableQuery.from_args(table, {'sort': '-name', 'cursor': first['next_cursor']})
+        raise AssertionError("cursor of another query accepted")
+    except QueryError:
+        pass
+    print("✓ Cursor paging")
+
+if __name__ == "__main__":
+    print("🚀 Testing the table query engine")
+    print("=" * 50)
+
+    test_filters()
+    test_sort_and_projection()
+    test_cursor_paging()
+
+    print("✅ All tests completed!")
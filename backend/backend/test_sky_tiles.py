@@ -0,0 +1,90 @@
+import json
+from types import SimpleNamespace
+
+import numpy as np
+
+from services.catalog import ExoplanetCatalog
+from services.columnar import ColumnarTable
+from services.host_stars import build_star_table
+from services.nasa_api import PLANET_SCHEMA
+from services.sky_tiles import SkyTileIndex, SkyTiles, DETAIL_LEVEL, MAX_TILE_STARS
+
+def make_planets(size=2000, seed=11):
+    """One planet per host: random sky positions plus a dense cluster near RA 45, Dec 10"""
+    rng = np.random.default_rng(seed)
+    ra = np.concatenate([rng.uniform(0, 360, size), rng.uniform(45.0, 45.5, 300)])
+    dec = np.concatenate([np.degrees(np.arcsin(rng.uniform(-1, 1, size))), rng.uniform(10.0, 10.5, 300)])
+    magnitude = rng.uniform(4, 16, len(ra))
+    magnitude[::13] = np.nan
+    return ColumnarTable.from_records([
+        {'name': f"S{i} b", 'host_star': f"S{i:05d}", 'ra': float(ra[i]), 'dec': float(dec[i]),
+         'star_magnitude': None if np.isnan(magnitude[i]) else float(magnitude[i])}
+        for i in range(len(ra))
+    ], PLANET_SCHEMA)
+
+def test_tiles_partition_the_sky():
+    """Sub-tiles add up to their parent and detail tiles list their own stars, brightest first"""
+    stars = build_star_table(make_planets())
+    index = SkyTileIndex(stars)
+
+    root = index.tile(0, 0, 0)
+    assert root['star_count'] == len(stars) and root['planet_count'] == len(stars)
+    assert sum(cell['star_count'] for cell in root['cells']) == len(stars)
+    children = [index.tile(1, x, y)['star_count'] for x in range(2) for y in range(2)]
+    assert sum(children) == len(stars)
+
+    total = 0
+    for x in range(1 << DETAIL_LEVEL):
+        for y in range(1 << DETAIL_LEVEL):
+            tile = index.tile(DETAIL_LEVEL, x, y)
+            bounds = tile['bounds']
+            listed = tile['stars']
+            assert len(listed) == min(tile['star_count'], MAX_TILE_STARS)
+            assert all(bounds['ra_min'] <= s['ra'] < bounds['ra_max'] for s in listed)
+            assert all(bounds['dec_min'] - 1e-9 <= s['dec'] <= bounds['dec_max'] + 1e-9 for s in listed)
+            magnitudes = [s['magnitude'] for s in listed if s['magnitude'] is not None]
+            assert magnitudes == sorted(magnitudes)
+            total += tile['star_count']
+    assert total == len(stars)
+
+    crowded = max((index.tile(DETAIL_LEVEL, x, y) for x in range(16) for y in range(16)),
+                  key=lambda tile: tile['star_count'])
+    assert crowded['truncated'] and crowded['mag_limit'] == crowded['stars'][-1]['magnitude']
+
+    for level, x, y in [(-1, 0, 0), (2, 4, 0), (DETAIL_LEVEL, 0, -1)]:
+        try:
+            index.tile(level, x, y)
+        except ValueError:
+            continue
+        raise AssertionError(f"tile {level}/{x}/{y} should be rejected")
+    print("✓ Tiles partition the sky at every level")
+
+def test_tiles_follow_catalog_versions():
+    """Serialized tiles and ETags are reused until the catalog publishes a new snapshot"""
+    planets = make_planets(500)
+    nasa_api = SimpleNamespace(
+        initialize_data=lambda: None, exoplanets_table=planets,
+        stars_table=build_star_table(planets), store=None
+    )
+    catalog = ExoplanetCatalog(nasa_api)
+    tiles = SkyTiles(catalog)
+
+    body, etag = tiles.get(0, 0, 0)
+    assert json.loads(body)['star_count'] == 800
+    detail = tiles.get(DETAIL_LEVEL, 2, 9)
+    assert tiles.get(DETAIL_LEVEL, 2, 9) is detail
+
+    catalog.reload()
+    new_body, new_etag = tiles.get(0, 0, 0)
+    assert new_body == body and new_etag != etag
+    assert tiles.get_info()['star_count'] == 800
+    print("✓ Tile cache follows catalog versions")
+
+if __name__ == "__main__":
+    print("🚀 Testing sky tiles")
+    print("=" * 50)
+
+    test_tiles_partition_the_sky()
+    test_tiles_follow_catalog_versions()
+
+    print("✅ All tests completed!")
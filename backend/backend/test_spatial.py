@@ -0,0 +1,100 @@
+import numpy as np
+
+from services.catalog import CatalogSnapshot
+from services.columnar import ColumnarTable
+from services.host_stars import build_star_table
+from services.nasa_api import PLANET_SCHEMA
+from services.spatial import SpatialIndex, sky_to_cartesian, sky_to_unit_vectors
+
+def random_sky(size, seed=5):
+    """Uniform sky positions with distances, a few of them missing"""
+    rng = np.random.default_rng(seed)
+    ra = rng.uniform(0, 360, size)
+    dec = np.degrees(np.arcsin(rng.uniform(-1, 1, size)))
+    distance = rng.uniform(1, 200, size)
+    distance[::17] = np.nan
+    ra[::29] = np.nan
+    return ra, dec, distance
+
+def test_radius_and_nearest_match_brute_force():
+    """Radius and k-nearest queries return exactly the brute-force rows, nearest first"""
+    ra, dec, distance = random_sky(3000)
+    index = SpatialIndex(ra, dec, distance)
+    located = np.flatnonzero(np.isfinite(ra) & np.isfinite(distance))
+    positions = sky_to_cartesian(ra[located], dec[located], distance[located])
+
+    center = np.array([20.0, -15.0, 40.0])
+    separations = np.linalg.norm(positions - center, axis=1)
+    rows, found = index.within_radius(center, 35.0)
+    expected = located[separations <= 35.0]
+    assert sorted(rows.tolist()) == sorted(expected.tolist())
+    assert np.all(np.diff(found) >= 0) and found.max() <= 35.0
+
+    rows, found = index.nearest(center, 10)
+    assert rows.tolist() == located[np.argsort(separations, kind='stable')[:10]].tolist()
+    rows, _ = index.nearest(index.position_of(rows[0]), 3, exclude_row=rows[0])
+    assert len(rows) == 3 and located[np.argsort(separations)[0]] not in rows
+    print("✓ Radius and nearest-neighbour queries match brute force")
+
+def test_cone_matches_brute_force():
+    """Cone searches find every position within the angle, including those without a distance"""
+    ra, dec, distance = random_sky(3000, seed=9)
+    index = SpatialIndex(ra, dec, distance)
+    on_sky = np.flatnonzero(np.isfinite(ra) & np.isfinite(dec))
+
+    for center_ra, center_dec, radius in [(10.0, 20.0, 8.0), (359.0, 0.0, 5.0), (0.0, 89.0, 3.0)]:
+        center = sky_to_unit_vectors([center_ra], [center_dec])[0]
+        angles = np.degrees(np.arccos(np.clip(sky_to_unit_vectors(ra[on_sky], dec[on_sky]) @ center, -1, 1)))
+        rows, separations = index.cone(center_ra, center_dec, radius)
+        assert sorted(rows.tolist()) == sorted(on_sky[angles <= radius].tolist())
+        assert np.allclose(np.sort(separations), np.sort(angles[angles <= radius]))
+    print("✓ Cone searches match brute force, across RA 0 and near the pole")
+
+def test_snapshot_spatial_queries():
+    """Snapshot helpers return records with separations and skip the queried host"""
+    planets = ColumnarTable.from_records([
+        {'name': 'A b', 'host_star': 'A', 'ra': 10.0, 'dec': 0.0, 'distance': 10.0},
+        {'name': 'A c', 'host_star': 'A', 'ra': 10.0, 'dec': 0.0, 'distance': 10.0},
+        {'name': 'B b', 'host_star': 'B', 'ra': 11.0, 'dec': 0.0, 'distance': 10.5},
+        {'name': 'C b', 'host_star': 'C', 'ra': 190.0, 'dec': 0.0, 'distance': 10.0},
+        {'name': 'D b', 'host_star': 'D', 'ra': 12.0, 'dec': 1.0, 'distance': None},
+    ], PLANET_SCHEMA)
+    snapshot = CatalogSnapshot(1, planets, build_star_table(planets))
+
+    nearest = snapshot.get_nearest_hosts('a', k=2)
+    assert [h['name'] for h in nearest['hosts']] == ['B', 'C']
+    assert nearest['hosts'][0]['planet_count'] == 1 and nearest['hosts'][1]['separation_pc'] > 19.9
+
+    cone = snapshot.cone_search(10.0, 0.0, 3.0, target='hosts')
+    assert [(h['name'], h['planet_count']) for h in cone] == [('A', 2), ('B', 1), ('D', 1)]
+    assert [s['name'] for s in snapshot.get_nearby_stars(10.2)] == ['A', 'C']
+    assert snapshot.get_nearest_hosts('D') == {'error': 'Star has no known distance'}
+    print("✓ Snapshot radius, cone and nearest-host queries")
+
+def test_spatial_routes_reject_bad_parameters():
+    """NaN, infinite, negative or missing coordinates and radii are answered with 400"""
+    import app
+    client = app.app.test_client()
+    for url in [
+        '/api/nearby-stars?distance=nan', '/api/nearby-stars?distance=-5', '/api/nearby-stars?distance=0',
+        '/api/stars/within?ra=10&dec=20&distance=nan', '/api/stars/within?ra=10&dec=20&distance=-1',
+        '/api/stars/within?ra=10&dec=20&distance=5&radius=-3', '/api/stars/within?ra=10&dec=20',
+        '/api/cone-search?ra=nan&dec=0', '/api/cone-search?ra=10&dec=inf',
+        '/api/cone-search?ra=10&dec=0&radius=-1', '/api/cone-search?ra=10&dec=0&radius=nan',
+        '/api/cone-search?dec=0',
+    ]:
+        response = client.get(url)
+        assert response.status_code == 400, url
+        assert 'error' in response.get_json(), url
+    print("✓ Spatial endpoints reject invalid parameters")
+
+if __name__ == "__main__":
+    print("🚀 Testing KD-tree spatial queries")
+    print("=" * 50)
+
+    test_radius_and_nearest_match_brute_force()
+    test_cone_matches_brute_force()
+    test_snapshot_spatial_queries()
+    test_spatial_routes_reject_bad_parameters()
+
+    print("✅ All tests completed!")
@@ -0,0 +1,342 @@
+import csv
+import hashlib
+import io
+import json
+import os
+import re
+import shutil
+import tempfile
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qs
+
+from services.nasa_api import NASAExoplanetAPI
+from services.catalog_store import BinaryCatalogStore
+from services.tap_client import TAPClient
+from services.tap_sync import TAPSync
+
+# Local stand-in for the NASA TAP sync endpoint. It understands just enough
+# ADQL to honour the `rowupdate >= 'YYYY-MM-DD'` watermark filter and the
+# client's `pl_name > '...'` keyset paging, and answers CSV with MAXREC.
+def make_row(name, host, year, rowupdate, radius=1.0, teff=5800.0, spectype=None):
+    return {
+        'pl_name': name, 'hostname': host, 'pl_orbper': 10.0, 'pl_rade': radius,
+        'pl_masse': None, 'pl_eqt': 300.0, 'disc_year': year,
+        'discoverymethod': 'Transit', 'ra': 10.0, 'dec': 20.0, 'sy_dist': 30.0,
+        'st_teff': teff, 'sy_vmag': 9.5, 'st_spectype': spectype,
+        'rowupdate': rowupdate
+    }
+
+class FakeTAPServer:
+    """Threaded HTTP server that answers TAP queries from an in-memory `ps` table"""
+
+    def __init__(self, rows):
+        self.rows = rows
+        self.queries = []
+        self.fail_next = 0
+        self.not_modified_hits = 0
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                params = parse_qs(urlparse(self.path).query)
+                query = params.get('query', [''])[0]
+                server.queries.append(query)
+
+                if server.fail_next:
+                    server.fail_next -= 1
+                    self.send_response(503)
+                    self.send_header('Retry-After', '0')
+                    self.send_header('Content-Length', '0')
+                    self.end_headers()
+                    return
+
+                rows = server.select(query, int(params.get('maxrec', ['0'])[0]))
+                etag = '"%s"' % hashlib.sha1(json.dumps(rows, sort_keys=True).encode()).hexdigest()
+                if self.headers.get('If-None-Match') == etag:
+                    server.not_modified_hits += 1
+                    self.send_response(304)
+                    self.end_headers()
+                    return
+
+                out = io.StringIO()
+                columns = re.search(r"SELECT (.*?) FROM", query).group(1).split(', ')
+                writer = csv.writer(out)
+                writer.writerow(columns)
+                for row in rows:
+                    writer.writerow(['' if row.get(c) is None else row.get(c) for c in columns])
+                body = out.getvalue().encode()
+
+                self.send_response(200)
+                self.send_header('Content-Type', 'text/csv')
+                self.send_header('Content-Length', str(len(body)))
+                self.send_header('ETag', etag)
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        self.httpd = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        self.url = f"http://127.0.0.1:{self.httpd.server_address[1]}/TAP/sync"
+        threading.Thread(target=self.httpd.serve_forever, daemon=True).start()
+
+    def select(self, query, maxrec):
+        rows = sorted(self.rows, key=lambda r: r['pl_name'])
+        watermark = re.search(r"rowupdate >= '(\d{4}-\d{2}-\d{2})'", query)
+        if watermark:
+            rows = [r for r in rows if r['rowupdate'] >= watermark.group(1)]
+        after = re.search(r"pl_name > '((?:[^']|'')*)'", query)
+        if after:
+            rows = [r for r in rows if r['pl_name'] > after.group(1).replace("''", "'")]
+        return rows[:maxrec] if maxrec else rows
+
+    def close(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+def make_sync(server, data_dir, page_size=10000):
+    """TAPSync wired to the stand-in server and a scratch data directory"""
+    nasa_api = NASAExoplanetAPI()
+    nasa_api.base_url = server.url
+    nasa_api.store = BinaryCatalogStore(f"{data_dir}/catalog")
+    nasa_api.tap_client = TAPClient(
+        server.url, page_size=page_size, backoff=0.01,
+        validators_file=f"{data_dir}/tap_validators.json"
+    )
+    return TAPSync(nasa_api, state_file=f"{data_dir}/sync_state.json")
+
+def test_full_then_delta_sync():
+    """First sync pulls everything; the next one only asks for rows since the watermark"""
+    data_dir = tempfile.mkdtemp()
+    server = FakeTAPServer([
+        make_row('A b', 'A', 2020, '2024-01-10'),
+        make_row('B b', 'B', 2021, '2024-02-01'),
+    ])
+    try:
+        sync = make_sync(server, data_dir)
+
+        state = sync.sync()
+        assert state['mode'] == 'full'
+        assert state['added'] == 2
+        assert state['watermark'] == '2024-02-01'
+        assert 'rowupdate >=' not in server.queries[-1]
+        assert sync.nasa_api.store.load('exoplanets').rows()[0]['name'] == 'B b'
+
+        server.rows[0] = make_row('A b', 'A', 2020, '2024-03-05', radius=2.5)
+        server.rows.append(make_row('C b', 'C', 2024, '2024-03-06'))
+
+        state = sync.sync()
+        assert state['mode'] == 'delta'
+        assert "rowupdate >= '2024-02-01'" in server.queries[-1]
+        assert state['rows_fetched'] == 3
+        assert state['added'] == 1
+        assert state['updated'] == 1
+        assert state['watermark'] == '2024-03-06'
+
+        planets = {p['name']: p for p in sync.nasa_api.store.load('exoplanets').rows()}
+        assert sorted(planets) == ['A b', 'B b', 'C b']
+        assert planets['A b']['radius'] == 2.5
+        print("✓ Full and delta sync merged by planet name")
+    finally:
+        server.close()
+        shutil.rmtree(data_dir, ignore_errors=True)
+
+def test_unchanged_delta_is_noop():
+    """Re-running a sync with nothing new leaves the store untouched"""
+    data_dir = tempfile.mkdtemp()
+    server = FakeTAPServer([make_row('A b', 'A', 2020, '2024-01-10')])
+    try:
+        sync = make_sync(server, data_dir)
+        sync.sync()
+        published = sync.nasa_api.store._current_dir('exoplanets')
+
+        state = sync.sync()
+        assert state['added'] == 0 and state['updated'] == 0
+        assert sync.nasa_api.store._current_dir('exoplanets') == published
+        print("✓ Unchanged delta sync did not rewrite the store")
+    finally:
+        server.close()
+        shutil.rmtree(data_dir, ignore_errors=True)
+
+def test_full_sync_after_store_deleted():
+    """Stale conditional validators do not stop a full sync from refilling a deleted store"""
+    data_dir = tempfile.mkdtemp()
+    server = FakeTAPServer([make_row('A b', 'A', 2020, '2024-01-10')])
+    try:
+        sync = make_sync(server, data_dir)
+        sync.sync()
+        assert os.path.exists(f"{data_dir}/tap_validators.json")
+
+        shutil.rmtree(f"{data_dir}/catalog")
+        sync.nasa_api.exoplanets_table = None
+        state = sync.sync()
+        assert state['mode'] == 'full' and state['added'] == 1
+        assert server.not_modified_hits == 0
+        assert [p['name'] for p in sync.nasa_api.store.load('exoplanets').rows()] == ['A b']
+        print("✓ Full sync re-downloaded into an empty store")
+    finally:
+        server.close()
+        shutil.rmtree(data_dir, ignore_errors=True)
+
+def test_delta_merge_matches_full_pull():
+    """A columnar delta merge gives the same table as pulling everything again"""
+    data_dir = tempfile.mkdtemp()
+    server = FakeTAPServer([
+        make_row('A b', 'A', 2020, '2024-01-10', spectype='G2 V'),
+        make_row('B b', 'B', 2021, '2024-02-01'),
+    ])
+    try:
+        sync = make_sync(server, f"{data_dir}/delta")
+        sync.sync()
+
+        # Replace the only G2 V row, add a longer name and a new discovery method
+        server.rows[0] = make_row('A b', 'A', 2020, '2024-03-05', spectype='K1 V')
+        longer = make_row('A very long planet name b', 'A', 2019, '2024-03-06')
+        longer['discoverymethod'] = 'Imaging'
+        server.rows.append(longer)
+        assert sync.sync()['mode'] == 'delta'
+
+        full = make_sync(server, f"{data_dir}/full")
+        full.sync()
+        merged = sync.nasa_api.store.load('exoplanets')
+        rebuilt = full.nasa_api.store.load('exoplanets')
+        assert merged.rows() == rebuilt.rows()
+        assert merged.categories == rebuilt.categories
+        print("✓ Delta merge matches a full pull")
+    finally:
+        server.close()
+        shutil.rmtree(data_dir, ignore_errors=True)
+
+def test_delta_merged_into_published_table():
+    """A writer holding an older table merges into what another writer published"""
+    data_dir = tempfile.mkdtemp()
+    server = FakeTAPServer([make_row('A b', 'A', 2020, '2024-01-10')])
+    try:
+        first = make_sync(server, data_dir)
+        first.sync()
+        # Loaded at startup, before the other writer's syncs
+        second = make_sync(server, data_dir)
+        second.nasa_api.initialize_data()
+
+        server.rows.append(make_row('C b', 'C', 2024, '2024-03-06'))
+        first.sync()
+        server.rows.append(make_row('E b', 'E', 2024, '2024-03-08'))
+        first.sync()
+        server.rows.append(make_row('F b', 'F', 2024, '2024-03-09'))
+        state = second.sync()
+        assert state['mode'] == 'delta' and state['added'] == 1
+
+        names = [p['name'] for p in second.nasa_api.store.load('exoplanets').rows()]
+        assert sorted(names) == ['A b', 'C b', 'E b', 'F b']
+        stars = [s['name'] for s in second.nasa_api.store.load('stars').rows()]
+        assert sorted(stars) == ['A', 'C', 'E', 'F']
+        print("✓ Two writers sharing a store keep each other's rows")
+    finally:
+        server.close()
+        shutil.rmtree(data_dir, ignore_errors=True)
+
+def test_paged_fetch_with_retries():
+    """Keyset pages of MAXREC rows are stitched together across transient 503s"""
+    data_dir = tempfile.mkdtemp()
+    server = FakeTAPServer([
+        make_row(f"P{i:02d} b", f"P{i:02d}", 2000 + i, '2024-01-01') for i in range(7)
+    ] + [make_row("O'Brien b", "O'Brien", 2010, '2024-01-01')])
+    try:
+        sync = make_sync(server, data_dir, page_size=3)
+        server.fail_next = 2
+
+        state = sync.sync()
+        assert state['added'] == 8
+        assert sum("pl_name > " in q for q in server.queries) == 2
+        names = [p['name'] for p in sync.nasa_api.store.load('exoplanets').rows()]
+        assert sorted(names) == sorted(r['pl_name'] for r in server.rows)
+        print("✓ Paged fetch survived transient failures")
+    finally:
+        server.close()
+        shutil.rmtree(data_dir, ignore_errors=True)
+
+def test_csv_text_decoding():
+    """Rows are read as UTF-8 and quoted fields may span lines"""
+    data_dir = tempfile.mkdtemp()
+    server = FakeTAPServer([
+        make_row('Tau Boötis b', 'Tau Boötis', 1996, '2024-01-01', spectype='F7\nIV-V'),
+        make_row('55 Cnc e', '55 Cnc', 2004, '2024-01-01', spectype='K0 IV-V'),
+        make_row('HD 1 b', 'HD 1', 2010, '2024-01-01'),
+    ])
+    try:
+        client = make_sync(server, data_dir, page_size=2).nasa_api.tap_client
+        rows = list(client.iter_rows(
+            ['pl_name', 'hostname', 'st_spectype'], 'ps', 'default_flag = 1', key='pl_name'
+        ))
+        assert [(r['pl_name'], r['hostname'], r['st_spectype']) for r in rows] == [
+            ('55 Cnc e', '55 Cnc', 'K0 IV-V'), ('HD 1 b', 'HD 1', None), ('Tau Boötis b', 'Tau Boötis', 'F7\nIV-V')
+        ]
+        print("✓ UTF-8 names and multi-line fields parsed")
+    finally:
+        server.close()
+        shutil.rmtree(data_dir, ignore_errors=True)
+
+def test_conditional_fetch_not_modified():
+    """An unchanged single-page result is answered with 304 on the next fetch"""
+    data_dir = tempfile.mkdtemp()
+    server = FakeTAPServer([make_row('A b', 'A', 2020, '2024-01-10')])
+    try:
+        sync = make_sync(server, data_dir)
+        sync.nasa_api.fetch_exoplanet_data()
+        published = sync.nasa_api.store._current_dir('exoplanets')
+
+        sync.nasa_api.fetch_exoplanet_data()
+        assert server.not_modified_hits == 1
+        assert sync.nasa_api.store._current_dir('exoplanets') == published
+        print("✓ Conditional request skipped an unchanged download")
+    finally:
+        server.close()
+        shutil.rmtree(data_dir, ignore_errors=True)
+
+def test_host_stars_follow_planets():
+    """The star table is grouped from the planets and patched per host on delta syncs"""
+    data_dir = tempfile.mkdtemp()
+    server = FakeTAPServer([
+        make_row('A b', 'A', 2020, '2024-01-10', spectype='K2 V'),
+        make_row('A c', 'A', 2021, '2024-01-10', teff=None),
+        make_row('B b', 'B', 2021, '2024-02-01', teff=3200.0),
+    ])
+    try:
+        sync = make_sync(server, data_dir)
+        sync.sync()
+        stars = {s['name']: s for s in sync.nasa_api.store.load('stars').rows()}
+        assert sorted(stars) == ['A', 'B']
+        assert stars['A']['planet_count'] == 2 and stars['A']['spectral_type'] == 'K'
+        assert stars['A']['temperature'] == 5800.0 and stars['A']['magnitude'] == 9.5
+        assert stars['B']['spectral_type'] == 'M'
+
+        # Move B's planet to a new host C and add a planet to A
+        server.rows[2] = make_row('B b', 'C', 2021, '2024-03-01')
+        server.rows.append(make_row('A d', 'A', 2024, '2024-03-02'))
+        sync.sync()
+        incremental = sync.nasa_api.store.load('stars')
+        assert [(s['name'], s['planet_count']) for s in incremental.rows()] == [('A', 3), ('C', 1)]
+
+        sync.nasa_api.save_stars()
+        assert sync.nasa_api.store.load('stars').rows() == incremental.rows()
+        print("✓ Host star table rebuilt incrementally, matching a full rebuild")
+    finally:
+        server.close()
+        shutil.rmtree(data_dir, ignore_errors=True)
+
+if __name__ == "__main__":
+    print("🚀 Testing TAP ingestion against a local stand-in server")
+    print("=" * 50)
+
+    test_full_then_delta_sync()
+    test_unchanged_delta_is_noop()
+    test_full_sync_after_store_deleted()
+    test_delta_merge_matches_full_pull()
+    test_delta_merged_into_published_table()
+    test_paged_fetch_with_retries()
+    test_csv_text_decoding()
+    test_conditional_fetch_not_modified()
+    test_host_stars_follow_planets()
+
+    print("✅ All tests completed!")